@@ -1,46 +1,48 @@
-import matplotlib.pyplot as plt
-import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Final"))
+from chart_rendering import chart, render_charts, show_charts
+
+# "interactive" shows each chart; "headless" renders them to chart_dir in
+# parallel worker processes (no display needed)
+render_mode = "interactive"
+chart_dir = "figures"
 
 # Group distribution
 groups = ['Group 1', 'Group 2', 'Group 3']
 counts = [3, 5, 2]
 colors = ['#FF9999', '#66B3FF', '#99FF99']
 
-# Group distribution pie chart
-plt.figure(figsize=(8, 6))
-plt.pie(counts, labels=groups, autopct='%1.1f%%', colors=colors, startangle=90)
-plt.title('Workflow Group Distribution')
-plt.tight_layout()
-plt.show()
-
 # FormKey sequence frequency
 formkeys = ['252', '254', '256']
 frequencies = [50, 30, 20]  # percentage
 
-# Sequence frequency bar chart
-plt.figure(figsize=(8, 5))
-plt.bar(formkeys, frequencies, color='#4C72B0')
-plt.xlabel('Third FormKey')
-plt.ylabel('Frequency (%)')
-plt.title('Third Task FormKey Distribution')
-plt.ylim(0, 60)
-for i, v in enumerate(frequencies):
-    plt.text(i, v + 1, f"{v}%", ha='center')
-plt.tight_layout()
-plt.show()
-
 # Duration comparison
 tasks = ['165→173', '173→252', '173→254', '173→256']
 durations = [5, 22, 18, 15]  # minutes
 
-# Duration comparison chart
-plt.figure(figsize=(10, 5))
-plt.plot(tasks, durations, marker='o', linestyle='-', color='#55A868')
-plt.xlabel('Task Transition')
-plt.ylabel('Avg Duration (min)')
-plt.title('Task Transition Durations')
-plt.grid(alpha=0.3)
-for i, v in enumerate(durations):
-    plt.text(i, v + 0.5, f"{v}min", ha='center')
-plt.tight_layout()
-plt.show()
+
+def main():
+    charts = [
+        # Group distribution pie chart
+        chart("pie", groups, counts, 'Workflow Group Distribution', 'group_distribution.png',
+              figsize=(8, 6), colors=colors, group_sizes=True),
+        # Sequence frequency bar chart
+        chart("bar", formkeys, frequencies, 'Third Task FormKey Distribution', 'third_formkey_distribution.png',
+              figsize=(8, 5), color='#4C72B0', xlabel='Third FormKey', ylabel='Frequency (%)',
+              ylim=(0, 60), text_format='{:.0f}%', text_offset=1),
+        # Duration comparison chart
+        chart("line", tasks, durations, 'Task Transition Durations', 'task_transition_durations.png',
+              figsize=(10, 5), color='#55A868', xlabel='Task Transition', ylabel='Avg Duration (min)',
+              grid='both', grid_alpha=0.3, text_format='{:.0f}min', text_offset=0.5),
+    ]
+
+    if render_mode == "headless":
+        render_charts(charts, chart_dir)
+    else:
+        show_charts(charts)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 from collections import defaultdict
 import numpy as np
-from sklearn.tree import DecisionTreeClassifier
 import time
-import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Final"))
+from bpmn_parser import load_bpmn_sequences
+from chart_rendering import chart, render_charts, show_charts
+from group_report import GroupKeyIndex
+from transition_durations import aggregate_event_log
 
 # BPMN dictionary data with all 10 processes
 bpmn_data = {
@@ -18,108 +24,127 @@ bpmn_data = {
     "Process 10-263.bpmn20.xml": [165, 173, 256, 252, 253]
 }
 
-# Prepare features (sorted first 4 formKeys) for all 10 processes
-X_train = []
-process_names = []
-for process, formkeys in bpmn_data.items():
-    process_names.append(process)
-    X_train.append(sorted(formkeys[:4]))  # Using first 4 formKeys
-
-X_train = np.array(X_train)
-
-# Assign groups based on unique combinations of first 4 formKeys
-unique_keys = {}
-label_counter = 1
-y_train = []
-
-for formkeys in map(tuple, X_train):
-    if formkeys not in unique_keys:
-        unique_keys[formkeys] = label_counter
-        label_counter += 1
-    y_train.append(unique_keys[formkeys])
-
-y_train = np.array(y_train)
-
-# Train Decision Tree Classifier
-clf = DecisionTreeClassifier(random_state=42)
-clf.fit(X_train, y_train)
-
-# Measure prediction time
-start_time = time.time()
-predicted_labels = clf.predict(X_train)
-prediction_time = time.time() - start_time
-
-# Group results
-grouped_processes = defaultdict(list)
-for label, process in zip(predicted_labels, process_names):
-    grouped_processes[label].append(process)
-
-# Prepare output
-output = "BPMN Process Groups (using starting 4 formKeys):\n\n"
-for group_id, processes in grouped_processes.items():
-    group_key = [k for k, v in unique_keys.items() if v == group_id][0]
-    output += f"Group {group_id}: Starting formKeys {group_key}\n"
-    for process in processes:
-        output += f"  - {process}\n"
-    output += "\n"
-
-# Add prediction time to output
-output += f"⏱️ Prediction time: {prediction_time:.6f} seconds\n"
-print(output)
-
-# ========== VISUALIZATIONS ==========
-# Prepare data for visualizations
-group_ids = sorted(grouped_processes.keys())
-group_counts = [len(grouped_processes[gid]) for gid in group_ids]
-group_labels = [f"Group {gid}" for gid in group_ids]
-group_formkeys = [str([k for k,v in unique_keys.items() if v==gid][0]) for gid in group_ids]
-
-# Simulated duration data (would come from real event logs)
-durations = np.random.randint(10, 30, size=len(group_ids))  # Simulated avg durations
-
-# 1. Pie Chart - Process Distribution
-plt.figure(figsize=(10, 7))
-plt.pie(group_counts, labels=group_labels, autopct='%1.1f%%', 
-        startangle=90, colors=plt.cm.Pastel1(np.arange(len(group_ids))))
-plt.title('BPMN Process Distribution by Groups\n(Based on Starting 4 FormKeys)', fontsize=14)
-plt.tight_layout()
-plt.savefig('process_distribution_pie.png')
-plt.show()
-
-# 2. Bar Chart - Process Counts
-plt.figure(figsize=(10, 6))
-bars = plt.bar(group_labels, group_counts, color=plt.cm.Set2(np.arange(len(group_ids))))
-plt.xlabel('Workflow Groups', fontsize=12)
-plt.ylabel('Number of Processes', fontsize=12)
-plt.title('BPMN Process Counts by Group\n(Based on Starting 4 FormKeys)', fontsize=14)
-plt.xticks(rotation=15)
-plt.grid(axis='y', alpha=0.3)
-
-# Add formKey labels to bars
-for bar, formkey in zip(bars, group_formkeys):
-    height = bar.get_height()
-    plt.text(bar.get_x() + bar.get_width()/2., height,
-             f'Keys: {formkey}', ha='center', va='bottom', fontsize=9)
-
-plt.tight_layout()
-plt.savefig('process_counts_bar.png')
-plt.show()
-
-# 3. Line Chart - Task Transition Durations
-plt.figure(figsize=(12, 6))
-plt.plot(group_labels, durations, marker='o', linestyle='-', 
-         color='#2c7bb6', linewidth=2.5, markersize=10)
-
-plt.xlabel('Workflow Groups', fontsize=12)
-plt.ylabel('Average Duration (minutes)', fontsize=12)
-plt.title('Average Task Transition Durations\n(Based on FormKey Sequences)', fontsize=14)
-plt.ylim(0, max(durations)*1.2)
-plt.grid(alpha=0.4)
-
-# Add duration values to points
-for i, dur in enumerate(durations):
-    plt.text(i, dur+1, f'{dur} min', ha='center', fontsize=10)
-
-plt.tight_layout()
-plt.savefig('task_durations_line.png')
-plt.show()
+# Directory of *.bpmn20.xml files to read the sequences from instead (parsed
+# files are cached, so only new or changed files are parsed again)
+bpmn_dir = None
+
+
+def read_bpmn_data():
+    """bpmn_data, or the sequences parsed from bpmn_dir when it is set"""
+    return load_bpmn_sequences(bpmn_dir) if bpmn_dir else bpmn_data
+
+
+# Task-completion event log (CSV with instance_id, formKey, timestamp; the
+# instance ids are the process names above). Without one the durations are simulated.
+event_log_path = None
+
+
+# "interactive" saves and shows each chart; "headless" renders them to
+# chart_dir in parallel worker processes (no display needed)
+render_mode = "interactive"
+chart_dir = "."
+
+
+def main():
+    from sklearn.tree import DecisionTreeClassifier
+
+    bpmn_data = read_bpmn_data()
+
+    # Prepare features (sorted first 4 formKeys) for all 10 processes
+    X_train = []
+    process_names = []
+    for process, formkeys in bpmn_data.items():
+        process_names.append(process)
+        X_train.append(sorted(formkeys[:4]))  # Using first 4 formKeys
+
+    X_train = np.array(X_train)
+
+    # Assign groups based on unique combinations of first 4 formKeys
+    unique_keys = {}
+    label_counter = 1
+    y_train = []
+
+    for formkeys in map(tuple, X_train):
+        if formkeys not in unique_keys:
+            unique_keys[formkeys] = label_counter
+            label_counter += 1
+        y_train.append(unique_keys[formkeys])
+
+    y_train = np.array(y_train)
+
+    # Train Decision Tree Classifier
+    clf = DecisionTreeClassifier(random_state=42)
+    clf.fit(X_train, y_train)
+
+    # Measure prediction time
+    start_time = time.time()
+    predicted_labels = clf.predict(X_train)
+    prediction_time = time.time() - start_time
+
+    # Group results
+    grouped_processes = defaultdict(list)
+    for label, process in zip(predicted_labels, process_names):
+        grouped_processes[label].append(process)
+
+    # Prepare output (group keys are looked up in the group <-> key index, and
+    # the lines are joined once at the end)
+    group_index = GroupKeyIndex.from_mapping(unique_keys)
+    output = ["BPMN Process Groups (using starting 4 formKeys):\n\n"]
+    for group_id, processes in grouped_processes.items():
+        output.append(f"Group {group_id}: Starting formKeys {group_index.key_of(group_id)}\n")
+        output.extend(f"  - {process}\n" for process in processes)
+        output.append("\n")
+
+    # Add prediction time to output
+    output.append(f"⏱️ Prediction time: {prediction_time:.6f} seconds\n")
+    print("".join(output))
+
+    # ========== VISUALIZATIONS ==========
+    # Prepare data for visualizations
+    group_ids = sorted(grouped_processes.keys())
+    group_counts = [len(grouped_processes[gid]) for gid in group_ids]
+    group_labels = [f"Group {gid}" for gid in group_ids]
+    group_formkeys = [str(group_index.key_of(gid)) for gid in group_ids]
+
+    mean_minutes = {}
+    if event_log_path:
+        # Mean transition duration of each group's processes, in minutes
+        group_of = {process: int(label) for process, label in zip(process_names, predicted_labels)}
+        mean_minutes = {row["group"]: row["mean"] / 60
+                        for row in aggregate_event_log(event_log_path, group_of).group_summary()}
+    if mean_minutes:
+        durations = np.array([mean_minutes.get(gid, 0.0) for gid in group_ids])
+    else:
+        # No event log, or none of its transitions belong to these groups
+        durations = np.random.randint(10, 30, size=len(group_ids))  # Simulated avg durations
+
+    charts = [
+        # 1. Pie Chart - Process Distribution
+        chart("pie", group_labels, group_counts,
+              'BPMN Process Distribution by Groups\n(Based on Starting 4 FormKeys)',
+              'process_distribution_pie.png', figsize=(10, 7), cmap='Pastel1', title_fontsize=14,
+              group_sizes=True),
+        # 2. Bar Chart - Process Counts, with the formKeys of each group on its bar
+        chart("bar", group_labels, group_counts,
+              'BPMN Process Counts by Group\n(Based on Starting 4 FormKeys)', 'process_counts_bar.png',
+              figsize=(10, 6), cmap='Set2', xlabel='Workflow Groups', ylabel='Number of Processes',
+              title_fontsize=14, label_fontsize=12, xticks_rotation=15, grid='y', grid_alpha=0.3,
+              texts=[f'Keys: {formkey}' for formkey in group_formkeys], text_va='bottom',
+              text_fontsize=9, additive=True),
+        # 3. Line Chart - Task Transition Durations
+        chart("line", group_labels, durations,
+              'Average Task Transition Durations\n(Based on FormKey Sequences)', 'task_durations_line.png',
+              figsize=(12, 6), color='#2c7bb6', linewidth=2.5, markersize=10,
+              xlabel='Workflow Groups', ylabel='Average Duration (minutes)', title_fontsize=14,
+              label_fontsize=12, ylim=(0, max(durations)*1.2), grid='both', grid_alpha=0.4,
+              text_format='{:.0f} min', text_offset=1, text_fontsize=10),
+    ]
+
+    if render_mode == "headless":
+        render_charts(charts, chart_dir)
+    else:
+        show_charts(charts, save_dir=chart_dir)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,8 +1,12 @@
 from collections import defaultdict
+import os
+import sys
 import numpy as np
-from sklearn.tree import DecisionTreeClassifier
 import time  # Import time module
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Final"))
+from group_report import GroupKeyIndex
+
 # BPMN dictionary data with all 10 processes
 bpmn_data = {
     "Process 1-163.bpmn20.xml": [165, 173, 254, 255, 256],
@@ -25,52 +29,60 @@ bpmn_data = {
 #Form 6 = 255
 #Form 7 = 256
 
-# Prepare features (sorted first 4 formKeys) for all 10 processes
-X_train = []
-process_names = []
-for process, formkeys in bpmn_data.items():
-    process_names.append(process)
-    X_train.append(sorted(formkeys[:4]))  # Using first 4 formKeys
-
-X_train = np.array(X_train)
-
-# Assign groups based on unique combinations of first 4 formKeys
-unique_keys = {}
-label_counter = 1
-y_train = []
-
-for formkeys in map(tuple, X_train):
-    if formkeys not in unique_keys:
-        unique_keys[formkeys] = label_counter
-        label_counter += 1
-    y_train.append(unique_keys[formkeys])
-
-y_train = np.array(y_train)
-
-# Train Decision Tree Classifier
-clf = DecisionTreeClassifier(random_state=42)
-clf.fit(X_train, y_train)
-
-# Measure prediction time
-start_time = time.time()
-predicted_labels = clf.predict(X_train)
-prediction_time = time.time() - start_time
-
-# Group results
-grouped_processes = defaultdict(list)
-for label, process in zip(predicted_labels, process_names):
-    grouped_processes[label].append(process)
-
-# Prepare output
-output = "BPMN Process Groups (using starting 4 formKeys):\n\n"
-for group_id, processes in grouped_processes.items():
-    group_key = [k for k, v in unique_keys.items() if v == group_id][0]
-    output += f"Group {group_id}: Starting formKeys {group_key}\n"
-    for process in processes:
-        output += f"  - {process}\n"
-    output += "\n"
-
-# Add prediction time to output
-output += f"⏱️ Prediction time: {prediction_time:.6f} seconds"
-
-print(output)
+
+def main():
+    from sklearn.tree import DecisionTreeClassifier
+    
+    # Prepare features (sorted first 4 formKeys) for all 10 processes
+    X_train = []
+    process_names = []
+    for process, formkeys in bpmn_data.items():
+        process_names.append(process)
+        X_train.append(sorted(formkeys[:4]))  # Using first 4 formKeys
+
+    X_train = np.array(X_train)
+
+    # Assign groups based on unique combinations of first 4 formKeys
+    unique_keys = {}
+    label_counter = 1
+    y_train = []
+
+    for formkeys in map(tuple, X_train):
+        if formkeys not in unique_keys:
+            unique_keys[formkeys] = label_counter
+            label_counter += 1
+        y_train.append(unique_keys[formkeys])
+
+    y_train = np.array(y_train)
+
+    # Train Decision Tree Classifier
+    clf = DecisionTreeClassifier(random_state=42)
+    clf.fit(X_train, y_train)
+
+    # Measure prediction time
+    start_time = time.time()
+    predicted_labels = clf.predict(X_train)
+    prediction_time = time.time() - start_time
+
+    # Group results
+    grouped_processes = defaultdict(list)
+    for label, process in zip(predicted_labels, process_names):
+        grouped_processes[label].append(process)
+
+    # Prepare output (group keys are looked up in the group <-> key index, and
+    # the lines are joined once at the end)
+    group_index = GroupKeyIndex.from_mapping(unique_keys)
+    output = ["BPMN Process Groups (using starting 4 formKeys):\n\n"]
+    for group_id, processes in grouped_processes.items():
+        output.append(f"Group {group_id}: Starting formKeys {group_index.key_of(group_id)}\n")
+        output.extend(f"  - {process}\n" for process in processes)
+        output.append("\n")
+
+    # Add prediction time to output
+    output.append(f"⏱️ Prediction time: {prediction_time:.6f} seconds")
+
+    print("".join(output))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
-from collections import defaultdict, deque
-import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Final"))
+from similarity_lsh import approximate_similar_pairs
+from union_find import UnionFind
+from similarity_sparse import similar_process_pairs
+from similarity_edit import edit_similar_process_pairs
 
 # BPMN dictionary data with all 10 processes
 bpmn_data = {
@@ -15,80 +21,78 @@ bpmn_data = {
     "Process 10-263.bpmn20.xml": [165, 252, 255, 256, 173]
 }
 
-print("="*70)
-print("SEQUENCE SIMILARITY ANALYSIS (Ignoring Order)")
-print("="*70)
+# "jaccard" compares formKey sets (order ignored), "levenshtein" compares the
+# sequences in order (normalized edit distance)
+similarity_metric = "jaccard"
 
-def calculate_sequence_similarity(seq1, seq2):
-    """Calculate Jaccard similarity between two sequences (order ignored)"""
-    set1, set2 = set(seq1), set(seq2)
-    intersection = len(set1.intersection(set2))
-    union = len(set1.union(set2))
-    return intersection / union if union > 0 else 0
 
 # Find similar process pairs with similarity >= 0.6
 similarity_threshold = 0.6
-similar_pairs = []
-
-processes = list(bpmn_data.keys())
-for i in range(len(processes)):
-    for j in range(i+1, len(processes)):
-        proc1, proc2 = processes[i], processes[j]
-        seq1, seq2 = bpmn_data[proc1], bpmn_data[proc2]
-        similarity = calculate_sequence_similarity(seq1, seq2)
-        if similarity >= similarity_threshold:
-            similar_pairs.append((proc1, proc2, similarity))
-
-# Build similarity graph
-graph = defaultdict(set)
-for proc1, proc2, _ in similar_pairs:
-    graph[proc1].add(proc2)
-    graph[proc2].add(proc1)
-
-# Find connected components (groups)
-visited = set()
-groups = []
-
-for process in processes:
-    if process not in visited:
-        queue = deque([process])
-        group = set()
-        while queue:
-            current = queue.popleft()
-            if current not in visited:
-                visited.add(current)
-                group.add(current)
-                # Add all connected neighbors
-                queue.extend(graph[current] - visited)
-        groups.append(group)
-
-# Prepare and print results
-print(f"SIMILAR PROCESS PAIRS (similarity >= {similarity_threshold}):")
-print("-" * 70)
-if similar_pairs:
-    # Sort by similarity descending
-    similar_pairs.sort(key=lambda x: x[2], reverse=True)
-    for proc1, proc2, similarity in similar_pairs:
-        print(f"{proc1} ↔ {proc2}")
-        print(f"  Similarity: {similarity:.2f}")
-        print(f"  FormKeys 1: {bpmn_data[proc1]}")
-        print(f"  FormKeys 2: {bpmn_data[proc2]}")
+use_lsh = False  # approximate candidate generation for large datasets
+
+
+def main():
+    print("="*70)
+    if similarity_metric == "levenshtein":
+        print("SEQUENCE SIMILARITY ANALYSIS (Order-Aware)")
+    else:
+        print("SEQUENCE SIMILARITY ANALYSIS (Ignoring Order)")
+    print("="*70)
+
+    similar_pairs = []
+
+    processes = list(bpmn_data.keys())
+    if similarity_metric == "levenshtein":
+        # Banded edit distance, abandoning pairs that cannot reach the threshold
+        similar_pairs = edit_similar_process_pairs(bpmn_data, similarity_threshold)
+    elif use_lsh:
+        # MinHash + LSH proposes candidate pairs; only those are checked exactly
+        pair_i, pair_j, pair_similarity = approximate_similar_pairs(list(bpmn_data.values()), similarity_threshold)
+        for i, j, similarity in zip(pair_i.tolist(), pair_j.tolist(), pair_similarity.tolist()):
+            similar_pairs.append((processes[i], processes[j], similarity))
+    else:
+        # Exact Jaccard for all pairs from blocked sparse products
+        similar_pairs = similar_process_pairs(bpmn_data, similarity_threshold)
+
+    # Merge similar processes into groups (union-find, no adjacency graph needed)
+    process_index = {process: i for i, process in enumerate(processes)}
+    union_find = UnionFind(len(processes))
+    for proc1, proc2, _ in similar_pairs:
+        union_find.union(process_index[proc1], process_index[proc2])
+
+    groups = [{processes[i] for i in members} for members in union_find.groups()]
+
+    # Prepare and print results
+    print(f"SIMILAR PROCESS PAIRS (similarity >= {similarity_threshold}):")
+    print("-" * 70)
+    if similar_pairs:
+        # Sort by similarity descending
+        similar_pairs.sort(key=lambda x: x[2], reverse=True)
+        for proc1, proc2, similarity in similar_pairs:
+            print(f"{proc1} ↔ {proc2}")
+            print(f"  Similarity: {similarity:.2f}")
+            print(f"  FormKeys 1: {bpmn_data[proc1]}")
+            print(f"  FormKeys 2: {bpmn_data[proc2]}")
+            print()
+    else:
+        print("No process pairs found with similarity >= 0.6")
+
+    print("\n" + "="*70)
+    print("PROCESS GROUPS BASED ON SIMILARITY")
+    print("="*70)
+    for i, group in enumerate(groups, 1):
+        print(f"Group {i}:")
+        for process in sorted(group):
+            print(f"  - {process}")
         print()
-else:
-    print("No process pairs found with similarity >= 0.6")
-
-print("\n" + "="*70)
-print("PROCESS GROUPS BASED ON SIMILARITY")
-print("="*70)
-for i, group in enumerate(groups, 1):
-    print(f"Group {i}:")
-    for process in sorted(group):
-        print(f"  - {process}")
-    print()
-
-print("="*70)
-print("SUMMARY")
-print("="*70)
-print(f"Total similar pairs found: {len(similar_pairs)}")
-print(f"Total groups formed: {len(groups)}")
-print(f"Group sizes: {[len(group) for group in groups]}")
+
+    print("="*70)
+    print("SUMMARY")
+    print("="*70)
+    print(f"Total similar pairs found: {len(similar_pairs)}")
+    print(f"Total groups formed: {len(groups)}")
+    print(f"Group sizes: {[len(group) for group in groups]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,15 @@
-from collections import defaultdict, deque
-import numpy as np
-import matplotlib.pyplot as plt
+import os
+import sys
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Final"))
+from similarity_lsh import approximate_similar_pairs
+from similarity_sparse import similar_process_pairs
+from union_find import UnionFind
+from instrumentation import profiler
+from bpmn_parser import load_bpmn_sequences
+from chart_rendering import chart, render_charts, show_charts
+from transition_durations import aggregate_event_log
 
 # BPMN dictionary data with all 10 processes
 bpmn_data = {
@@ -16,148 +25,158 @@ bpmn_data = {
     "Process 10-263.bpmn20.xml": [165, 252, 255, 256, 173]
 }
 
-print("="*70)
-print("SEQUENCE SIMILARITY ANALYSIS (Ignoring Order)")
-print("="*70)
+# Directory of *.bpmn20.xml files to read the sequences from instead (parsed
+# files are cached, so only new or changed files are parsed again)
+bpmn_dir = None
+
+
+def read_bpmn_data():
+    """bpmn_data, or the sequences parsed from bpmn_dir when it is set"""
+    return load_bpmn_sequences(bpmn_dir) if bpmn_dir else bpmn_data
 
-def calculate_sequence_similarity(seq1, seq2):
-    """Calculate Jaccard similarity between two sequences (order ignored)"""
-    set1, set2 = set(seq1), set(seq2)
-    intersection = len(set1.intersection(set2))
-    union = len(set1.union(set2))
-    return intersection / union if union > 0 else 0
 
 # Find similar process pairs with similarity >= 0.8
 similarity_threshold = 0.8
-similar_pairs = []
-
-processes = list(bpmn_data.keys())
-for i in range(len(processes)):
-    for j in range(i+1, len(processes)):
-        proc1, proc2 = processes[i], processes[j]
-        seq1, seq2 = bpmn_data[proc1], bpmn_data[proc2]
-        similarity = calculate_sequence_similarity(seq1, seq2)
-        if similarity >= similarity_threshold:
-            similar_pairs.append((proc1, proc2, similarity))
-
-# Build similarity graph
-graph = defaultdict(set)
-for proc1, proc2, _ in similar_pairs:
-    graph[proc1].add(proc2)
-    graph[proc2].add(proc1)
-
-# Find connected components (groups)
-visited = set()
-groups = []
-
-for process in processes:
-    if process not in visited:
-        queue = deque([process])
-        group = set()
-        while queue:
-            current = queue.popleft()
-            if current not in visited:
-                visited.add(current)
-                group.add(current)
-                # Add all connected neighbors
-                queue.extend(graph[current] - visited)
-        groups.append(group)
-
-# Prepare and print results
-print(f"SIMILAR PROCESS PAIRS (similarity >= {similarity_threshold}):")
-print("-" * 70)
-if similar_pairs:
-    # Sort by similarity descending
-    similar_pairs.sort(key=lambda x: x[2], reverse=True)
-    for proc1, proc2, similarity in similar_pairs:
-        print(f"{proc1} ↔ {proc2}")
-        print(f"  Similarity: {similarity:.2f}")
-        print(f"  FormKeys 1: {bpmn_data[proc1]}")
-        print(f"  FormKeys 2: {bpmn_data[proc2]}")
+use_lsh = False  # approximate candidate generation for large datasets
+
+
+# Set to a .json/.csv path to record stage timings for this run
+metrics_report = None
+
+
+# "interactive" shows each chart; "headless" renders them to chart_dir in
+# parallel worker processes (no display needed)
+render_mode = "interactive"
+chart_dir = "figures"
+
+
+# Task-completion event log (CSV with instance_id, formKey, timestamp); without
+# one the chart shows simulated durations for common transitions
+event_log_path = None
+
+
+def main():
+    bpmn_data = read_bpmn_data()
+
+    print("="*70)
+    print("SEQUENCE SIMILARITY ANALYSIS (Ignoring Order)")
+    print("="*70)
+
+    similar_pairs = []
+
+    profiler.enabled = metrics_report is not None
+
+    with profiler.stage("similarity"):
+        processes = list(bpmn_data.keys())
+        if use_lsh:
+            # MinHash + LSH proposes candidate pairs; only those are checked exactly
+            pair_i, pair_j, pair_similarity = approximate_similar_pairs(list(bpmn_data.values()), similarity_threshold)
+            for i, j, similarity in zip(pair_i.tolist(), pair_j.tolist(), pair_similarity.tolist()):
+                similar_pairs.append((processes[i], processes[j], similarity))
+        else:
+            # Exact Jaccard for all pairs from blocked sparse products
+            similar_pairs = similar_process_pairs(bpmn_data, similarity_threshold)
+
+    # Merge similar processes into groups (union-find, no adjacency graph needed)
+    with profiler.stage("grouping"):
+        process_index = {process: i for i, process in enumerate(processes)}
+        union_find = UnionFind(len(processes))
+        for proc1, proc2, _ in similar_pairs:
+            union_find.union(process_index[proc1], process_index[proc2])
+
+        groups = [{processes[i] for i in members} for members in union_find.groups()]
+
+    # Prepare and print results
+    print(f"SIMILAR PROCESS PAIRS (similarity >= {similarity_threshold}):")
+    print("-" * 70)
+    if similar_pairs:
+        # Sort by similarity descending
+        similar_pairs.sort(key=lambda x: x[2], reverse=True)
+        for proc1, proc2, similarity in similar_pairs:
+            print(f"{proc1} ↔ {proc2}")
+            print(f"  Similarity: {similarity:.2f}")
+            print(f"  FormKeys 1: {bpmn_data[proc1]}")
+            print(f"  FormKeys 2: {bpmn_data[proc2]}")
+            print()
+    else:
+        print("No process pairs found with similarity >= 0.8")
+
+    print("\n" + "="*70)
+    print("PROCESS GROUPS BASED ON SIMILARITY")
+    print("="*70)
+    for i, group in enumerate(groups, 1):
+        print(f"Group {i}:")
+        for process in sorted(group):
+            print(f"  - {process}")
         print()
-else:
-    print("No process pairs found with similarity >= 0.8")
-
-print("\n" + "="*70)
-print("PROCESS GROUPS BASED ON SIMILARITY")
-print("="*70)
-for i, group in enumerate(groups, 1):
-    print(f"Group {i}:")
-    for process in sorted(group):
-        print(f"  - {process}")
-    print()
-
-print("="*70)
-print("SUMMARY")
-print("="*70)
-print(f"Total similar pairs found: {len(similar_pairs)}")
-print(f"Total groups formed: {len(groups)}")
-print(f"Group sizes: {[len(group) for group in groups]}")
-
-# ======================
-# VISUALIZATIONS
-# ======================
-
-# 1. Workflow Group Distribution (Pie Chart)
-plt.figure(figsize=(8, 6))
-group_sizes = [len(group) for group in groups]
-labels = [f'Group {i+1}' for i in range(len(groups))]
-colors = ['#FF9999', '#66B3FF', '#99FF99', '#FFCC99', '#C5A3FF']
-plt.pie(group_sizes, labels=labels, autopct='%1.1f%%', colors=colors, startangle=90)
-plt.title('Workflow Group Distribution', fontsize=14)
-plt.axis('equal')
-plt.tight_layout()
-#plt.savefig('workflow_group_distribution.png')
-plt.show()
-
-# 2. Task Frequency (Bar Chart)
-# Collect all formKeys
-all_formkeys = []
-for formkeys in bpmn_data.values():
-    all_formkeys.extend(formkeys)
-    
-# Count frequency
-formkey_counts = {key: all_formkeys.count(key) for key in set(all_formkeys)}
-sorted_keys = sorted(formkey_counts.keys())
-counts = [formkey_counts[key] for key in sorted_keys]
-
-plt.figure(figsize=(10, 6))
-plt.bar([str(k) for k in sorted_keys], counts, color='#4C72B0')
-plt.xlabel('FormKey', fontsize=12)
-plt.ylabel('Frequency', fontsize=12)
-plt.title('Task Frequency Across All Processes', fontsize=14)
-plt.xticks(rotation=45)
-plt.grid(axis='y', alpha=0.3)
-for i, v in enumerate(counts):
-    plt.text(i, v + 0.1, str(v), ha='center')
-plt.tight_layout()
-#plt.savefig('task_frequency.png')
-plt.show()
-
-# 3. Duration Analysis (Line Chart)
-# Simulated duration data for common transitions
-transitions = ['165 → 173', '173 → 252', '252 → 253/254', '252 → 255/256']
-durations = [5, 22, 18, 15]  # minutes
-
-plt.figure(figsize=(10, 6))
-plt.plot(transitions, durations, marker='o', linestyle='-', color='#55A868', linewidth=2)
-plt.title('Average Task Transition Durations', fontsize=14)
-plt.xlabel('Task Transition', fontsize=12)
-plt.ylabel('Duration (minutes)', fontsize=12)
-plt.grid(alpha=0.3)
-plt.ylim(0, max(durations) + 5)
-for i, v in enumerate(durations):
-    plt.text(i, v + 0.5, f"{v} min", ha='center', fontsize=10)
-plt.tight_layout()
-#plt.savefig('task_transition_durations.png')
-plt.show()
-
-# 4. Prediction Accuracy (Text Summary)
-print("\n" + "="*70)
-print("PREDICTION ACCURACY SUMMARY")
-print("="*70)
-print("• Grouping Accuracy: 100%")
-print("• Similarity Threshold: 0.8")
-print("• Perfect separation achieved with Jaccard similarity")
-print("• All processes correctly grouped based on formKey sets")
-print("• No misclassifications in similarity-based grouping")
\ No newline at end of file
+
+    print("="*70)
+    print("SUMMARY")
+    print("="*70)
+    print(f"Total similar pairs found: {len(similar_pairs)}")
+    print(f"Total groups formed: {len(groups)}")
+    print(f"Group sizes: {[len(group) for group in groups]}")
+
+    # ======================
+    # VISUALIZATIONS
+    # ======================
+
+    # 1. Workflow Group Distribution (Pie Chart)
+    group_sizes = [len(group) for group in groups]
+    labels = [f'Group {i+1}' for i in range(len(groups))]
+    colors = ['#FF9999', '#66B3FF', '#99FF99', '#FFCC99', '#C5A3FF']
+    charts = [chart("pie", labels, group_sizes, 'Workflow Group Distribution',
+                    'workflow_group_distribution.png', figsize=(8, 6), colors=colors,
+                    title_fontsize=14, equal_axis=True, group_sizes=True)]
+
+    # 2. Task Frequency (Bar Chart)
+    formkey_counts = Counter(key for formkeys in bpmn_data.values() for key in formkeys)
+    sorted_keys = sorted(formkey_counts.keys())
+    counts = [formkey_counts[key] for key in sorted_keys]
+    charts.append(chart("bar", [str(k) for k in sorted_keys], counts,
+                        'Task Frequency Across All Processes', 'task_frequency.png',
+                        color='#4C72B0', xlabel='FormKey', ylabel='Frequency', title_fontsize=14,
+                        label_fontsize=12, xticks_rotation=45, grid='y', grid_alpha=0.3,
+                        text_format='{:.0f}', text_offset=0.1, additive=True))
+
+    # 3. Duration Analysis (Line Chart)
+    rows = []
+    if event_log_path:
+        # Mean duration of the most frequent transitions, in minutes
+        rows = aggregate_event_log(event_log_path).transition_summary()
+        rows = sorted(rows, key=lambda row: row["count"], reverse=True)[:10]
+    if rows:
+        transitions = [f"{row['from_form_key']} → {row['to_form_key']}" for row in rows]
+        durations = [row["mean"] / 60 for row in rows]
+    else:
+        # No event log, or one without transitions: simulated durations
+        transitions = ['165 → 173', '173 → 252', '252 → 253/254', '252 → 255/256']
+        durations = [5, 22, 18, 15]  # minutes
+    charts.append(chart("line", transitions, durations, 'Average Task Transition Durations',
+                        'task_transition_durations.png', color='#55A868', linewidth=2,
+                        xlabel='Task Transition', ylabel='Duration (minutes)', title_fontsize=14,
+                        label_fontsize=12, grid='both', grid_alpha=0.3, ylim=(0, max(durations) + 5),
+                        text_format='{:.0f} min', text_offset=0.5, text_fontsize=10))
+
+    with profiler.stage("render"):
+        if render_mode == "headless":
+            render_charts(charts, chart_dir)
+        else:
+            show_charts(charts)
+
+    # 4. Prediction Accuracy (Text Summary)
+    print("\n" + "="*70)
+    print("PREDICTION ACCURACY SUMMARY")
+    print("="*70)
+    print("• Grouping Accuracy: 100%")
+    print("• Similarity Threshold: 0.8")
+    print("• Perfect separation achieved with Jaccard similarity")
+    print("• All processes correctly grouped based on formKey sets")
+    print("• No misclassifications in similarity-based grouping")
+
+    if metrics_report:
+        profiler.write_report(metrics_report, script="Visualizations.py")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
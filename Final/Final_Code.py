@@ -1,114 +1,187 @@
-import numpy as np
-import random
-import csv
-from collections import Counter, defaultdict
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
-import time
-
-# Load CSV file
-bpmn_data = {}
+import sys
+from process_loader import load_processes, iter_process_chunks
+from sequence_groups import stream_sequence_groups, label_sequences, remap_labels, group_members
+from group_index import HashGroupPredictor
+from model_store import dataset_fingerprint, artifact_path_for, save_artifact, load_artifact
+from group_report import GroupKeyIndex, write_group_listing, print_group_summary, write_group_report
+from instrumentation import profiler
+
 csv_file_path = "Generated_1000_Processes.csv"  # Hardcoded for direct run
-try:
-    with open(csv_file_path, newline='') as csvfile:
-        reader = csv.reader(csvfile)
-        header = next(reader)  # Skip header
-        for idx, row in enumerate(reader):
-            if row:
-                process_name = row[0]
-                form_keys = list(map(int, row[1:]))
-                bpmn_data[process_name] = form_keys
-except Exception as e:
-    print(f"Error reading CSV: {e}")
-    exit()
-
-# Convert sequences to features and labels
-X = []
-y = []
-unique_keys = {}
-label_counter = 0
-
-for process_name, sequence in bpmn_data.items():
-    key = tuple(sequence)
-    if key not in unique_keys:
-        unique_keys[key] = label_counter
-        label_counter += 1
-    X.append(sequence)
-    y.append(unique_keys[key])
-
-X = np.array(X)
-y = np.array(y)
-
-"""
-import random
-noise_ratio = 0.1  # 12% of samples will be noised
-noise_level = 1     # Change 1 form key per sequence
-noise_magnitude = [1, 2, 3]
-
-num_samples = len(X)
-num_noisy = int(noise_ratio * num_samples)
-noisy_indices = random.sample(range(num_samples), num_noisy)
-
-for i in noisy_indices:
-    change_index = random.randint(0, len(X[i]) - 1)
-    change = random.choice(noise_magnitude)
-    X[i][change_index] += change
-
-"""
-
-# Remove classes with only one sample
-label_counts = Counter(y)
-valid_indices = [i for i, label in enumerate(y) if label_counts[label] > 1]
-X = X[valid_indices]
-y = y[valid_indices]
-
-# Map filtered process names to their labels
-# Re-map labels to sequential group numbers: 1, 2, 3, ...
-label_remap = {}
-current_label = 1
-for old_label in sorted(set(y)):
-    label_remap[old_label] = current_label
-    current_label += 1
-
-# Apply remapped labels
-y = np.array([label_remap[label] for label in y])
-
-# Map filtered process names to their new labels
-filtered_process_names = [proc for proc, seq in bpmn_data.items() if tuple(seq) in unique_keys and label_counts[unique_keys[tuple(seq)]] > 1]
-filtered_labels = [label_remap[unique_keys[tuple(bpmn_data[proc])]] for proc in filtered_process_names]
-filtered_process_to_label = dict(zip(filtered_process_names, filtered_labels))
-
-# Split data
-min_test_size = max(len(set(y)) / len(y), 0.3)
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=min_test_size, stratify=y, random_state=42
-)
-
-# Train classifier
-clf = RandomForestClassifier(n_estimators=100, random_state=42)
-clf.fit(X_train, y_train)
-
-# Predict and evaluate
-start_time = time.time()
-predictions = clf.predict(X_test)
-prediction_time = time.time() - start_time
-accuracy = accuracy_score(y_test, predictions)
-
-#Used for the process groups being formed
-groups = defaultdict(list)
-for process, label in filtered_process_to_label.items():
-    groups[label].append(process)
-
-print("=== Process Groups ===")
-for group_id, processes in groups.items():
-    print(f"Group {group_id} ({len(processes)} processes):")
-    for p in processes:
-        print(f"  - {p}")
+
+# "random_forest" trains the classifier, "hash_index" looks each sequence up
+# directly (unseen sequences go to the nearest known group)
+predictor_mode = "random_forest"
+
+# Trained models are saved here, keyed by a hash of the formKey matrix; a run on
+# unchanged data loads the saved model instead of fitting again
+artifact_dir = "artifacts"
+
+# Streaming mode: read the CSV in fixed-size chunks and only keep one entry per
+# distinct sequence. Use it for logs too large to hold in memory; it reports the
+# exact-sequence groups but skips the classifier.
+streaming_mode = False
+chunk_size = 100_000
+
+# "full" lists every process of every group; "summary" prints one line per
+# group (much faster than the full listing for large files)
+console_mode = "full"
+
+# Also write the full group listing to this .csv, .jsonl or .parquet file
+report_path = None
+
+# Stage timings (and optionally tracemalloc peaks / cProfile stats) are written
+# to metrics_report when instrumentation is enabled
+instrumentation_enabled = False
+track_memory = False
+profile_stages = ()  # e.g. ("fit", "predict"), or True for every stage
+metrics_report = "metrics.json"
+profile_output = "profile.pstats"
+
+
+def print_streaming_groups(csv_file_path, chunk_size):
+    table, group_sequences, group_counts = stream_sequence_groups(
+        iter_process_chunks(csv_file_path, chunk_size)
+    )
+    print("=== Process Groups ===")
+    for group_id, (sequence, count) in enumerate(zip(group_sequences, group_counts), start=1):
+        print(f"Group {group_id} ({count} processes): {sequence.tolist()}")
+    print()
+    print(f"Distinct Sequences: {len(table)}")
+    print(f"Total Groups Created: {len(group_counts)}")
+
+
+def exact_groups(process_names, X):
+    """Filtered process names, their group numbers (1, 2, ...) and everything needed to train on them"""
+    # Convert sequences to labels (one label per distinct sequence, in order of first appearance)
+    with profiler.stage("label"):
+        y, unique_keys, label_counts = label_sequences(X)
+
+    with profiler.stage("filter"):
+        # Remove classes with only one sample
+        valid_mask = label_counts[y] > 1
+        X = X[valid_mask]
+
+        # Re-map labels to sequential group numbers: 1, 2, 3, ...
+        label_remap = remap_labels(label_counts, min_count=2)
+        y = label_remap[y[valid_mask]]
+
+        # Map filtered process names to their new labels
+        filtered_process_names = process_names[valid_mask]
+    return filtered_process_names, X, y, label_remap, unique_keys
+
+
+def train_and_evaluate(process_names, X, predictor_mode="random_forest", artifact_dir="artifacts"):
+    """Train (or load) the group classifier on the exact groups of X and score it on a held-out split"""
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import accuracy_score
+
+    fingerprint = dataset_fingerprint(X)
+    filtered_process_names, X, y, label_remap, unique_keys = exact_groups(process_names, X)
+
+    # Split data
+    with profiler.stage("split"):
+        min_test_size = max(len(set(y)) / len(y), 0.3)
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=min_test_size, stratify=y, random_state=42
+        )
+
+    # Train classifier, or reuse the one saved for this exact dataset
+    artifact_path = artifact_path_for(artifact_dir, fingerprint, predictor_mode)
+    artifact = load_artifact(artifact_path, fingerprint)
+    if artifact is not None:
+        clf = artifact["model"]
+        print(f"Loaded trained model from {artifact_path}")
+    else:
+        if predictor_mode == "hash_index":
+            clf = HashGroupPredictor(nearest_fallback=True)
+        else:
+            from sklearn.ensemble import RandomForestClassifier
+            clf = RandomForestClassifier(n_estimators=100, random_state=42)
+        with profiler.stage("fit"):
+            clf.fit(X_train, y_train)
+        save_artifact(artifact_path, clf, label_remap, unique_keys, fingerprint, predictor_mode)
+
+    # Predict and evaluate
+    with profiler.stage("predict") as predict_stage:
+        predictions = clf.predict(X_test)
+    return {
+        "process_names": filtered_process_names,
+        "labels": y,
+        "accuracy": accuracy_score(y_test, predictions),
+        "prediction_time": predict_stage.seconds,
+        "artifact_path": artifact_path,
+        "group_index": GroupKeyIndex.from_labels(label_remap, unique_keys),
+    }
+
+
+def print_groups(process_names, labels, console_mode="full", index=None, report_path=None):
+    #Used for the process groups being formed
+    with profiler.stage("grouping"):
+        group_ids, group_indices = group_members(labels)
+
+    with profiler.stage("report"):
+        if console_mode == "summary":
+            print_group_summary(group_ids, group_indices, index)
+            print()
+        else:
+            write_group_listing(sys.stdout, process_names, group_ids, group_indices)
+        if report_path:
+            write_group_report(report_path, process_names, group_ids, group_indices, index)
+            print(f"Group report written to {report_path}")
+
+
+def main():
+    profiler.enabled = instrumentation_enabled
+    profiler.track_memory = track_memory
+    profiler.profile_stages = profile_stages
+
+    if streaming_mode:
+        print_streaming_groups(csv_file_path, chunk_size)
+        return
+
+    # Load CSV file (parsed once, then memory-mapped from the .npy cache next to it)
+    try:
+        with profiler.stage("load_csv"):
+            process_names, X = load_processes(csv_file_path)
+    except Exception as e:
+        print(f"Error reading CSV: {e}")
+        return
+
+    # noise_experiment.py runs this experiment over a grid of settings in parallel
+    """
+    import random
+    import numpy as np
+    noise_ratio = 0.1  # 12% of samples will be noised
+    noise_level = 1     # Change 1 form key per sequence
+    noise_magnitude = [1, 2, 3]
+
+    X = np.array(X)  # writable copy of the memory-mapped cache
+    num_samples = len(X)
+    num_noisy = int(noise_ratio * num_samples)
+    noisy_indices = random.sample(range(num_samples), num_noisy)
+
+    for i in noisy_indices:
+        change_index = random.randint(0, len(X[i]) - 1)
+        change = random.choice(noise_magnitude)
+        X[i][change_index] += change
+
+    """
+
+    results = train_and_evaluate(process_names, X, predictor_mode, artifact_dir)
+    print_groups(results["process_names"], results["labels"], console_mode, results["group_index"], report_path)
+
+    # print("NOISED DATASET EXPERIMENT")
+    print(f"Prediction Accuracy: {results['accuracy'] * 100:.2f}%")
+    print(f"Prediction Time: {results['prediction_time']:.4f} seconds")
+    print(f"Total Groups Created: {len(set(results['labels']))}")
     print()
-    
-# print("NOISED DATASET EXPERIMENT")
-print(f"Prediction Accuracy: {accuracy * 100:.2f}%")
-print(f"Prediction Time: {prediction_time:.4f} seconds")
-print(f"Total Groups Created: {len(set(y))}")
-print()
\ No newline at end of file
+
+    if instrumentation_enabled:
+        profiler.write_report(metrics_report, csv_file_path=csv_file_path, predictor_mode=predictor_mode)
+        print(f"Metrics written to {metrics_report}")
+        if profiler.write_profile(profile_output):
+            print(f"Profile written to {profile_output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# python -m Final <command> from the repository root, or python Final <command>
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from cli import main
+
+main()
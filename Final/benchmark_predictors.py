@@ -0,0 +1,66 @@
+import time
+import numpy as np
+from process_loader import load_processes
+from sequence_groups import label_sequences, remap_labels
+from group_index import HashGroupPredictor
+
+# Compares fit and predict latency of the RandomForest and hash-index predictors
+# on the same split Final_Code.py uses
+csv_files = [
+    "Generated_1000_Processes.csv",
+    "Generated_2000_Processes.csv",
+    "Generated_5000_Processes.csv",
+]
+repeats = 5
+
+
+def exact_sequence_labels(X):
+    """Group labels 1..G for sequences shared by more than one process, 0 otherwise"""
+    labels, _, label_counts = label_sequences(X)
+    return remap_labels(label_counts, min_count=2)[labels]
+
+
+def best_time(func, repeats):
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import accuracy_score
+
+    predictors = {
+        "random_forest": lambda: RandomForestClassifier(n_estimators=100, random_state=42),
+        "hash_index": lambda: HashGroupPredictor(nearest_fallback=True),
+    }
+
+    print(f"{'dataset':<32}{'predictor':<16}{'fit (s)':>10}{'predict (s)':>14}{'accuracy':>10}")
+    print("-" * 82)
+    for csv_file_path in csv_files:
+        _, X = load_processes(csv_file_path)
+        y = exact_sequence_labels(X)
+        keep = y > 0
+        X, y = np.asarray(X)[keep], y[keep]
+
+        test_size = max(len(set(y)) / len(y), 0.3)
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, stratify=y, random_state=42
+        )
+
+        for name, make_predictor in predictors.items():
+            # Forest fits are slow, so they are timed once
+            fit_repeats = 1 if name == "random_forest" else repeats
+            fit_time, clf = best_time(lambda: make_predictor().fit(X_train, y_train), fit_repeats)
+            predict_time, predictions = best_time(lambda: clf.predict(X_test), repeats)
+            accuracy = accuracy_score(y_test, predictions)
+            print(f"{csv_file_path:<32}{name:<16}{fit_time:>10.4f}{predict_time:>14.6f}{accuracy * 100:>9.2f}%")
+
+
+if __name__ == "__main__":
+    main()
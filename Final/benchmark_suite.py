@@ -0,0 +1,354 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import queue as queue_module
+import tempfile
+import threading
+import time
+import traceback
+import warnings
+import numpy as np
+from synthetic_processes import ProcessGenerator, write_csv
+
+# Stage-by-stage scaling benchmark for the grouping pipeline.
+#
+#   python benchmark_suite.py                       # shipped CSVs + synthetic 10k/100k/1M
+#   python benchmark_suite.py --sizes 10000 50000 --output bench.json
+#
+# Every stage runs in a fresh (spawned) interpreter. Inputs a stage needs
+# (e.g. a fitted model for "predict") are prepared in the same process before
+# the timer starts; "stage RSS" is the highest resident memory sampled while
+# the timed section runs, less what was resident when it started, so setup
+# (loading and labelling the CSV) is not counted. The process-wide peaks are
+# kept in the results file as peak_rss_mb and setup_peak_rss_mb. Scaling
+# exponents are fitted per dataset family (shipped, synthetic). Stages are skipped above their row
+# limit, where they would dominate the run (exact all-pairs similarity, RF
+# fit with thousands of classes); skipped (dataset, stage) cells are printed
+# and listed under "skipped" in the results file, as are stages that fail
+# or are killed (e.g. out of memory). "predict" fits its forest on at most
+# PREDICT_FIT_ROWS rows and then times predict() over the whole test split in
+# chunks, so it runs at every size.
+#
+# Synthetic datasets draw formKeys from a vocabulary of SYNTHETIC_VOCAB_SIZE,
+# so, as in production logs, a process is only similar to a few others. With
+# the 7 formKeys of the shipped CSVs nearly every pair of processes clears the
+# similarity threshold, and any stage that reports similar pairs would be
+# quadratic in its output alone.
+
+SHIPPED_CSVS = [
+    "Generated_1000_Processes.csv",
+    "Generated_2000_Processes.csv",
+    "Generated_5000_Processes.csv",
+]
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# Largest dataset (rows) each stage is run on
+STAGE_LIMITS = {
+    "load_csv": None,
+    "load_cached": None,
+    "label": None,
+    "fit": 5_000,
+    "predict": None,
+    "hash_fit_predict": None,
+    "subsequences": 200_000,
+    "similarity_exact": 10_000,
+    "similarity_lsh": None,
+}
+SIMILARITY_THRESHOLD = 0.8
+SYNTHETIC_VOCAB_SIZE = 200
+PREDICT_FIT_ROWS = 1_000  # forest size grows with rows x classes
+PREDICT_CHUNK = 10_000
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _current_rss_mb():
+    # Resident pages from /proc (Linux); None where it is not available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError):
+        return None
+
+
+class RssSampler:
+    """Highest resident set size seen while the with-block runs, sampled every interval seconds"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while True:
+            rss = _current_rss_mb()
+            if rss is not None and (self.peak_mb is None or rss > self.peak_mb):
+                self.peak_mb = rss
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        # One last sample so a peak right at the end is not missed
+        rss = _current_rss_mb()
+        if rss is not None and (self.peak_mb is None or rss > self.peak_mb):
+            self.peak_mb = rss
+
+
+def make_synthetic_csv(path, num_processes, seed=42, num_sequences=None, vocab_size=SYNTHETIC_VOCAB_SIZE):
+    """Write num_processes 5-step processes drawn from a pool of repeated sequences"""
+    if num_sequences is None:
+        num_sequences = max(1, num_processes // 4)
+    write_csv(path, num_processes, ProcessGenerator(num_groups=num_sequences, vocab_size=vocab_size, seed=seed))
+
+
+def _labelled(csv_file_path):
+    from process_loader import load_processes
+    from sequence_groups import label_sequences, remap_labels
+    names, X = load_processes(csv_file_path)
+    labels, _, label_counts = label_sequences(X)
+    y = remap_labels(label_counts)[labels]
+    keep = y > 0
+    return names, np.asarray(X)[keep], y[keep]
+
+
+def _split(X, y):
+    from sklearn.model_selection import train_test_split
+    test_size = max(len(set(y.tolist())) / len(y), 0.3)
+    return train_test_split(X, y, test_size=test_size, stratify=y, random_state=42)
+
+
+def _stage(name, csv_file_path):
+    """Return (setup, timed) callables for a stage; setup's result is passed to timed"""
+    if name == "load_csv":
+        from process_loader import parse_process_csv
+        return lambda: None, lambda _: len(parse_process_csv(csv_file_path)[1])
+
+    if name == "load_cached":
+        from process_loader import load_processes
+        return (lambda: load_processes(csv_file_path),
+                lambda _: len(np.asarray(load_processes(csv_file_path)[1])))
+
+    if name == "label":
+        from process_loader import load_processes
+        from sequence_groups import label_sequences, remap_labels
+
+        def label(X):
+            labels, _, label_counts = label_sequences(X)
+            return len(remap_labels(label_counts)[labels])
+        return lambda: np.asarray(load_processes(csv_file_path)[1]), label
+
+    if name == "fit":
+        from sklearn.ensemble import RandomForestClassifier
+
+        def setup():
+            _, X, y = _labelled(csv_file_path)
+            return _split(X, y)
+
+        def fit(split):
+            X_train, _, y_train, _ = split
+            RandomForestClassifier(n_estimators=100, random_state=42).fit(X_train, y_train)
+            return len(X_train)
+        return setup, fit
+
+    if name == "predict":
+        from sklearn.ensemble import RandomForestClassifier
+
+        def setup():
+            _, X, y = _labelled(csv_file_path)
+            X_train, X_test, y_train, _ = _split(X, y)
+            model = RandomForestClassifier(n_estimators=100, random_state=42)
+            return model.fit(X_train[:PREDICT_FIT_ROWS], y_train[:PREDICT_FIT_ROWS]), X_test
+
+        def predict(state):
+            model, X_test = state
+            for start in range(0, len(X_test), PREDICT_CHUNK):
+                model.predict(X_test[start:start + PREDICT_CHUNK])
+            return len(X_test)
+        return setup, predict
+
+    if name == "hash_fit_predict":
+        from group_index import HashGroupPredictor
+
+        def setup():
+            _, X, y = _labelled(csv_file_path)
+            return _split(X, y)
+
+        def fit_predict(split):
+            X_train, X_test, y_train, _ = split
+            HashGroupPredictor().fit(X_train, y_train).predict(X_test)
+            return len(X_train) + len(X_test)
+        return setup, fit_predict
+
+    if name == "subsequences":
+        from subsequence_miner import SubsequenceMiner
+
+        def setup():
+            from process_loader import load_processes
+            names, X = load_processes(csv_file_path)
+            return dict(zip(names.tolist(), np.asarray(X).tolist()))
+        def subsequences(data):
+            SubsequenceMiner(data).common_subsequences(min_length=3)
+            return len(data)
+        return setup, subsequences
+
+    if name in ("similarity_exact", "similarity_lsh"):
+        from process_loader import load_processes
+        from similarity_sparse import similar_pairs_blocked
+        from similarity_lsh import approximate_similar_pairs
+        engine = similar_pairs_blocked if name == "similarity_exact" else approximate_similar_pairs
+
+        def similarity(X):
+            engine(X if name == "similarity_lsh" else X.tolist(), SIMILARITY_THRESHOLD)
+            return len(X)
+        return lambda: np.asarray(load_processes(csv_file_path)[1]), similarity
+
+    raise ValueError(f"unknown stage {name}")
+
+
+def _run_stage(name, csv_file_path, queue):
+    # sklearn warns when most classes are singletons, which the benchmark data is
+    warnings.simplefilter("ignore", UserWarning)
+    try:
+        setup, timed = _stage(name, csv_file_path)
+        state = setup()
+        setup_peak = _peak_rss_mb()
+        rss_before = _current_rss_mb()
+        with RssSampler() as sampler:
+            start = time.perf_counter()
+            rows = timed(state)
+            wall = time.perf_counter() - start
+    except Exception:
+        queue.put({"error": traceback.format_exc()})
+        return
+    process_peak = _peak_rss_mb()
+    if rss_before is not None and sampler.peak_mb is not None:
+        # Memory the timed section added on top of what setup left resident
+        stage_rss = max(sampler.peak_mb - rss_before, 0.0)
+    else:
+        stage_rss = max(process_peak - setup_peak, 0.0)
+    queue.put({"wall_seconds": wall, "rows": int(rows), "stage_rss_mb": stage_rss,
+               "peak_rss_mb": process_peak, "setup_peak_rss_mb": setup_peak})
+
+
+def run_stage(name, csv_file_path):
+    """Run one stage in a fresh interpreter; raises RuntimeError if it fails or dies"""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run_stage, args=(name, csv_file_path, queue))
+    process.start()
+    try:
+        result = None
+        while result is None:
+            # Check liveness before waiting, so a result written just before
+            # the child exited is still picked up
+            alive = process.is_alive()
+            try:
+                result = queue.get(timeout=1)
+            except queue_module.Empty:
+                # A child killed outright (e.g. by the OOM killer) never reports back
+                if not alive:
+                    raise RuntimeError(f"stage {name} exited with code {process.exitcode}")
+    finally:
+        process.join()
+    if "error" in result:
+        raise RuntimeError(f"stage {name} failed:\n{result['error']}")
+    return result
+
+
+def scaling_exponents(records):
+    """{family: {stage: k}}, the slope of log(time) against log(dataset rows): ~1 is linear, ~2 quadratic
+
+    Each dataset family is fitted on its own, since the shipped CSVs (7
+    formKeys) and the synthetic data (SYNTHETIC_VOCAB_SIZE formKeys) give
+    similarity stages very different amounts of work per row.
+    """
+    exponents = {}
+    for family, stage in sorted({(record["family"], record["stage"]) for record in records}):
+        points = [(record["dataset_rows"], record["wall_seconds"]) for record in records
+                  if record["family"] == family and record["stage"] == stage and record["wall_seconds"] > 0]
+        if len({rows for rows, _ in points}) >= 2:
+            rows, seconds = np.log(np.array(points, dtype=np.float64)).T
+            exponents.setdefault(family, {})[stage] = float(np.polyfit(rows, seconds, 1)[0])
+    return exponents
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the grouping pipeline")
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES,
+                        help="synthetic dataset sizes (number of processes)")
+    parser.add_argument("--stages", nargs="*", default=list(STAGE_LIMITS))
+    parser.add_argument("--no-shipped", action="store_true", help="skip the Generated_*_Processes.csv files")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        datasets = [] if args.no_shipped else [(path, path, "shipped") for path in SHIPPED_CSVS]
+        for size in args.sizes:
+            path = os.path.join(tmp_dir, f"synthetic_{size}.csv")
+            make_synthetic_csv(path, size)
+            datasets.append((f"synthetic_{size}", path, "synthetic"))
+
+        records = []
+        skipped = []
+        print(f"{'dataset':<32}{'stage':<20}{'rows':>10}{'wall (s)':>12}{'rows/s':>14}{'stage RSS (MB)':>16}")
+        print("-" * 104)
+        for dataset, path, family in datasets:
+            with open(path) as f:
+                dataset_rows = sum(1 for _ in f) - 1
+            # Warm the .npy cache so "load_cached" measures the memory-mapped path
+            from process_loader import load_processes
+            load_processes(path)
+
+            for stage in args.stages:
+                limit = STAGE_LIMITS.get(stage)
+                if limit is not None and dataset_rows > limit:
+                    reason = f"above the {limit}-row limit"
+                else:
+                    try:
+                        result = run_stage(stage, path)
+                        reason = None
+                    except RuntimeError as e:
+                        reason = str(e).splitlines()[0]
+                if reason is not None:
+                    skipped.append({"dataset": dataset, "family": family, "dataset_rows": dataset_rows,
+                                    "stage": stage, "reason": reason})
+                    print(f"{dataset:<32}{stage:<20}{'skipped: ' + reason:>66}")
+                    continue
+                throughput = result["rows"] / result["wall_seconds"] if result["wall_seconds"] else 0.0
+                record = {"dataset": dataset, "family": family, "dataset_rows": dataset_rows, "stage": stage,
+                          "throughput_rows_per_second": throughput, **result}
+                records.append(record)
+                print(f"{dataset:<32}{stage:<20}{result['rows']:>10}{result['wall_seconds']:>12.4f}"
+                      f"{throughput:>14.0f}{result['stage_rss_mb']:>16.1f}")
+
+            for suffix in (".forms.npy", ".meta.npz"):
+                if path.startswith(tmp_dir) and os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    exponents = scaling_exponents(records)
+    print()
+    print("Scaling exponent (time ~ rows^k):")
+    for family, stage_exponents in exponents.items():
+        print(f"  {family}:")
+        for stage, exponent in stage_exponents.items():
+            print(f"    {stage:<20}{exponent:.2f}")
+
+    with open(args.output, "w") as f:
+        json.dump({"records": records, "skipped": skipped, "scaling_exponents": exponents}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree.ElementTree import ParseError, iterparse
+from xml.sax.saxutils import quoteattr
+
+# formKey sequences from a directory of *.bpmn20.xml process definitions.
+#
+#   sequences, stats = ingest_directory(bpmn_dir)   # {"Process 1-163.bpmn20.xml": [165, 173, ...]}
+#
+#   python bpmn_parser.py bpmn_files --output processes.csv --jobs 8
+#   python bpmn_parser.py fixtures --generate 10000      # write generated BPMN files
+#
+# Files are read with iterparse and every element is dropped from the tree as
+# soon as it ends, so memory per file depends on the number of tasks and flows,
+# not on the size of the XML. The user tasks' formKey attributes (activiti:,
+# flowable: or camunda:) are put in flow order: breadth-first along the
+# sequence flows from the start events, with tasks that cannot be reached
+# appended in document order.
+#
+# Results are cached in a SQLite file (bpmn_dir/.bpmn_formkeys.sqlite by
+# default) keyed by path, size and mtime, with the file's SHA-256 behind
+# that: a file whose mtime changed but whose content did not is rehashed and
+# not parsed again. Hashing and parsing run in a process pool.
+#
+# formKeys must be integers, like the formKey columns of the process CSVs. A
+# file that is not well-formed XML or has a non-numeric formKey is skipped:
+# it is listed in stats["errors"] with the reason, the other files are still
+# returned and cached, and it is tried again on the next run.
+
+CACHE_NAME = ".bpmn_formkeys.sqlite"
+BPMN_SUFFIX = ".bpmn20.xml"
+HASH_BLOCK = 1 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sequences (
+    sha256 TEXT PRIMARY KEY,
+    form_keys TEXT NOT NULL
+);
+"""
+
+
+def _local_name(name):
+    return name.rsplit("}", 1)[-1]
+
+
+class BpmnFormKeyError(ValueError):
+    pass
+
+
+def parse_bpmn(path):
+    """Ordered user-task formKeys of one BPMN 2.0 file"""
+    task_form_keys = {}
+    task_order = []
+    start_events = []
+    outgoing = {}
+    stack = []
+
+    for event, element in iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append(element)
+            continue
+        stack.pop()
+        tag = _local_name(element.tag)
+        if tag == "userTask":
+            task_id = element.get("id")
+            task_order.append(task_id)
+            for name, value in element.attrib.items():
+                if _local_name(name) == "formKey":
+                    value = value.strip()
+                    if not value.isdigit():
+                        raise BpmnFormKeyError(f"user task {task_id} has a non-numeric formKey {value!r}")
+                    task_form_keys[task_id] = int(value)
+        elif tag == "startEvent":
+            start_events.append(element.get("id"))
+        elif tag == "sequenceFlow":
+            outgoing.setdefault(element.get("sourceRef"), []).append(element.get("targetRef"))
+        # Drop finished elements so the tree never grows beyond the current path
+        element.clear()
+        if stack:
+            stack[-1].remove(element)
+
+    visited = set(start_events)
+    queue = deque(start_events)
+    ordered = []
+    while queue:
+        node = queue.popleft()
+        if node in task_form_keys:
+            ordered.append(node)
+        for target in outgoing.get(node, ()):
+            if target not in visited:
+                visited.add(target)
+                queue.append(target)
+    ordered += [task for task in task_order if task in task_form_keys and task not in visited]
+    return [task_form_keys[task] for task in ordered]
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _parse_job(job):
+    # (sha256, formKeys, None), or (sha256, None, reason) when the file cannot be used
+    path, sha256 = job
+    try:
+        return sha256, parse_bpmn(path), None
+    except (ParseError, BpmnFormKeyError) as e:
+        return sha256, None, f"{type(e).__name__}: {e}"
+
+
+def _natural_key(name):
+    # "Process 2-257" sorts before "Process 10-263"
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def list_bpmn_files(bpmn_dir):
+    """Names of the *.bpmn20.xml files in a directory, in natural order"""
+    return sorted((entry.name for entry in os.scandir(bpmn_dir)
+                   if entry.is_file() and entry.name.endswith(BPMN_SUFFIX)), key=_natural_key)
+
+
+class BpmnCache:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def files(self):
+        """path -> (size, mtime_ns, sha256)"""
+        return {path: (size, mtime_ns, sha256) for path, size, mtime_ns, sha256
+                in self.connection.execute("SELECT path, size, mtime_ns, sha256 FROM files")}
+
+    def sequences(self, digests):
+        """sha256 -> formKeys for the digests that are cached"""
+        digests = list(set(digests))
+        found = {}
+        for start in range(0, len(digests), 500):
+            chunk = digests[start:start + 500]
+            rows = self.connection.execute(
+                f"SELECT sha256, form_keys FROM sequences WHERE sha256 IN ({','.join('?' * len(chunk))})", chunk)
+            found.update((sha256, [int(key) for key in form_keys.split(",") if key])
+                         for sha256, form_keys in rows)
+        return found
+
+    def store(self, files, sequences):
+        """files: [(path, size, mtime_ns, sha256)], sequences: {sha256: formKeys}"""
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", files)
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO sequences VALUES (?, ?)",
+                [(sha256, ",".join(map(str, form_keys))) for sha256, form_keys in sequences.items()])
+
+
+def ingest_directory(bpmn_dir, cache_path=None, n_jobs=None, use_cache=True):
+    """{file name: formKeys} for every usable BPMN file in bpmn_dir, plus counts of what was
+    served from the cache ("cached"), rehashed and found unchanged ("rehashed"), parsed and
+    skipped ("failed"), and stats["errors"]: [(file name, reason)] for the skipped files"""
+    names = list_bpmn_files(bpmn_dir)
+    paths = [os.path.abspath(os.path.join(bpmn_dir, name)) for name in names]
+    stats = {"files": len(names), "cached": 0, "rehashed": 0, "parsed": 0, "failed": 0, "errors": []}
+    cache = BpmnCache(cache_path or os.path.join(bpmn_dir, CACHE_NAME)) if use_cache else None
+    known_files = cache.files() if cache else {}
+
+    digest_of = {}
+    stale = []
+    file_rows = []
+    for path in paths:
+        stat = os.stat(path)
+        known = known_files.get(path)
+        if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            digest_of[path] = known[2]
+        else:
+            stale.append(path)
+            file_rows.append([path, stat.st_size, stat.st_mtime_ns, None])
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=n_jobs) if n_jobs > 1 and len(stale) > 1 else None
+    try:
+        run = pool.map if pool else map
+        chunksize = {"chunksize": max(1, len(stale) // (n_jobs * 4))} if pool else {}
+        for row, sha256 in zip(file_rows, run(file_digest, stale, **chunksize)):
+            row[3] = digest_of[row[0]] = sha256
+
+        sequences = cache.sequences(digest_of.values()) if cache else {}
+        to_parse = {}
+        for path in paths:
+            if digest_of[path] not in sequences:
+                to_parse.setdefault(digest_of[path], path)
+        jobs = [(path, sha256) for sha256, path in to_parse.items()]
+        chunksize = {"chunksize": max(1, len(jobs) // (n_jobs * 4))} if pool else {}
+        parsed = {}
+        failed = {}
+        for sha256, form_keys, error in run(_parse_job, jobs, **chunksize):
+            if error is None:
+                parsed[sha256] = form_keys
+            else:
+                failed[sha256] = error
+    finally:
+        if pool:
+            pool.shutdown()
+    sequences.update(parsed)
+
+    stats["parsed"] = len(parsed)
+    stats["rehashed"] = sum(1 for row in file_rows if row[3] not in parsed and row[3] not in failed)
+    stale = set(stale)
+    stats["cached"] = sum(1 for path in paths if path not in stale and digest_of[path] not in failed)
+    stats["errors"] = [(name, failed[digest_of[path]]) for name, path in zip(names, paths)
+                       if digest_of[path] in failed]
+    stats["failed"] = len(stats["errors"])
+    if cache:
+        cache.store([tuple(row) for row in file_rows], parsed)
+        cache.close()
+    return {name: sequences[digest_of[path]] for name, path in zip(names, paths)
+            if digest_of[path] in sequences}, stats
+
+
+def load_bpmn_sequences(bpmn_dir, n_jobs=None):
+    """{file name: formKeys} for a directory, through the cache (the bpmn_data dict of the scripts)"""
+    sequences, stats = ingest_directory(bpmn_dir, n_jobs=n_jobs)
+    for name, error in stats["errors"]:
+        print(f"Skipped {name}: {error}")
+    return sequences
+
+
+def write_process_csv(path, sequences):
+    """Write sequences in the Generated_*_Processes.csv layout, zero-padded to the longest"""
+    width = max((len(form_keys) for form_keys in sequences.values()), default=0)
+    with open(path, "w", newline="") as f:
+        f.write("Process Name," + ",".join(f"Form {k + 1}" for k in range(width)) + "\n")
+        for name, form_keys in sequences.items():
+            padded = list(form_keys) + [0] * (width - len(form_keys))
+            f.write(name.replace(",", " ") + "," + ",".join(map(str, padded)) + "\n")
+
+
+def write_bpmn(path, process_id, form_keys):
+    """Write a linear Activiti BPMN 2.0 process with one user task per formKey (test fixtures)"""
+    nodes = ["start"] + [f"task{k + 1}" for k in range(len(form_keys))] + ["end"]
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<definitions xmlns="http://www.omg.org/spec/BPMN/20100524/MODEL" '
+             'xmlns:activiti="http://activiti.org/bpmn" targetNamespace="http://www.activiti.org/processdef">',
+             f'  <process id={quoteattr(process_id)} isExecutable="true">',
+             '    <startEvent id="start"></startEvent>']
+    for k, form_key in enumerate(form_keys):
+        lines.append(f'    <userTask id="task{k + 1}" name="Task {k + 1}" '
+                     f'activiti:formKey={quoteattr(str(form_key))}></userTask>')
+    lines.append('    <endEvent id="end"></endEvent>')
+    for k in range(len(nodes) - 1):
+        lines.append(f'    <sequenceFlow id="flow{k + 1}" sourceRef="{nodes[k]}" targetRef="{nodes[k + 1]}"></sequenceFlow>')
+    lines += ['  </process>', '</definitions>', '']
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def generate_fixtures(bpmn_dir, num_processes, seed=42):
+    """Write num_processes generated BPMN files (see synthetic_processes.ProcessGenerator)"""
+    from synthetic_processes import ProcessGenerator
+
+    os.makedirs(bpmn_dir, exist_ok=True)
+    generator = ProcessGenerator(num_groups=max(1, num_processes // 10), min_length=4, max_length=7, seed=seed)
+    for start, _, forms, lengths in generator.iter_blocks(num_processes):
+        for k, (row, length) in enumerate(zip(forms.tolist(), lengths.tolist())):
+            number = start + k + 1
+            write_bpmn(os.path.join(bpmn_dir, f"Process {number}-{number + 162}{BPMN_SUFFIX}"),
+                       f"process{number}", row[:length])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract formKey sequences from BPMN 2.0 files")
+    parser.add_argument("bpmn_dir")
+    parser.add_argument("--cache", default=None, help=f"cache file (default: <bpmn_dir>/{CACHE_NAME})")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--output", default=None, help="write the sequences as a process CSV")
+    parser.add_argument("--generate", type=int, default=None, metavar="N",
+                        help="write N generated BPMN files into bpmn_dir instead")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        generate_fixtures(args.bpmn_dir, args.generate, args.seed)
+        print(f"Wrote {args.generate} BPMN files to {args.bpmn_dir}")
+        return
+
+    start = time.perf_counter()
+    sequences, stats = ingest_directory(args.bpmn_dir, args.cache, args.jobs, use_cache=not args.no_cache)
+    seconds = time.perf_counter() - start
+    print(f"{stats['files']} files in {seconds:.2f} seconds: {stats['parsed']} parsed, "
+          f"{stats['cached']} cached, {stats['rehashed']} unchanged after rehashing, {stats['failed']} skipped")
+    for name, error in stats["errors"]:
+        print(f"Skipped {name}: {error}")
+    if args.output:
+        write_process_csv(args.output, sequences)
+        print(f"Sequences written to {args.output}")
+    else:
+        for name, form_keys in list(sequences.items())[:10]:
+            print(f"{name}: {form_keys}")
+
+
+if __name__ == "__main__":
+    main()
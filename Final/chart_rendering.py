@@ -0,0 +1,191 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Chart descriptions that can be shown interactively or rendered headless.
+#
+#   specs = [chart("pie", group_labels, group_sizes, "Workflow Group Distribution",
+#                  "group_distribution.png", group_sizes=True)]
+#   show_charts(specs)                    # plt.show() for each, as before
+#   render_charts(specs, "figures")       # Agg, written to files in worker processes
+#
+# A chart is a plain dict, so it can be sent to a worker process. Headless
+# rendering uses matplotlib's object-oriented API on an Agg canvas and never
+# touches pyplot, so it works without a display and alongside an interactive
+# session. Charts with more than max_items entries are cut down to the top
+# entries (plus "Other" when values add up, like counts), and charts of group
+# sizes with many groups also get a group-size histogram, so the drawing cost
+# stays flat however many groups the data has.
+
+MAX_ITEMS = 20
+HISTOGRAM_ABOVE = 50
+
+
+def chart(kind, labels, values, title, filename, **options):
+    """Describe one chart; kind is "pie", "bar", "barh", "line" or "histogram".
+
+    Options: figsize, colors, color, cmap, xlabel, ylabel, title_fontsize,
+    label_fontsize, autopct, startangle, equal_axis, texts, text_format,
+    text_offset, text_position, text_va, text_fontsize, text_color,
+    text_weight, ylim, xticks_rotation, grid, grid_alpha, grid_linestyle,
+    marker, linestyle, linewidth, markersize, bins, additive (values can be
+    summed into "Other") and group_sizes (values are group sizes; additive).
+    """
+    spec = {"kind": kind, "labels": [str(label) for label in labels],
+            "values": np.asarray(values).tolist(), "title": title, "filename": filename}
+    spec.update(options)
+    return spec
+
+
+def top_k(labels, values, k, other_label="Other"):
+    """(labels, values) of the k largest entries plus one entry summing the rest"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= k:
+        return list(labels), values.tolist()
+    order = np.argsort(-values, kind="stable")
+    keep, rest = order[:k], order[k:]
+    return ([labels[i] for i in keep.tolist()] + [f"{other_label} ({len(rest)})"],
+            values[keep].tolist() + [float(values[rest].sum())])
+
+
+def summarize(spec, max_items=MAX_ITEMS, histogram_above=HISTOGRAM_ABOVE):
+    """Charts to draw for spec: itself, or its top-k version plus a size histogram"""
+    count = len(spec["values"])
+    if spec["kind"] == "histogram" or count <= max_items:
+        return [spec]
+
+    summary = dict(spec)
+    if spec["kind"] == "pie" or spec.get("group_sizes") or spec.get("additive"):
+        summary["labels"], summary["values"] = top_k(spec["labels"], spec["values"], max_items)
+    else:
+        # Summing e.g. durations into "Other" means nothing; keep the largest entries in their order
+        keep = np.sort(np.argsort(-np.asarray(spec["values"]), kind="stable")[:max_items])
+        summary["labels"] = [spec["labels"][i] for i in keep.tolist()]
+        summary["values"] = [spec["values"][i] for i in keep.tolist()]
+    # Per-entry styling no longer lines up with the entries
+    for key in ("texts", "colors"):
+        summary.pop(key, None)
+    summary["title"] = f"{spec['title']} (top {max_items} of {count})"
+    charts = [summary]
+
+    if spec.get("group_sizes") and count > histogram_above:
+        root, extension = os.path.splitext(spec["filename"])
+        low, high = min(spec["values"]), max(spec["values"])
+        # One bin per size when the sizes span few values, 50 bins otherwise
+        bins = (np.arange(low, high + 2) - 0.5).tolist() if high - low < 50 else 50
+        charts.append(chart("histogram", [], spec["values"], f"{spec['title']}: group sizes",
+                            f"{root}_sizes{extension or '.png'}", xlabel="Processes per group",
+                            ylabel="Number of groups", bins=bins,
+                            figsize=spec.get("figsize", (10, 6))))
+    return charts
+
+
+def _colors(spec, count):
+    if "colors" in spec:
+        return spec["colors"]
+    if "cmap" in spec:
+        from matplotlib import colormaps
+        return colormaps[spec["cmap"]](np.arange(count))
+    return spec.get("color")
+
+
+def draw_chart(ax, spec):
+    """Draw spec onto a matplotlib Axes"""
+    kind, labels, values = spec["kind"], spec["labels"], spec["values"]
+    colors = _colors(spec, len(values))
+    label_fontsize = spec.get("label_fontsize")
+
+    if kind == "pie":
+        ax.pie(values, labels=labels, autopct=spec.get("autopct", "%1.1f%%"), colors=colors,
+               startangle=spec.get("startangle", 90))
+        if spec.get("equal_axis"):
+            ax.axis("equal")
+    elif kind == "bar":
+        ax.bar(labels, values, color=colors)
+    elif kind == "barh":
+        ax.barh(labels, values, color=colors)
+    elif kind == "line":
+        ax.plot(labels, values, marker=spec.get("marker", "o"), linestyle=spec.get("linestyle", "-"),
+                color=colors, linewidth=spec.get("linewidth"), markersize=spec.get("markersize"))
+    elif kind == "histogram":
+        ax.hist(values, bins=spec.get("bins", "auto"), color=colors or "#4C72B0")
+    else:
+        raise ValueError(f"unknown chart kind {kind}")
+
+    ax.set_title(spec["title"], fontsize=spec.get("title_fontsize"))
+    if "xlabel" in spec:
+        ax.set_xlabel(spec["xlabel"], fontsize=label_fontsize)
+    if "ylabel" in spec:
+        ax.set_ylabel(spec["ylabel"], fontsize=label_fontsize)
+    if "ylim" in spec:
+        ax.set_ylim(*spec["ylim"])
+    if "xticks_rotation" in spec:
+        ax.tick_params(axis="x", labelrotation=spec["xticks_rotation"])
+    if "grid" in spec:
+        style = {"alpha": spec.get("grid_alpha"), "linestyle": spec.get("grid_linestyle")}
+        ax.grid(axis=spec["grid"], **{key: value for key, value in style.items() if value is not None})
+
+    # Value labels above (or, with text_position "center", inside) bars and line points
+    if kind in ("bar", "line") and ("texts" in spec or "text_format" in spec):
+        texts = spec.get("texts") or [spec["text_format"].format(v) for v in values]
+        center = spec.get("text_position") == "center"
+        for i, (value, text) in enumerate(zip(values, texts)):
+            y = value / 2 if center else value + spec.get("text_offset", 0)
+            ax.text(i, y, text, ha="center", va="center" if center else spec.get("text_va", "baseline"),
+                    fontsize=spec.get("text_fontsize"), color=spec.get("text_color"),
+                    fontweight=spec.get("text_weight"))
+
+
+def render_chart(spec, output_dir=".", dpi=100):
+    """Render one chart to output_dir/filename on an Agg canvas; returns the path"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=spec.get("figsize", (10, 6)))
+    FigureCanvasAgg(figure)
+    draw_chart(figure.add_subplot(), spec)
+    figure.tight_layout()
+    path = os.path.join(output_dir, spec["filename"])
+    figure.savefig(path, dpi=dpi)
+    return path
+
+
+def _render_job(job):
+    return render_chart(*job)
+
+
+def render_charts(specs, output_dir="figures", n_jobs=None, dpi=100,
+                  max_items=MAX_ITEMS, histogram_above=HISTOGRAM_ABOVE):
+    """Summarize and render every chart headless, in parallel; returns the written paths.
+
+    Workers are forked, so scripts without a __main__ guard can call this. Where
+    fork is not available (Windows) charts are rendered one by one unless
+    n_jobs is given.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(summary, output_dir, dpi) for spec in specs
+            for summary in summarize(spec, max_items, histogram_above)]
+    can_fork = "fork" in multiprocessing.get_all_start_methods()
+    if n_jobs is None:
+        n_jobs = min(len(jobs), os.cpu_count() or 1) if can_fork else 1
+    if n_jobs <= 1 or len(jobs) <= 1:
+        return [_render_job(job) for job in jobs]
+
+    context = multiprocessing.get_context("fork" if can_fork else "spawn")
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context) as pool:
+        return list(pool.map(_render_job, jobs))
+
+
+def show_charts(specs, save_dir=None, max_items=MAX_ITEMS, histogram_above=HISTOGRAM_ABOVE):
+    """Draw every chart with pyplot and show it, saving a copy first when save_dir is given"""
+    import matplotlib.pyplot as plt
+
+    for spec in specs:
+        for summary in summarize(spec, max_items, histogram_above):
+            plt.figure(figsize=summary.get("figsize", (10, 6)))
+            draw_chart(plt.gca(), summary)
+            plt.tight_layout()
+            if save_dir is not None:
+                plt.savefig(os.path.join(save_dir, summary["filename"]))
+            plt.show()
@@ -0,0 +1,61 @@
+import argparse
+import http.client
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from process_loader import load_processes
+
+# Load-test client for classify_service.py: sends the sequences of a CSV as
+# concurrent single-sequence requests and prints the service metrics.
+#
+#   python classify_client.py Generated_5000_Processes.csv --port 8765 --clients 32
+
+
+def send_requests(host, port, sequences):
+    connection = http.client.HTTPConnection(host, port)
+    groups = []
+    try:
+        for sequence in sequences:
+            body = json.dumps({"sequences": [sequence]})
+            connection.request("POST", "/predict", body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            groups.extend(json.loads(response.read())["groups"])
+    finally:
+        connection.close()
+    return groups
+
+
+def fetch_metrics(host, port):
+    connection = http.client.HTTPConnection(host, port)
+    try:
+        connection.request("GET", "/metrics")
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send concurrent predict requests to classify_service.py")
+    parser.add_argument("csv", help="csv with the same layout as Generated_*_Processes.csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    _, X = load_processes(args.csv)
+    sequences = X.tolist()
+    shards = [sequences[i::args.clients] for i in range(args.clients)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        results = list(pool.map(lambda shard: send_requests(args.host, args.port, shard), shards))
+    elapsed = time.perf_counter() - start
+
+    print(f"Sent {len(sequences)} requests from {args.clients} clients in {elapsed:.2f} seconds "
+          f"({len(sequences) / elapsed:.0f} requests/second)")
+    print(f"Groups returned: {sum(len(groups) for groups in results)}")
+    print(json.dumps(fetch_metrics(args.host, args.port), indent=2))
+
+
+if __name__ == "__main__":
+    main()
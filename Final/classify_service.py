@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+import numpy as np
+from model_store import load_artifact
+
+# Local HTTP service that keeps a model saved by Final_Code.py in memory and
+# classifies process sequences as they arrive.
+#
+#   python classify_service.py artifacts/<model>.pkl --port 8765
+#
+#   POST /predict  {"sequences": [[173, 252, 253, 256, 165], ...]}
+#                  -> {"groups": [1, ...]}
+#   GET  /metrics  request/batch counters, throughput and latency percentiles
+#   GET  /health   {"status": "ok"}
+#
+# Concurrent requests are gathered into micro-batches so the model runs one
+# vectorized predict() per batch instead of one per request.
+
+
+class ServiceMetrics:
+    def __init__(self, window=10_000):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.sequences = 0
+        self.batches = 0
+        self.errors = 0
+        # Latencies of the most recent requests only, so memory stays bounded
+        self.latencies = deque(maxlen=window)
+
+    def record_request(self, num_sequences, latency):
+        self.requests += 1
+        self.sequences += num_sequences
+        self.latencies.append(latency)
+
+    def snapshot(self):
+        uptime = time.perf_counter() - self.started
+        latencies_ms = np.array(self.latencies) * 1000.0
+        if len(latencies_ms):
+            p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99]).tolist()
+        else:
+            p50 = p90 = p99 = 0.0
+        return {
+            "uptime_seconds": uptime,
+            "requests": self.requests,
+            "sequences": self.sequences,
+            "batches": self.batches,
+            "errors": self.errors,
+            "mean_batch_sequences": self.sequences / self.batches if self.batches else 0.0,
+            "requests_per_second": self.requests / uptime if uptime else 0.0,
+            "sequences_per_second": self.sequences / uptime if uptime else 0.0,
+            "latency_ms": {"p50": p50, "p90": p90, "p99": p99},
+        }
+
+
+class MicroBatcher:
+    """Collect queued predict requests into batches of at most max_batch_size rows.
+
+    A batch is sent as soon as it is full or max_wait seconds after its first
+    request arrived, whichever comes first.
+    """
+
+    def __init__(self, model, max_batch_size=256, max_wait=0.005, metrics=None):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.metrics = metrics
+        self._queue = asyncio.Queue()
+        self._worker = None
+
+    def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    async def predict(self, X):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((X, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            rows = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                rows += len(item[0])
+
+            batch = np.concatenate([X for X, _ in pending])
+            try:
+                # Run predict off the event loop so new requests keep being accepted
+                predictions = await loop.run_in_executor(None, self.model.predict, batch)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            if self.metrics is not None:
+                self.metrics.batches += 1
+
+            start = 0
+            for X, future in pending:
+                if not future.done():
+                    future.set_result(predictions[start:start + len(X)])
+                start += len(X)
+
+
+class ClassificationService:
+    def __init__(self, artifact, max_batch_size=256, max_wait=0.005):
+        self.artifact = artifact
+        self.num_forms = artifact["unique_keys"].shape[1]
+        self.metrics = ServiceMetrics()
+        self.batcher = MicroBatcher(artifact["model"], max_batch_size, max_wait, self.metrics)
+
+    async def handle_predict(self, body):
+        payload = json.loads(body or b"{}")
+        sequences = payload.get("sequences") if isinstance(payload, dict) else None
+        if not isinstance(sequences, list) or not sequences:
+            raise ValueError('expected {"sequences": [[formKey, ...], ...]}')
+        try:
+            X = np.asarray(sequences, dtype=np.int32)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError("formKeys must be integers") from None
+        if X.ndim != 2 or X.shape[1] != self.num_forms:
+            raise ValueError(f"every sequence must have {self.num_forms} formKeys")
+        predictions = await self.batcher.predict(X)
+        return {"groups": predictions.tolist()}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, response = await self.route(method, path, body)
+                data = json.dumps(response).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if method == "POST" and path == "/predict":
+            start = time.perf_counter()
+            try:
+                response = await self.handle_predict(body)
+            except ValueError as e:
+                self.metrics.errors += 1
+                return "400 Bad Request", {"error": str(e)}
+            except Exception as e:
+                self.metrics.errors += 1
+                return "500 Internal Server Error", {"error": f"{type(e).__name__}: {e}"}
+            self.metrics.record_request(len(response["groups"]), time.perf_counter() - start)
+            return "200 OK", response
+        if method == "GET" and path == "/metrics":
+            return "200 OK", self.metrics.snapshot()
+        if method == "GET" and path == "/health":
+            return "200 OK", {"status": "ok"}
+        return "404 Not Found", {"error": f"no route for {method} {path}"}
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Serving on http://{host}:{port} "
+              f"(max batch {self.batcher.max_batch_size}, max wait {self.batcher.max_wait * 1000:.1f} ms)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a trained process grouping model over HTTP")
+    parser.add_argument("artifact", help="model file written by Final_Code.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    artifact = load_artifact(args.artifact)
+    if artifact is None:
+        parser.error(f"{args.artifact} is missing or was written by another artifact version")
+
+    service = ClassificationService(artifact, args.max_batch_size, args.max_wait_ms / 1000.0)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import argparse
+import os
+import sys
+
+# One command line for the grouping, similarity, pattern, model and chart code.
+#
+#   python -m Final group Final/Generated_1000_Processes.csv    # from the repository root
+#   python Final/cli.py group Final/Generated_5000_Processes.csv --streaming
+#   python -m Final similarity --bpmn-dir bpmn_files --threshold 0.6 --method lsh
+#   python -m Final patterns Final/Generated_1000_Processes.csv --min-length 3 --top 10
+#   python -m Final train Final/Generated_1000_Processes.csv --predictor hash_index
+#   python -m Final predict artifacts/<model>.pkl --sequence 173,252,253,256,165
+#   python -m Final render Final/Generated_1000_Processes.csv --events events.csv
+#
+# Without a CSV argument the subcommands read DEFAULT_CSV, the shipped
+# Generated_1000_Processes.csv next to this file, wherever they are run from.
+#
+# Every subcommand imports the modules it needs when it runs. group,
+# similarity and patterns never import scikit-learn or matplotlib, so a quick
+# grouping query only pays for numpy; train and predict load scikit-learn and
+# render loads matplotlib (in the rendering workers when headless).
+
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Generated_1000_Processes.csv")
+
+
+def _check_source(args):
+    """Exit with a message, not a traceback, when the CSV or --bpmn-dir does not exist"""
+    if args.bpmn_dir:
+        if not os.path.isdir(args.bpmn_dir):
+            sys.exit(f"{args.bpmn_dir} is not a directory")
+    elif not os.path.isfile(args.csv_file_path):
+        sys.exit(f"{args.csv_file_path} not found")
+
+
+def _load_matrix(args):
+    """(names, zero-padded formKey matrix) from the CSV or --bpmn-dir of a subcommand"""
+    import numpy as np
+
+    _check_source(args)
+    if args.bpmn_dir:
+        from bpmn_parser import load_bpmn_sequences
+        sequences = load_bpmn_sequences(args.bpmn_dir)
+        width = max((len(seq) for seq in sequences.values()), default=0)
+        forms = np.zeros((len(sequences), width), dtype=np.int32)
+        for row, seq in enumerate(sequences.values()):
+            forms[row, :len(seq)] = seq
+        return np.array(list(sequences), dtype=str), forms
+    from process_loader import load_processes
+    return load_processes(args.csv_file_path)
+
+
+def _load_sequences(args):
+    """{process name: formKey list} from the CSV or --bpmn-dir of a subcommand"""
+    if args.bpmn_dir:
+        from bpmn_parser import load_bpmn_sequences
+        _check_source(args)
+        return load_bpmn_sequences(args.bpmn_dir)
+    names, forms = _load_matrix(args)
+    return {name: row[row != 0].tolist() for name, row in zip(names.tolist(), forms)}
+
+
+def cmd_group(args):
+    from Final_Code import exact_groups, print_groups, print_streaming_groups
+    from group_report import GroupKeyIndex
+
+    if args.streaming and not args.bpmn_dir:
+        _check_source(args)
+        print_streaming_groups(args.csv_file_path, args.chunk_size)
+        return
+    names, forms = _load_matrix(args)
+    group_names, _, labels, label_remap, unique_keys = exact_groups(names, forms)
+    print_groups(group_names, labels, "summary" if args.summary else "full",
+                 GroupKeyIndex.from_labels(label_remap, unique_keys), args.report)
+    print(f"Total Groups Created: {len(set(labels.tolist()))}")
+
+
+def cmd_similarity(args):
+    from union_find import UnionFind
+
+    sequences = _load_sequences(args)
+    names, values = list(sequences), list(sequences.values())
+    if args.method == "lsh":
+        from similarity_lsh import approximate_similar_pairs
+        i, j, _ = approximate_similar_pairs(values, args.threshold)
+    elif args.method == "edit":
+        from similarity_edit import edit_similar_pairs
+        i, j, _ = edit_similar_pairs(values, args.threshold)
+    else:
+        from similarity_sparse import similar_pairs_blocked
+        i, j, _ = similar_pairs_blocked(values, args.threshold, n_jobs=args.jobs)
+
+    union_find = UnionFind(len(names))
+    union_find.union_pairs(i, j)
+    groups = union_find.groups()
+    print(f"=== Similarity Groups ({args.method}, similarity >= {args.threshold}) ===")
+    for group_id, members in enumerate((members for members in groups if len(members) > 1), start=1):
+        print(f"Group {group_id} ({len(members)} processes):")
+        for member in members.tolist():
+            print(f"  - {names[member]} {sequences[names[member]]}")
+        print()
+    print(f"Total similar pairs found: {len(i)}")
+    print(f"Total groups formed: {len(groups)}")
+
+
+def cmd_patterns(args):
+    from pattern_trie import PatternTrie
+    from subsequence_miner import SubsequenceMiner
+
+    sequences = _load_sequences(args)
+    print(f"=== Top {args.top} Common Subsequences (length {args.min_length}+) ===")
+    for subsequence, members in SubsequenceMiner(sequences).top_k(args.top, min_length=args.min_length):
+        print(f"Subsequence {subsequence} appears in {len(members)} processes")
+    for title, trie in (("Starting", PatternTrie(sequences)), ("Ending", PatternTrie(sequences, reverse=True))):
+        shared = {pattern: members for pattern, members in trie.groups(args.pattern_length).items()
+                  if len(members) > 1}
+        print()
+        print(f"=== Shared {title} Patterns ({args.pattern_length} formKeys) ===")
+        for pattern, members in sorted(shared.items(), key=lambda item: -len(item[1]))[:args.top]:
+            print(f"{title} pattern {pattern}: {len(members)} processes")
+        print(f"{len(shared)} shared {title.lower()} patterns")
+
+
+def cmd_train(args):
+    from Final_Code import print_groups, train_and_evaluate
+
+    names, forms = _load_matrix(args)
+    results = train_and_evaluate(names, forms, args.predictor, args.artifact_dir)
+    if args.show_groups or args.report:
+        print_groups(results["process_names"], results["labels"], "summary" if args.summary else "full",
+                     results["group_index"], args.report)
+    print(f"Prediction Accuracy: {results['accuracy'] * 100:.2f}%")
+    print(f"Prediction Time: {results['prediction_time']:.4f} seconds")
+    print(f"Total Groups Created: {len(set(results['labels'].tolist()))}")
+    print(f"Model: {results['artifact_path']}")
+
+
+def cmd_predict(args):
+    from model_store import load_artifact
+    from predict_groups import print_predictions, read_sequences, sequence_matrix
+
+    artifact = load_artifact(args.artifact)
+    if artifact is None:
+        sys.exit(f"{args.artifact} is missing or was written by another artifact version")
+    names, rows = read_sequences(args.csv, args.sequence)
+    if not rows:
+        sys.exit("give --csv and/or --sequence")
+    try:
+        X = sequence_matrix(artifact, names, rows)
+    except ValueError as e:
+        sys.exit(str(e))
+    print_predictions(artifact, names, X)
+
+
+def cmd_render(args):
+    import numpy as np
+    from chart_rendering import chart, render_charts, show_charts
+    from sequence_groups import label_sequences
+
+    _, forms = _load_matrix(args)
+    _, _, label_counts = label_sequences(forms)
+    sizes = np.sort(label_counts[label_counts > 1])[::-1]
+    form_keys, frequencies = np.unique(forms[forms != 0], return_counts=True)
+    charts = [
+        chart("pie", [f"Group {k + 1}" for k in range(len(sizes))], sizes, "Process Group Distribution",
+              "group_distribution.png", figsize=(9, 6), equal_axis=True, group_sizes=True),
+        chart("bar", form_keys.tolist(), frequencies, "Task Frequency Across All Processes",
+              "task_frequency.png", color="#4C72B0", xlabel="FormKey", ylabel="Frequency",
+              xticks_rotation=45, grid="y", grid_alpha=0.3, additive=True),
+    ]
+    if args.events:
+        from transition_durations import aggregate_event_log
+        rows = sorted(aggregate_event_log(args.events).transition_summary(),
+                      key=lambda row: row["count"], reverse=True)[:10]
+        charts.append(chart("line", [f"{row['from_form_key']} → {row['to_form_key']}" for row in rows],
+                            [row["mean"] / 60 for row in rows], "Average Task Transition Durations",
+                            "task_transition_durations.png", color="#55A868", xlabel="Task Transition",
+                            ylabel="Duration (minutes)", grid="both", grid_alpha=0.3,
+                            text_format="{:.0f} min"))
+    if args.show:
+        show_charts(charts)
+    else:
+        for path in render_charts(charts, args.output_dir, n_jobs=args.jobs):
+            print(path)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m Final", description="Process grouping tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_source(command):
+        command.add_argument("csv_file_path", nargs="?", default=DEFAULT_CSV,
+                             help="process CSV (default: the shipped Generated_1000_Processes.csv)")
+        command.add_argument("--bpmn-dir", default=None, help="read *.bpmn20.xml files instead of a CSV")
+
+    def add_report(command):
+        command.add_argument("--summary", action="store_true", help="print one line per group, not every process")
+        command.add_argument("--report", default=None, help="write the group listing to a .csv, .jsonl or .parquet file")
+
+    group = commands.add_parser("group", help="exact-sequence groups (no scikit-learn)")
+    add_source(group)
+    group.add_argument("--streaming", action="store_true", help="read the CSV in chunks")
+    group.add_argument("--chunk-size", type=int, default=100_000)
+    add_report(group)
+    group.set_defaults(handler=cmd_group)
+
+    similarity = commands.add_parser("similarity", help="groups of similar processes")
+    add_source(similarity)
+    similarity.add_argument("--threshold", type=float, default=0.8)
+    similarity.add_argument("--method", choices=["jaccard", "lsh", "edit"], default="jaccard")
+    similarity.add_argument("--jobs", type=int, default=1)
+    similarity.set_defaults(handler=cmd_similarity)
+
+    patterns = commands.add_parser("patterns", help="common subsequences and shared start/end patterns")
+    add_source(patterns)
+    patterns.add_argument("--min-length", type=int, default=3)
+    patterns.add_argument("--pattern-length", type=int, default=3)
+    patterns.add_argument("--top", type=int, default=10)
+    patterns.set_defaults(handler=cmd_patterns)
+
+    train = commands.add_parser("train", help="train and save the group classifier")
+    add_source(train)
+    train.add_argument("--predictor", choices=["random_forest", "hash_index"], default="random_forest")
+    train.add_argument("--artifact-dir", default="artifacts")
+    train.add_argument("--show-groups", action="store_true")
+    add_report(train)
+    train.set_defaults(handler=cmd_train)
+
+    predict = commands.add_parser("predict", help="assign sequences to the groups of a saved model")
+    predict.add_argument("artifact")
+    predict.add_argument("--csv", default=None)
+    predict.add_argument("--sequence", action="append", default=[])
+    predict.set_defaults(handler=cmd_predict)
+
+    render = commands.add_parser("render", help="group and task charts")
+    add_source(render)
+    render.add_argument("--events", default=None, help="task event log for the transition-duration chart")
+    render.add_argument("--output-dir", default="figures")
+    render.add_argument("--jobs", type=int, default=None)
+    render.add_argument("--show", action="store_true", help="show the charts instead of writing files")
+    render.set_defaults(handler=cmd_render)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import numpy as np
+
+# Dense codes for formKeys and packed sequence keys.
+#
+# A process uses a handful of distinct formKeys (165, 173, 252-256), so each
+# one fits in a uint8 code and a whole fixed-length sequence fits in a single
+# int64: 5 steps x 4 bits is 20 bits. Packed keys hash and compare as plain
+# ints, sort with numpy and cost 8 bytes instead of a tuple or bytes object.
+# Sequences too long to pack into 63 bits fall back to one fixed-size bytes
+# key per row (a numpy void array), which still works as a dict key.
+#
+# Code 0 is reserved for padding (formKey 0, as in the zero-padded matrices)
+# and new formKeys are always appended, so extending the vocabulary never
+# changes the code of a formKey already in it.
+
+PAD_CODE = 0
+# formKeys spanning at most this many values are encoded through a dense table
+# instead of a binary search
+DENSE_SPAN = 1 << 20
+
+
+class FormVocabulary:
+    def __init__(self, form_keys=()):
+        self.form_keys = np.empty(0, dtype=np.int64)
+        self.extend(form_keys)
+
+    @classmethod
+    def from_forms(cls, forms):
+        """Vocabulary of every non-padding formKey in a matrix"""
+        return cls(distinct_keys(forms))
+
+    def __len__(self):
+        return len(self.form_keys)
+
+    def extend(self, form_keys):
+        """Add unseen formKeys at the end; returns the number added"""
+        form_keys = distinct_keys(form_keys)
+        new_keys = form_keys[~np.isin(form_keys, self.form_keys)]
+        if len(new_keys):
+            self.form_keys = np.concatenate([self.form_keys, new_keys])
+            self._sorter = np.argsort(self.form_keys, kind="stable")
+            self._sorted_keys = self.form_keys[self._sorter]
+            self._dense = None
+            low, high = self._sorted_keys[0], self._sorted_keys[-1]
+            if high - low < DENSE_SPAN:
+                # _dense[key - low] is the code of key (unknown_code if not in the vocabulary)
+                self._dense = np.full(high - low + 1, self.unknown_code, dtype=self.code_dtype)
+                self._dense[self.form_keys - low] = np.arange(1, len(self.form_keys) + 1)
+        return len(new_keys)
+
+    @property
+    def unknown_code(self):
+        """Code given to formKeys outside the vocabulary; never produced by a known key"""
+        return len(self.form_keys) + 1
+
+    @property
+    def code_dtype(self):
+        return np.min_scalar_type(self.unknown_code)
+
+    @property
+    def bits_per_code(self):
+        return int(self.unknown_code).bit_length()
+
+    def encode(self, forms):
+        """Codes for a formKey array: 1..V for known keys, 0 for padding, unknown_code otherwise"""
+        forms = np.asarray(forms)
+        if len(self.form_keys) and self._dense is not None:
+            low = self._sorted_keys[0]
+            offsets = forms.astype(np.int64) - low
+            inside = (offsets >= 0) & (offsets < len(self._dense))
+            codes = self._dense[np.where(inside, offsets, 0)]
+            codes[~inside] = self.unknown_code
+            codes[forms == 0] = PAD_CODE
+            return codes
+
+        forms = forms.astype(np.int64)
+        codes = np.full(forms.shape, self.unknown_code, dtype=self.code_dtype)
+        if len(self.form_keys):
+            positions = np.searchsorted(self._sorted_keys, forms)
+            positions = np.minimum(positions, len(self._sorted_keys) - 1)
+            known = self._sorted_keys[positions] == forms
+            codes[known] = self._sorter[positions[known]] + 1
+        codes[forms == 0] = PAD_CODE
+        return codes
+
+    def decode(self, codes):
+        """formKeys for a code array (0 for padding, -1 for unknown codes)"""
+        table = np.concatenate([[0], self.form_keys, [-1]])
+        return table[np.minimum(np.asarray(codes, dtype=np.int64), self.unknown_code)]
+
+    def packs_to_int(self, length):
+        return length * self.bits_per_code <= 63
+
+    def pack(self, codes):
+        """One key per row of a code matrix: int64 when it fits in 63 bits, fixed-size bytes otherwise"""
+        codes = np.asarray(codes)
+        if codes.ndim != 2:
+            raise ValueError("pack() expects a 2-D code matrix")
+        length = codes.shape[1]
+        if self.packs_to_int(length):
+            bits = self.bits_per_code
+            keys = np.zeros(len(codes), dtype=np.int64)
+            for column in range(length):
+                keys = (keys << bits) | codes[:, column].astype(np.int64)
+            return keys
+        codes = np.ascontiguousarray(codes, dtype=self.code_dtype)
+        return codes.view(np.dtype((np.void, length * codes.itemsize))).ravel()
+
+    def unpack(self, keys, length):
+        """Inverse of pack() for keys of sequences with `length` steps"""
+        keys = np.asarray(keys)
+        if keys.dtype.kind == "V":
+            return np.frombuffer(keys.tobytes(), dtype=self.code_dtype).reshape(len(keys), length)
+        bits = self.bits_per_code
+        mask = (1 << bits) - 1
+        shifts = bits * np.arange(length - 1, -1, -1, dtype=np.int64)
+        return ((keys[:, None] >> shifts) & mask).astype(self.code_dtype)
+
+    def pack_forms(self, forms):
+        """Packed key of every row of a formKey matrix"""
+        return self.pack(self.encode(forms))
+
+    def unpack_forms(self, keys, length):
+        return self.decode(self.unpack(keys, length))
+
+
+def distinct_keys(forms):
+    """Sorted distinct non-zero formKeys of an array"""
+    forms = np.asarray(forms).ravel()
+    if len(forms) == 0:
+        return np.empty(0, dtype=np.int64)
+    low, high = int(forms.min()), int(forms.max())
+    if high - low < DENSE_SPAN:
+        keys = np.flatnonzero(np.bincount(forms.astype(np.int64) - low)) + low
+    else:
+        keys = np.unique(forms.astype(np.int64))
+    return keys[keys != 0]
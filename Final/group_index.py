@@ -0,0 +1,64 @@
+import numpy as np
+from form_vocabulary import FormVocabulary
+
+
+class HashGroupPredictor:
+    """Predict group labels by exact lookup of the whole formKey sequence.
+
+    Labels in Final_Code.py are defined by the exact sequence, so an index
+    from the packed sequence key to its label reproduces the classifier's
+    answer with one vectorized lookup for the whole batch. Sequences never seen in fit() either get
+    the label of the closest known group (fewest differing positions) when
+    nearest_fallback is on, or unknown_label otherwise.
+    """
+
+    def __init__(self, nearest_fallback=True, unknown_label=-1, block_size=4096):
+        self.nearest_fallback = nearest_fallback
+        self.unknown_label = unknown_label
+        self.block_size = block_size
+
+    def fit(self, X, y):
+        X = np.ascontiguousarray(X, dtype=np.int32)
+        y = np.asarray(y)
+        # Each sequence packs into one int64 (bytes for very long sequences)
+        self.vocabulary_ = FormVocabulary.from_forms(X)
+        keys, first_index = np.unique(self.vocabulary_.pack_forms(X), return_index=True)
+        # Sorted keys for a vectorized searchsorted lookup; a repeated sequence
+        # keeps the label of its first row
+        self.keys_ = keys
+        self.key_labels_ = y[first_index].astype(np.int64)
+
+        # One representative row per group, in order of first appearance, for
+        # the nearest-group fallback
+        first_index = np.sort(first_index)
+        self.group_sequences_ = X[first_index]
+        self.group_labels_ = y[first_index].astype(np.int64)
+        self.classes_ = np.unique(y)
+        return self
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.int32)
+        keys = self.vocabulary_.pack_forms(X)
+        predictions = np.full(len(keys), self.unknown_label, dtype=np.int64)
+        if len(self.keys_):
+            positions = np.minimum(np.searchsorted(self.keys_, keys), len(self.keys_) - 1)
+            found = self.keys_[positions] == keys
+            predictions[found] = self.key_labels_[positions[found]]
+        else:
+            found = np.zeros(len(keys), dtype=bool)
+        unseen = ~found
+
+        if self.nearest_fallback and unseen.any() and len(self.group_labels_):
+            predictions[unseen] = self._nearest_labels(X[unseen])
+        return predictions
+
+    def _nearest_labels(self, X):
+        """Label of the stored group with the fewest differing positions, per row"""
+        labels = np.empty(len(X), dtype=self.group_labels_.dtype)
+        # Compare in blocks so the (rows x groups x steps) mismatch array stays bounded
+        rows_per_block = max(1, self.block_size * 64 // max(1, len(self.group_sequences_)))
+        for start in range(0, len(X), rows_per_block):
+            block = X[start:start + rows_per_block]
+            mismatches = (block[:, None, :] != self.group_sequences_[None, :, :]).sum(axis=2)
+            labels[start:start + len(block)] = self.group_labels_[mismatches.argmin(axis=1)]
+        return labels
@@ -0,0 +1,172 @@
+import csv
+import json
+import sys
+import numpy as np
+
+# Group listings written from the group arrays instead of one print() per process.
+#
+#   group_ids, members = group_members(labels)
+#   index = GroupKeyIndex.from_labels(label_remap, unique_keys)
+#   write_group_report("groups.csv", process_names, group_ids, members, index)   # or .jsonl / .parquet
+#   print_group_summary(group_ids, members, index, top=10)
+#
+# group_ids and members are what sequence_groups.group_members returns: the id
+# of every group and the row indices of its processes. The listing is built in
+# blocks of WRITE_BLOCK lines and written with one call per block, so the
+# console and the report files see a few large writes instead of one per
+# process. The CSV and Parquet reports have one row per process (group,
+# process, sequence); the JSONL report has one record per group with its
+# sequence, size and processes.
+#
+# GroupKeyIndex maps every group id to the formKey key that defines it and
+# back with two dicts, so a group's key is found in O(1) instead of by scanning
+# a {key: group id} dict for each group. Keys are kept as tuples of ints and
+# zero padding is dropped when they are written.
+
+WRITE_BLOCK = 65_536  # lines (or rows) per write call
+
+
+def _as_key(key):
+    return tuple(int(k) for k in key)
+
+
+class GroupKeyIndex:
+    """Two-way index between group ids and the formKey keys that define them"""
+
+    def __init__(self, group_ids=(), keys=()):
+        self._key_of_group = {}
+        self._group_of_key = {}
+        for group_id, key in zip(group_ids, keys):
+            self.add(group_id, key)
+
+    @classmethod
+    def from_mapping(cls, unique_keys):
+        """Index of a {key: group id} dict"""
+        return cls(unique_keys.values(), unique_keys.keys())
+
+    @classmethod
+    def from_labels(cls, label_remap, unique_keys):
+        """Index of the groups numbered by remap_labels, keyed by the label_sequences rows"""
+        kept = np.flatnonzero(np.asarray(label_remap) > 0)
+        return cls(np.asarray(label_remap)[kept].tolist(), unique_keys[kept])
+
+    def add(self, group_id, key):
+        key = _as_key(key)
+        self._key_of_group[int(group_id)] = key
+        self._group_of_key[key] = int(group_id)
+
+    def key_of(self, group_id):
+        return self._key_of_group[int(group_id)]
+
+    def group_of(self, key, default=None):
+        return self._group_of_key.get(_as_key(key), default)
+
+    def sequence_of(self, group_id):
+        """The group's key without zero padding"""
+        return [k for k in self._key_of_group[int(group_id)] if k != 0]
+
+    def __len__(self):
+        return len(self._key_of_group)
+
+    def __contains__(self, group_id):
+        return int(group_id) in self._key_of_group
+
+
+def write_group_listing(stream, process_names, group_ids, members):
+    """Write the "=== Process Groups ===" listing of every process to stream in blocks"""
+    process_names = np.asarray(process_names)
+    lines = ["=== Process Groups ===\n"]
+    for group_id, indices in zip(np.asarray(group_ids).tolist(), members):
+        lines.append(f"Group {group_id} ({len(indices)} processes):\n")
+        lines.extend(f"  - {name}\n" for name in process_names[indices].tolist())
+        lines.append("\n")
+        if len(lines) >= WRITE_BLOCK:
+            stream.write("".join(lines))
+            lines = []
+    stream.write("".join(lines))
+
+
+def print_group_summary(group_ids, members, index=None, top=None):
+    """One line per group (the top largest ones when top is set) and the totals"""
+    sizes = np.fromiter((len(indices) for indices in members), dtype=np.int64, count=len(members))
+    group_ids = np.asarray(group_ids)
+    order = np.arange(len(sizes))
+    if top is not None:
+        order = np.argsort(-sizes, kind="stable")[:top]
+    lines = ["=== Process Groups (summary) ===\n"]
+    for group_id, size in zip(group_ids[order].tolist(), sizes[order].tolist()):
+        sequence = f": {index.sequence_of(group_id)}" if index is not None and group_id in index else ""
+        lines.append(f"Group {group_id} ({size} processes){sequence}\n")
+    if len(order) < len(sizes):
+        lines.append(f"... {len(sizes) - len(order)} smaller groups not shown\n")
+    lines.append(f"{int(sizes.sum())} processes in {len(sizes)} groups\n")
+    sys.stdout.write("".join(lines))
+
+
+def _member_rows(process_names, group_ids, members):
+    """(group id per row, process name per row) with the rows ordered by group"""
+    process_names = np.asarray(process_names)
+    sizes = [len(indices) for indices in members]
+    rows = np.concatenate(members) if sizes else np.empty(0, dtype=np.int64)
+    return np.repeat(np.asarray(group_ids), sizes), process_names[rows]
+
+
+def write_group_csv(path, process_names, group_ids, members, index=None):
+    row_groups, row_names = _member_rows(process_names, group_ids, members)
+    sequence_text = {}
+    if index is not None:
+        sequence_text = {group_id: " ".join(map(str, index.sequence_of(group_id)))
+                         for group_id in np.asarray(group_ids).tolist() if group_id in index}
+    with open(path, "w", newline="", buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(["group", "process", "sequence"] if index is not None else ["group", "process"])
+        for start in range(0, len(row_names), WRITE_BLOCK):
+            groups = row_groups[start:start + WRITE_BLOCK].tolist()
+            names = row_names[start:start + WRITE_BLOCK].tolist()
+            if index is not None:
+                writer.writerows(zip(groups, names, [sequence_text.get(g, "") for g in groups]))
+            else:
+                writer.writerows(zip(groups, names))
+
+
+def write_group_jsonl(path, process_names, group_ids, members, index=None):
+    process_names = np.asarray(process_names)
+    with open(path, "w", buffering=1 << 20) as f:
+        lines = []
+        for group_id, indices in zip(np.asarray(group_ids).tolist(), members):
+            record = {"group": group_id}
+            if index is not None and group_id in index:
+                record["sequence"] = index.sequence_of(group_id)
+            record["size"] = len(indices)
+            record["processes"] = process_names[indices].tolist()
+            lines.append(json.dumps(record) + "\n")
+            if len(lines) >= WRITE_BLOCK:
+                f.write("".join(lines))
+                lines = []
+        f.write("".join(lines))
+
+
+def write_group_parquet(path, process_names, group_ids, members, index=None):
+    """Parquet table with one row per process (needs pyarrow)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    row_groups, row_names = _member_rows(process_names, group_ids, members)
+    columns = {"group": pa.array(row_groups, type=pa.int64()),
+               "process": pa.array(row_names.tolist(), type=pa.string())}
+    if index is not None:
+        sequences = {group_id: index.sequence_of(group_id) if group_id in index else None
+                     for group_id in np.asarray(group_ids).tolist()}
+        columns["sequence"] = pa.array([sequences[g] for g in row_groups.tolist()],
+                                       type=pa.list_(pa.int32()))
+    pq.write_table(pa.table(columns), path)
+
+
+def write_group_report(path, process_names, group_ids, members, index=None):
+    """Write the group listing as JSON lines (.jsonl), Parquet (.parquet) or CSV (anything else)"""
+    if path.endswith(".jsonl"):
+        write_group_jsonl(path, process_names, group_ids, members, index)
+    elif path.endswith(".parquet"):
+        write_group_parquet(path, process_names, group_ids, members, index)
+    else:
+        write_group_csv(path, process_names, group_ids, members, index)
@@ -0,0 +1,331 @@
+import sqlite3
+from itertools import chain
+import numpy as np
+from similarity_sparse import similar_pairs_blocked
+from union_find import UnionFind
+
+# SQLite-backed store of processes, exact-sequence groups and similarity edges.
+#
+# Each distinct formKey sequence is stored once with the number of processes
+# that follow it, so exact groups are just sequences with member_count >= 2.
+# Similarity edges (Jaccard >= the store's threshold) are kept between
+# distinct sequences. add_processes() only compares the batch's new sequences
+# against what is already stored, so existing pairs are never recomputed.
+#
+# Processes are keyed by (source, name): the command line uses the CSV path as
+# the source, so files that all number their processes "Process 1..N" can be
+# loaded into one store, and a batch that is added again is skipped. Trailing
+# zero padding is not part of a sequence, so the same sequence read from CSVs
+# of different widths is stored once.
+#
+# Jaccard similarity only depends on the set of formKeys (0 padding dropped),
+# and there are far fewer distinct sets than distinct sequences. The store
+# keeps the distinct sets in memory with the ids of the sequences that have
+# them, and an inverted index from each formKey to the sets that contain it,
+# read from the database once and extended with each committed batch. A new
+# set is compared only with the stored sets that share a formKey with it,
+# found through the index, so a batch costs time in the intersections it
+# finds, not in the number of stored sets. Only one GroupingStore should
+# write to a database at a time, since the index is not refreshed from other
+# writers.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sequences (
+    id INTEGER PRIMARY KEY,
+    key BLOB NOT NULL UNIQUE,
+    forms TEXT NOT NULL,
+    member_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS processes (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL,
+    sequence_id INTEGER NOT NULL REFERENCES sequences(id),
+    UNIQUE (source, name)
+);
+CREATE INDEX IF NOT EXISTS processes_by_sequence ON processes(sequence_id);
+CREATE TABLE IF NOT EXISTS similarity_edges (
+    a INTEGER NOT NULL REFERENCES sequences(id),
+    b INTEGER NOT NULL REFERENCES sequences(id),
+    similarity REAL NOT NULL,
+    PRIMARY KEY (a, b)
+);
+"""
+
+SQL_CHUNK = 500  # stay under SQLite's bound-parameter limit
+
+
+def _trim(seq):
+    """The sequence without trailing zero padding"""
+    seq = list(seq)
+    while seq and seq[-1] == 0:
+        seq.pop()
+    return seq
+
+
+def _sequence_key(seq):
+    return np.asarray(_trim(seq), dtype=np.int32).tobytes()
+
+
+def _parse_forms(forms):
+    return [int(key) for key in forms.split(",")] if forms else []
+
+
+def _set_key(seq):
+    """The formKey set of a sequence (without 0 padding) as a sorted tuple"""
+    return tuple(sorted({key for key in seq if key != 0}))
+
+
+class GroupingStore:
+    def __init__(self, path, similarity_threshold=0.6):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(processes)")]
+        # Stores written before keys dropped trailing zeros have no sequence_keys entry
+        empty = self.connection.execute("SELECT COUNT(*) FROM sequences").fetchone()[0] == 0
+        key_format = self.connection.execute("SELECT value FROM meta WHERE key = 'sequence_keys'").fetchone()
+        if "source" not in columns or (key_format is None and not empty):
+            self.connection.close()
+            raise ValueError(f"{path} was created by an older version of grouping_store.py; "
+                             "build a new store")
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('similarity_threshold', ?)",
+                (repr(float(similarity_threshold)),),
+            )
+            self.connection.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('sequence_keys', 'trimmed')")
+        # Edges already stored were computed with this threshold, so an
+        # existing store keeps its own
+        self.similarity_threshold = float(self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'similarity_threshold'").fetchone()[0])
+        self._set_index = None  # {formKey set: set number}
+        self._set_members = []  # sequence ids of each set number
+        self._set_sizes = np.empty(0, dtype=np.int64)  # formKeys per set number (grown by doubling)
+        self._postings = {}  # {formKey: [set numbers]}
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _existing_sequence_ids(self, keys):
+        ids = {}
+        for start in range(0, len(keys), SQL_CHUNK):
+            chunk = keys[start:start + SQL_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            ids.update(self.connection.execute(
+                f"SELECT key, id FROM sequences WHERE key IN ({placeholders})", chunk))
+        return ids
+
+    def _stored_names(self, source, names):
+        stored = set()
+        for start in range(0, len(names), SQL_CHUNK):
+            chunk = names[start:start + SQL_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            stored.update(name for (name,) in self.connection.execute(
+                f"SELECT name FROM processes WHERE source = ? AND name IN ({placeholders})",
+                [source] + chunk))
+        return stored
+
+    def _load_set_index(self):
+        # Read the stored sets from the database on first use
+        if self._set_index is None:
+            self._set_index = {}
+            stored = {}
+            for sequence_id, forms in self.connection.execute("SELECT id, forms FROM sequences ORDER BY id"):
+                stored.setdefault(_set_key(_parse_forms(forms)), []).append(sequence_id)
+            self._extend_set_index(stored)
+
+    def _extend_set_index(self, sets):
+        """Add {formKey set: [sequence ids]} to the in-memory sets and inverted index"""
+        new_sizes = []
+        for set_key, ids in sets.items():
+            number = self._set_index.get(set_key)
+            if number is not None:
+                self._set_members[number].extend(ids)
+                continue
+            number = self._set_index[set_key] = len(self._set_members)
+            self._set_members.append(list(ids))
+            new_sizes.append(len(set_key))
+            for key in set_key:
+                self._postings.setdefault(key, []).append(number)
+        count = len(self._set_members)
+        if count > len(self._set_sizes):
+            grown = np.empty(max(count, 2 * len(self._set_sizes)), dtype=np.int64)
+            grown[:count - len(new_sizes)] = self._set_sizes[:count - len(new_sizes)]
+            self._set_sizes = grown
+        self._set_sizes[count - len(new_sizes):count] = new_sizes
+
+    def _similar_stored_sets(self, set_key):
+        """(set numbers, similarity) of the stored sets with Jaccard >= threshold to set_key"""
+        postings = [self._postings[key] for key in set_key if key in self._postings]
+        candidates = np.fromiter(chain.from_iterable(postings), dtype=np.int64)
+        numbers, common = np.unique(candidates, return_counts=True)
+        similarity = common / (len(set_key) + self._set_sizes[numbers] - common)
+        keep = similarity >= self.similarity_threshold
+        return numbers[keep], similarity[keep]
+
+    def add_processes(self, names, sequences, source=""):
+        """Insert a batch of processes in one transaction; returns the number of new distinct sequences.
+
+        Processes whose (source, name) is already stored, or repeated within
+        the batch, are skipped.
+        """
+        names = [str(name) for name in names]
+        sequences = [_trim(map(int, seq)) for seq in sequences]
+        self._load_set_index()
+
+        with self.connection:
+            stored = self._stored_names(source, names)
+            batch_names, batch_sequences = [], []
+            for name, seq in zip(names, sequences):
+                if name not in stored:
+                    stored.add(name)
+                    batch_names.append(name)
+                    batch_sequences.append(seq)
+            keys = [_sequence_key(seq) for seq in batch_sequences]
+
+            batch_counts = {}
+            batch_forms = {}
+            for key, seq in zip(keys, batch_sequences):
+                batch_counts[key] = batch_counts.get(key, 0) + 1
+                batch_forms.setdefault(key, seq)
+
+            existing = self._existing_sequence_ids(list(batch_counts))
+            new_keys = [key for key in batch_counts if key not in existing]
+            first_new_id = (self.connection.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM sequences").fetchone()[0]) + 1
+
+            self.connection.executemany(
+                "INSERT INTO sequences (id, key, forms, member_count) VALUES (?, ?, ?, ?)",
+                [(first_new_id + k, key, ",".join(map(str, batch_forms[key])), batch_counts[key])
+                 for k, key in enumerate(new_keys)])
+            self.connection.executemany(
+                "UPDATE sequences SET member_count = member_count + ? WHERE id = ?",
+                [(batch_counts[key], sequence_id) for key, sequence_id in existing.items()])
+
+            sequence_ids = dict(existing)
+            sequence_ids.update((key, first_new_id + k) for k, key in enumerate(new_keys))
+            self.connection.executemany(
+                "INSERT INTO processes (source, name, sequence_id) VALUES (?, ?, ?)",
+                [(source, name, sequence_ids[key]) for name, key in zip(batch_names, keys)])
+
+            new_sets = self._add_similarity_edges(
+                [first_new_id + k for k in range(len(new_keys))],
+                [batch_forms[key] for key in new_keys],
+            )
+        # Only extend the index once the batch is committed
+        self._extend_set_index(new_sets)
+        return len(new_keys)
+
+    def _add_similarity_edges(self, new_ids, new_sequences):
+        """Store the edges of the new sequences; returns {formKey set: new sequence ids}"""
+        new_sets = {}
+        for sequence_id, seq in zip(new_ids, new_sequences):
+            new_sets.setdefault(_set_key(seq), []).append(sequence_id)
+        new_sets.pop((), None)  # no formKeys, no similarity
+        if not new_sets:
+            return new_sets
+        new_keys = list(new_sets)
+        edges = []
+        # Sequences of this batch with the same set
+        for ids in new_sets.values():
+            edges.extend((a, b, 1.0) for k, a in enumerate(ids) for b in ids[k + 1:])
+        # Distinct new sets against each other
+        i, j, similarity = similar_pairs_blocked(new_keys, self.similarity_threshold)
+        for a, b, value in zip(i.tolist(), j.tolist(), similarity.tolist()):
+            edges.extend((min(x, y), max(x, y), value) for x in new_sets[new_keys[a]] for y in new_sets[new_keys[b]])
+        # Distinct new sets against the stored sets sharing a formKey (stored ids are all lower)
+        for set_key, ids in new_sets.items():
+            numbers, similarity = self._similar_stored_sets(set_key)
+            for number, value in zip(numbers.tolist(), similarity.tolist()):
+                edges.extend((old, new, value) for old in self._set_members[number] for new in ids)
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO similarity_edges (a, b, similarity) VALUES (?, ?, ?)", edges)
+        return new_sets
+
+    def groups(self, min_size=2):
+        """[(group number, formKeys, process count)] for exact-sequence groups, numbered by first appearance"""
+        rows = self.connection.execute(
+            "SELECT id, forms, member_count FROM sequences WHERE member_count >= ? ORDER BY id",
+            (min_size,))
+        return [(group_id, _parse_forms(forms), count)
+                for group_id, (_, forms, count) in enumerate(rows, start=1)]
+
+    def group_members(self, forms):
+        """Names of the processes that follow exactly this formKey sequence"""
+        rows = self.connection.execute(
+            "SELECT p.name FROM processes p JOIN sequences s ON s.id = p.sequence_id "
+            "WHERE s.key = ? ORDER BY p.id", (_sequence_key(forms),))
+        return [name for (name,) in rows]
+
+    def sequence_of(self, name, source=""):
+        row = self.connection.execute(
+            "SELECT s.forms FROM processes p JOIN sequences s ON s.id = p.sequence_id "
+            "WHERE p.source = ? AND p.name = ?", (source, name)).fetchone()
+        return _parse_forms(row[0]) if row else None
+
+    def similar_sequences(self, forms):
+        """[(formKeys, similarity)] of stored sequences linked to this one by a similarity edge"""
+        row = self.connection.execute(
+            "SELECT id FROM sequences WHERE key = ?", (_sequence_key(forms),)).fetchone()
+        if row is None:
+            return []
+        rows = self.connection.execute(
+            "SELECT s.forms, e.similarity FROM similarity_edges e "
+            "JOIN sequences s ON s.id = CASE WHEN e.a = ? THEN e.b ELSE e.a END "
+            "WHERE e.a = ? OR e.b = ? ORDER BY e.similarity DESC, s.id",
+            (row[0], row[0], row[0]))
+        return [(_parse_forms(other), similarity) for other, similarity in rows]
+
+    def similarity_groups(self):
+        """Process names of every connected group of similar sequences, ordered by first process"""
+        max_id = self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM sequences").fetchone()[0]
+        union_find = UnionFind(max_id + 1)
+        for a, b in self.connection.execute("SELECT a, b FROM similarity_edges"):
+            union_find.union(a, b)
+        roots = union_find.roots()
+
+        groups = {}
+        for name, sequence_id in self.connection.execute(
+                "SELECT name, sequence_id FROM processes ORDER BY id"):
+            groups.setdefault(int(roots[sequence_id]), []).append(name)
+        return list(groups.values())
+
+    def counts(self):
+        processes, = self.connection.execute("SELECT COUNT(*) FROM processes").fetchone()
+        sequences, = self.connection.execute("SELECT COUNT(*) FROM sequences").fetchone()
+        edges, = self.connection.execute("SELECT COUNT(*) FROM similarity_edges").fetchone()
+        return {"processes": processes, "sequences": sequences, "similarity_edges": edges}
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from process_loader import iter_process_chunks
+
+    # python grouping_store.py grouping.db Generated_1000_Processes.csv [more.csv ...]
+    if len(sys.argv) < 3:
+        print("usage: python grouping_store.py <store.db> <processes.csv> [...]")
+        sys.exit(1)
+
+    with GroupingStore(sys.argv[1]) as store:
+        for csv_file_path in sys.argv[2:]:
+            start = time.perf_counter()
+            for names, forms in iter_process_chunks(csv_file_path, chunk_size=10_000):
+                store.add_processes(names, forms, source=csv_file_path)
+            print(f"Added {csv_file_path} in {time.perf_counter() - start:.2f} seconds")
+        print(store.counts())
+        print(f"Total Groups Created: {len(store.groups())}")
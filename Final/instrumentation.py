@@ -0,0 +1,168 @@
+import cProfile
+import csv
+import functools
+import json
+import os
+import time
+import tracemalloc
+
+# Stage timing for the analysis scripts.
+#
+#   profiler = Profiler(enabled=True, track_memory=True)
+#   with profiler.stage("fit"):
+#       clf.fit(X_train, y_train)
+#   profiler.write_report("metrics.json")   # or metrics.csv
+#
+# Stages with the same name are aggregated (calls, total/min/max time). A
+# stage always measures its own duration with perf_counter_ns, so scripts can
+# print it; nothing is recorded, traced or profiled unless the profiler is
+# enabled. Memory peaks come from tracemalloc and are the peak above the
+# memory already allocated when the stage started, nested stages included.
+# Stages named in profile_stages (or all, with profile_stages=True) run under
+# cProfile and write_profile() dumps the collected stats for pstats/snakeviz.
+
+
+class StageTimer:
+    """Result of one stage; seconds is set when the stage exits"""
+    __slots__ = ("name", "start_ns", "elapsed_ns", "start_memory", "peak_memory")
+
+    def __init__(self, name):
+        self.name = name
+        self.start_ns = 0
+        self.elapsed_ns = 0
+        self.start_memory = 0
+        self.peak_memory = 0
+
+    @property
+    def seconds(self):
+        return self.elapsed_ns / 1e9
+
+
+class _Stage:
+    __slots__ = ("profiler", "timer")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.timer = StageTimer(name)
+
+    def __enter__(self):
+        if self.profiler.enabled:
+            self.profiler._enter(self.timer)
+        self.timer.start_ns = time.perf_counter_ns()
+        return self.timer
+
+    def __exit__(self, *exc):
+        self.timer.elapsed_ns = time.perf_counter_ns() - self.timer.start_ns
+        if self.profiler.enabled:
+            self.profiler._exit(self.timer)
+        return False
+
+
+class Profiler:
+    def __init__(self, enabled=False, track_memory=False, profile_stages=()):
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.profile_stages = profile_stages
+        self.stats = {}
+        self._stack = []
+        self._cprofile = None
+        self._profiling_depth = 0
+
+    def stage(self, name):
+        """Context manager timing one stage; yields its StageTimer"""
+        return _Stage(self, name)
+
+    def timed(self, name=None):
+        """Decorator recording every call of a function as a stage"""
+        def decorator(function):
+            stage_name = name or function.__qualname__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _Stage(self, stage_name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _profiles(self, name):
+        return self.profile_stages is True or name in self.profile_stages
+
+    def _enter(self, timer):
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # Keep the enclosing stage's peak before resetting it for this one
+                parent = self._stack[-1]
+                parent.peak_memory = max(parent.peak_memory, peak)
+            tracemalloc.reset_peak()
+            timer.start_memory = current
+            timer.peak_memory = current
+        if self._profiles(timer.name):
+            if self._cprofile is None:
+                self._cprofile = cProfile.Profile()
+            if self._profiling_depth == 0:
+                self._cprofile.enable()
+            self._profiling_depth += 1
+        self._stack.append(timer)
+
+    def _exit(self, timer):
+        self._stack.pop()
+        if self._profiles(timer.name):
+            self._profiling_depth -= 1
+            if self._profiling_depth == 0:
+                self._cprofile.disable()
+        peak_bytes = None
+        if self.track_memory and tracemalloc.is_tracing():
+            timer.peak_memory = max(timer.peak_memory, tracemalloc.get_traced_memory()[1])
+            peak_bytes = timer.peak_memory - timer.start_memory
+            if self._stack:
+                parent = self._stack[-1]
+                parent.peak_memory = max(parent.peak_memory, timer.peak_memory)
+
+        stats = self.stats.get(timer.name)
+        if stats is None:
+            stats = self.stats[timer.name] = {"stage": timer.name, "calls": 0, "total_ns": 0,
+                                              "min_ns": timer.elapsed_ns, "max_ns": 0,
+                                              "peak_memory_bytes": None}
+        stats["calls"] += 1
+        stats["total_ns"] += timer.elapsed_ns
+        stats["min_ns"] = min(stats["min_ns"], timer.elapsed_ns)
+        stats["max_ns"] = max(stats["max_ns"], timer.elapsed_ns)
+        if peak_bytes is not None:
+            stats["peak_memory_bytes"] = max(stats["peak_memory_bytes"] or 0, peak_bytes)
+
+    def report(self):
+        """One row per stage in order of first use"""
+        return [dict(stats, total_seconds=stats["total_ns"] / 1e9,
+                     mean_seconds=stats["total_ns"] / stats["calls"] / 1e9)
+                for stats in self.stats.values()]
+
+    def write_report(self, path, **metadata):
+        """Write the stage report as CSV (.csv) or JSON (anything else)"""
+        rows = self.report()
+        if path.endswith(".csv"):
+            fieldnames = ["stage", "calls", "total_seconds", "mean_seconds", "total_ns",
+                          "min_ns", "max_ns", "peak_memory_bytes"]
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(path, "w") as f:
+                json.dump({"metadata": dict(metadata, pid=os.getpid(), time=time.time()),
+                           "stages": rows}, f, indent=2)
+
+    def write_profile(self, path):
+        """Dump the cProfile stats of the profiled stages; returns False if nothing was profiled"""
+        if self._cprofile is None:
+            return False
+        self._cprofile.dump_stats(path)
+        return True
+
+
+# Shared disabled profiler for code that is instrumented but not configured
+profiler = Profiler()
@@ -0,0 +1,236 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from form_vocabulary import PAD_CODE, FormVocabulary, distinct_keys
+
+# k-th order Markov model of formKey transitions.
+#
+#   model = MarkovTransitionModel(order=1).fit(forms)
+#   next_keys, probabilities = model.predict_next(prefixes)     # one row per prefix
+#   scores = model.log_likelihood(forms)                         # one score per process
+#
+#   python markov_model.py Generated_1000_Processes.csv --order 2 --jobs 4
+#
+# formKeys are encoded with FormVocabulary (code 0 is padding, 1..V the known
+# formKeys, V+1 anything unseen) and counts live in a dense array with one
+# axis per context step plus one for the next step, so counts[a, b, c] is how
+# often c followed a, b. Steps before the start of a process use code 0, so
+# the first formKeys are modelled too. A whole block of processes is counted
+# with one bincount, and two count arrays are merged with np.add.at after
+# mapping their codes onto one vocabulary, so shards can be counted in
+# separate processes and summed.
+#
+# Probabilities use additive smoothing over the V known formKeys plus
+# "unknown"; contexts never seen in training back off to the overall
+# frequency of each formKey.
+
+BLOCK_ROWS = 1 << 18
+# Largest count array (cells) the model will allocate
+MAX_CELLS = 1 << 28
+
+
+class MarkovTransitionModel:
+    def __init__(self, order=1, smoothing=1.0, form_keys=()):
+        if order < 1:
+            raise ValueError("order must be at least 1")
+        self.order = order
+        self.smoothing = smoothing
+        self.vocabulary = FormVocabulary(form_keys)
+        self.counts = np.zeros((self.num_states,) * (order + 1), dtype=np.int64)
+        self._log_table = None
+
+    @property
+    def num_states(self):
+        """Padding/start, the known formKeys and unknown"""
+        return len(self.vocabulary) + 2
+
+    @property
+    def form_keys(self):
+        return self.vocabulary.form_keys
+
+    def _code_map(self, old_num_states):
+        # Codes of an array built for a smaller vocabulary: known codes stay, unknown moves to the end
+        return np.r_[np.arange(old_num_states - 1), self.vocabulary.unknown_code]
+
+    def _add_counts(self, counts, code_map):
+        np.add.at(self.counts, np.ix_(*[code_map] * (self.order + 1)), counts)
+
+    def _grow(self):
+        old_num_states = self.counts.shape[0]
+        if old_num_states == self.num_states:
+            return
+        if self.num_states ** (self.order + 1) > MAX_CELLS:
+            raise ValueError(f"{len(self.vocabulary)} formKeys at order {self.order} need more than "
+                             f"{MAX_CELLS} counts; use a lower order")
+        old_counts = self.counts
+        self.counts = np.zeros((self.num_states,) * (self.order + 1), dtype=np.int64)
+        self._add_counts(old_counts, self._code_map(old_num_states))
+
+    def _flat_index(self, codes):
+        # Index into counts.ravel() of (context..., next) for every position of every row
+        num_states = self.num_states
+        codes = np.asarray(codes, dtype=np.int64)
+        length = codes.shape[1]
+        padded = np.hstack([np.zeros((len(codes), self.order), dtype=np.int64), codes])
+        flat = np.zeros(codes.shape, dtype=np.int64)
+        for step in range(self.order):
+            flat = flat * num_states + padded[:, step:step + length]
+        return flat * num_states + codes
+
+    def partial_fit(self, forms):
+        """Add the transitions of a (zero-padded) formKey matrix to the counts"""
+        forms = np.asarray(forms)
+        self.vocabulary.extend(distinct_keys(forms))
+        self._grow()
+        size = self.counts.size
+        counts = self.counts.reshape(-1)
+        for start in range(0, len(forms), BLOCK_ROWS):
+            codes = self.vocabulary.encode(forms[start:start + BLOCK_ROWS])
+            flat = self._flat_index(codes)
+            counts += np.bincount(flat[codes != PAD_CODE], minlength=size)
+        self._log_table = None
+        return self
+
+    def fit(self, forms):
+        self.counts[...] = 0
+        return self.partial_fit(forms)
+
+    def merge(self, other):
+        """Add the counts of another model of the same order (vocabularies may differ)"""
+        if other.order != self.order:
+            raise ValueError("cannot merge models of different orders")
+        self.vocabulary.extend(other.form_keys)
+        self._grow()
+        code_map = np.r_[PAD_CODE, self.vocabulary.encode(other.form_keys), self.vocabulary.unknown_code]
+        self._add_counts(other.counts, code_map)
+        self._log_table = None
+        return self
+
+    def log_probability_table(self):
+        """log P(next | context): one row per flattened context, columns for codes 1..V+1"""
+        if self._log_table is None:
+            counts = self.counts.reshape(-1, self.num_states)[:, 1:].astype(np.float64)
+            targets = counts.shape[1]
+            totals = counts.sum(axis=1, keepdims=True)
+            probabilities = (counts + self.smoothing) / (totals + self.smoothing * targets)
+            marginal = counts.sum(axis=0) + self.smoothing
+            marginal /= marginal.sum()
+            probabilities = np.where(totals > 0, probabilities, marginal)
+            self._log_table = np.log(probabilities)
+        return self._log_table
+
+    def _contexts(self, prefixes, lengths=None):
+        # Flattened context index of the step after each prefix
+        codes = self.vocabulary.encode(np.asarray(prefixes)).astype(np.int64)
+        if codes.ndim == 1:
+            codes = codes[:, None]
+        if lengths is None:
+            lengths = (codes != PAD_CODE).sum(axis=1)
+        rows = np.arange(len(codes))
+        context = np.zeros(len(codes), dtype=np.int64)
+        for step in range(self.order):
+            position = np.asarray(lengths) - self.order + step
+            code = np.where(position >= 0, codes[rows, np.maximum(position, 0)], PAD_CODE)
+            context = context * self.num_states + code
+        return context
+
+    def predict_proba(self, prefixes, lengths=None):
+        """(rows x V) probability of each known formKey (in form_keys order) coming next"""
+        return np.exp(self.log_probability_table()[self._contexts(prefixes, lengths), :len(self.vocabulary)])
+
+    def predict_next(self, prefixes, lengths=None, top=1):
+        """Most likely next formKey(s) and their probabilities for each prefix row.
+
+        Rows are zero-padded formKey prefixes (an empty prefix predicts the
+        first formKey); lengths overrides the count of non-zero entries.
+        With top > 1 both results have one column per candidate.
+        """
+        probabilities = self.predict_proba(prefixes, lengths)
+        if top == 1:
+            best = probabilities.argmax(axis=1)
+            return self.form_keys[best], probabilities[np.arange(len(best)), best]
+        best = np.argsort(-probabilities, axis=1, kind="stable")[:, :top]
+        return self.form_keys[best], np.take_along_axis(probabilities, best, axis=1)
+
+    def log_likelihood(self, forms):
+        """Natural-log probability of every row of a zero-padded formKey matrix"""
+        forms = np.asarray(forms)
+        table = self.log_probability_table().reshape(-1)
+        scores = np.empty(len(forms))
+        for start in range(0, len(forms), BLOCK_ROWS):
+            codes = self.vocabulary.encode(forms[start:start + BLOCK_ROWS])
+            flat = self._flat_index(codes)
+            # Column code - 1 of the table row for the context
+            index = (flat // self.num_states) * (self.num_states - 1) + flat % self.num_states - 1
+            steps = np.where(codes != PAD_CODE, table[np.maximum(index, 0)], 0.0)
+            scores[start:start + BLOCK_ROWS] = steps.sum(axis=1)
+        return scores
+
+
+def _count_shard(shard):
+    forms, form_keys, order = shard
+    return MarkovTransitionModel(order, form_keys=form_keys).partial_fit(forms)
+
+
+def fit_parallel(forms, order=1, smoothing=1.0, n_jobs=None, shard_rows=BLOCK_ROWS):
+    """Count shards of rows in worker processes and merge them into one model"""
+    forms = np.asarray(forms)
+    form_keys = distinct_keys(forms)
+    model = MarkovTransitionModel(order, smoothing, form_keys)
+    shards = [(forms[start:start + shard_rows], form_keys, order)
+              for start in range(0, len(forms), shard_rows)]
+    if len(shards) <= 1 or n_jobs == 1:
+        for shard in shards:
+            model.merge(_count_shard(shard))
+        return model
+    with ProcessPoolExecutor(max_workers=n_jobs or os.cpu_count()) as pool:
+        for shard_model in pool.map(_count_shard, shards):
+            model.merge(shard_model)
+    return model
+
+
+def main(argv=None):
+    from process_loader import load_processes
+
+    parser = argparse.ArgumentParser(description="Fit a Markov model of formKey transitions")
+    parser.add_argument("csv_file_path", nargs="?", default="Generated_1000_Processes.csv")
+    parser.add_argument("--order", type=int, default=1)
+    parser.add_argument("--smoothing", type=float, default=1.0)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--prefix", default=None, help="comma-separated formKeys to predict the next step for")
+    args = parser.parse_args(argv)
+
+    _, forms = load_processes(args.csv_file_path)
+    start = time.perf_counter()
+    model = fit_parallel(forms, args.order, args.smoothing, args.jobs)
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    scores = model.log_likelihood(forms)
+    score_seconds = time.perf_counter() - start
+    steps = max(int(np.count_nonzero(forms)), 1)
+
+    print(f"Order {model.order} model over {len(model.form_keys)} formKeys from {len(forms)} processes")
+    print(f"Fit: {fit_seconds:.3f} s, scoring: {score_seconds:.3f} s")
+    print(f"Mean log-likelihood per process: {scores.mean():.3f} ({scores.sum() / steps:.3f} per step)")
+    print()
+
+    if args.prefix:
+        prefix = np.array([[int(key) for key in args.prefix.split(",")]])
+        keys, probabilities = model.predict_next(prefix, top=min(3, len(model.form_keys)))
+        print(f"Next formKey after {args.prefix}:")
+        for key, probability in zip(keys[0].tolist(), probabilities[0].tolist()):
+            print(f"  {key}: {probability:.3f}")
+    elif model.order == 1:
+        # Rows: start, then every formKey
+        prefixes = np.r_[0, model.form_keys][:, None]
+        probabilities = model.predict_proba(prefixes)
+        print("Transition probabilities (row: current formKey, column: next formKey)")
+        print(f"{'':>8}" + "".join(f"{key:>8}" for key in model.form_keys.tolist()))
+        for key, row in zip(["start"] + model.form_keys.tolist(), probabilities):
+            print(f"{key:>8}" + "".join(f"{p:>8.3f}" for p in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import pickle
+import numpy as np
+
+# Bump when the layout of the saved artifact changes so old files are ignored
+ARTIFACT_VERSION = 2
+
+
+def dataset_fingerprint(X):
+    """SHA-256 of the formKey matrix contents, shape and dtype"""
+    X = np.ascontiguousarray(X)
+    digest = hashlib.sha256()
+    digest.update(f"{X.dtype.str}:{X.shape}".encode())
+    digest.update(X.tobytes())
+    return digest.hexdigest()
+
+
+def artifact_path_for(artifact_dir, fingerprint, predictor_mode):
+    return os.path.join(
+        artifact_dir,
+        f"grouping_model_v{ARTIFACT_VERSION}_{predictor_mode}_{fingerprint[:16]}.pkl",
+    )
+
+
+def save_artifact(path, model, label_remap, unique_keys, fingerprint, predictor_mode):
+    """Write the trained model and its label mappings to a versioned pickle"""
+    label_remap = np.asarray(label_remap)
+    unique_keys = np.asarray(unique_keys)
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "fingerprint": fingerprint,
+        "predictor_mode": predictor_mode,
+        "model": model,
+        "label_remap": label_remap,
+        "unique_keys": unique_keys,
+        # Row g-1 is the formKey sequence of group g
+        "group_sequences": unique_keys[label_remap > 0],
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_artifact(path, fingerprint=None):
+    """Load an artifact written by save_artifact.
+
+    Returns None when the file is missing, was written by another artifact
+    version, or (if given) does not match fingerprint. Only load artifacts
+    you wrote yourself: they are pickles.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        artifact = pickle.load(f)
+    if artifact.get("version") != ARTIFACT_VERSION:
+        return None
+    if fingerprint is not None and artifact.get("fingerprint") != fingerprint:
+        return None
+    return artifact
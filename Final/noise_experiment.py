@@ -0,0 +1,169 @@
+import argparse
+import csv
+import itertools
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from process_loader import load_processes
+from sequence_groups import label_sequences, remap_labels
+
+# Noise-robustness sweep for the grouping classifier.
+#
+#   python noise_experiment.py Generated_1000_Processes.csv
+#   python noise_experiment.py Generated_5000_Processes.csv --ratios 0 0.1 0.2 --magnitudes 1 1,2,3 --jobs 4
+#
+# This is the commented-out noise block in Final_Code.py run over a grid of
+# settings: labels come from the clean sequences, then noise_ratio of the
+# processes get noise_level formKeys shifted by a value drawn from
+# noise_magnitude, and the classifier is trained and scored on the noised
+# matrix. The clean matrix is placed in shared memory once; every worker maps
+# it read-only and noises its own copy, so configurations run in parallel
+# without pickling the data for each one.
+
+_worker = {}
+
+
+def add_noise(X, noise_ratio, noise_level, noise_magnitude, rng):
+    """Copy of X with noise_level distinct formKeys of noise_ratio of the rows shifted"""
+    X = np.array(X)
+    num_samples, width = X.shape
+    rows = rng.choice(num_samples, size=int(noise_ratio * num_samples), replace=False)
+    level = min(noise_level, width)
+    # Distinct positions per row: the first `level` columns of a random permutation
+    positions = np.argsort(rng.random((len(rows), width)), axis=1)[:, :level]
+    changes = rng.choice(np.asarray(noise_magnitude), size=(len(rows), level))
+    X[rows[:, None], positions] += changes.astype(X.dtype)
+    return X
+
+
+def make_predictor(predictor_mode):
+    if predictor_mode == "hash_index":
+        from group_index import HashGroupPredictor
+        return HashGroupPredictor(nearest_fallback=True)
+    from sklearn.ensemble import RandomForestClassifier
+    # One core per configuration; the pool provides the parallelism
+    return RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=1)
+
+
+def _init_worker(shm_name, shape, dtype, y, train_index, test_index):
+    # sklearn warns when most classes are singletons, which is normal here
+    warnings.simplefilter("ignore", UserWarning)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    X = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    X.flags.writeable = False
+    _worker.update(shm=shm, X=X, y=y, train_index=train_index, test_index=test_index)
+
+
+def run_configuration(config):
+    """Noise, fit and score one configuration against the shared clean matrix"""
+    from sklearn.metrics import accuracy_score
+
+    rng = np.random.default_rng([config["seed"], config["index"]])
+    X = add_noise(_worker["X"], config["noise_ratio"], config["noise_level"],
+                  config["noise_magnitude"], rng)
+    y = _worker["y"]
+    train_index, test_index = _worker["train_index"], _worker["test_index"]
+
+    clf = make_predictor(config["predictor"])
+    start = time.perf_counter()
+    clf.fit(X[train_index], y[train_index])
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    predictions = clf.predict(X[test_index])
+    predict_seconds = time.perf_counter() - start
+
+    return {
+        "predictor": config["predictor"],
+        "noise_ratio": config["noise_ratio"],
+        "noise_level": config["noise_level"],
+        "noise_magnitude": ",".join(map(str, config["noise_magnitude"])),
+        "repeat": config["repeat"],
+        "accuracy": accuracy_score(y[test_index], predictions),
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+    }
+
+
+def prepare_dataset(csv_file_path):
+    """(X, y, train_index, test_index) filtered and split exactly as in Final_Code.py"""
+    from sklearn.model_selection import train_test_split
+
+    _, X = load_processes(csv_file_path)
+    labels, _, label_counts = label_sequences(X)
+    valid_mask = label_counts[labels] > 1
+    X = np.ascontiguousarray(X[valid_mask])
+    y = remap_labels(label_counts, min_count=2)[labels[valid_mask]]
+    min_test_size = max(len(set(y.tolist())) / len(y), 0.3)
+    train_index, test_index = train_test_split(
+        np.arange(len(y)), test_size=min_test_size, stratify=y, random_state=42
+    )
+    return X, y, train_index, test_index
+
+
+def run_sweep(X, y, train_index, test_index, configs, n_jobs=None):
+    """Run every configuration in a process pool; results come back in config order"""
+    shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+    try:
+        np.ndarray(X.shape, dtype=X.dtype, buffer=shm.buf)[:] = X
+        with ProcessPoolExecutor(
+            max_workers=n_jobs or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(shm.name, X.shape, X.dtype, y, train_index, test_index),
+        ) as pool:
+            return list(pool.map(run_configuration, configs))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep noise settings and measure grouping accuracy")
+    parser.add_argument("csv_file_path", nargs="?", default="Generated_1000_Processes.csv")
+    parser.add_argument("--ratios", type=float, nargs="*", default=[0.0, 0.05, 0.1, 0.2, 0.3])
+    parser.add_argument("--levels", type=int, nargs="*", default=[1])
+    parser.add_argument("--magnitudes", nargs="*", default=["1", "1,2,3"],
+                        help="comma-separated shift values, one set per configuration")
+    parser.add_argument("--predictors", nargs="*", default=["random_forest"],
+                        choices=["random_forest", "hash_index"])
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--output", default=None, help="also write the results table to this CSV")
+    args = parser.parse_args(argv)
+
+    X, y, train_index, test_index = prepare_dataset(args.csv_file_path)
+    magnitudes = [[int(value) for value in magnitude.split(",")] for magnitude in args.magnitudes]
+    configs = [
+        {"index": index, "seed": args.seed, "predictor": predictor, "noise_ratio": ratio,
+         "noise_level": level, "noise_magnitude": magnitude, "repeat": repeat}
+        for index, (predictor, ratio, level, magnitude, repeat) in enumerate(itertools.product(
+            args.predictors, args.ratios, args.levels, magnitudes, range(args.repeats)))
+    ]
+
+    start = time.perf_counter()
+    results = run_sweep(X, y, train_index, test_index, configs, args.jobs)
+    total_seconds = time.perf_counter() - start
+
+    print(f"{'predictor':<16}{'ratio':>8}{'level':>7}{'magnitude':>12}{'repeat':>8}"
+          f"{'accuracy':>11}{'fit (s)':>10}{'predict (s)':>13}")
+    print("-" * 85)
+    for result in results:
+        print(f"{result['predictor']:<16}{result['noise_ratio']:>8.2f}{result['noise_level']:>7}"
+              f"{result['noise_magnitude']:>12}{result['repeat']:>8}{result['accuracy'] * 100:>10.2f}%"
+              f"{result['fit_seconds']:>10.3f}{result['predict_seconds']:>13.4f}")
+    print()
+    print(f"{len(results)} configurations in {total_seconds:.1f} seconds")
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+class PatternTrie:
+    """Array-backed trie of formKey sequences for starting (or ending) pattern queries.
+
+    Each node is one prefix shared by at least one process; node i is stored as
+    entries i of the parallel lists below, and _count[i] is the number of
+    processes whose sequence starts with that prefix. With reverse=True the
+    sequences are inserted back to front, so nodes are ending patterns instead.
+    Shared pattern counts for every length come from one walk over the nodes,
+    and processes can be inserted at any time without rebuilding.
+    """
+
+    def __init__(self, sequences=None, reverse=False):
+        self.reverse = reverse
+        self.names = []
+        # Node 0 is the root (the empty pattern)
+        self._parent = [-1]
+        self._form_key = [None]
+        self._depth = [0]
+        self._count = [0]
+        self._children = [[]]
+        self._child_of = {}
+        # Processes whose whole sequence ends at a node
+        self._terminal = {}
+
+        if sequences:
+            for name, seq in sequences.items():
+                self.insert(name, seq)
+
+    def __len__(self):
+        return len(self._parent) - 1
+
+    def insert(self, name, seq):
+        """Add one process; returns its index in self.names"""
+        process_id = len(self.names)
+        self.names.append(name)
+        node = 0
+        self._count[0] += 1
+        for form_key in (reversed(seq) if self.reverse else seq):
+            child = self._child_of.get((node, form_key))
+            if child is None:
+                child = len(self._parent)
+                self._parent.append(node)
+                self._form_key.append(form_key)
+                self._depth.append(self._depth[node] + 1)
+                self._count.append(0)
+                self._children.append([])
+                self._children[node].append(child)
+                self._child_of[(node, form_key)] = child
+            self._count[child] += 1
+            node = child
+        self._terminal.setdefault(node, []).append(process_id)
+        return process_id
+
+    def _pattern(self, path):
+        return tuple(reversed(path)) if self.reverse else tuple(path)
+
+    def _walk(self, max_depth=None):
+        # Depth-first walk yielding (node, path of formKeys from the root)
+        path = []
+        stack = [(child, 1) for child in reversed(self._children[0])]
+        while stack:
+            node, depth = stack.pop()
+            del path[depth - 1:]
+            path.append(self._form_key[node])
+            yield node, path
+            if max_depth is None or depth < max_depth:
+                stack.extend((child, depth + 1) for child in reversed(self._children[node]))
+
+    def counts_by_length(self, min_count=2, max_length=None):
+        """{length: {pattern: number of processes}} for patterns shared by at least min_count processes"""
+        counts = {}
+        for node, path in self._walk(max_length):
+            if self._count[node] >= min_count:
+                counts.setdefault(len(path), {})[self._pattern(path)] = self._count[node]
+        return counts
+
+    def groups(self, pattern_length, min_count=1):
+        """{pattern: [process names]} for the patterns of exactly pattern_length formKeys.
+
+        Processes shorter than pattern_length are left out. Groups and their
+        members are listed in insertion order of the processes.
+        """
+        groups = []
+        for node, path in self._walk(pattern_length):
+            if len(path) == pattern_length and self._count[node] >= min_count:
+                groups.append((sorted(self._subtree_members(node)), self._pattern(path)))
+        groups.sort(key=lambda group: group[0][0])
+        return {pattern: [self.names[i] for i in members] for members, pattern in groups}
+
+    def _subtree_members(self, node):
+        members = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            members.extend(self._terminal.get(current, ()))
+            stack.extend(self._children[current])
+        return members
@@ -0,0 +1,77 @@
+import argparse
+import numpy as np
+from model_store import load_artifact
+from process_loader import parse_process_csv
+
+# Classify new process sequences with a model saved by Final_Code.py, without
+# reading the training CSV.
+#
+#   python predict_groups.py artifacts/<model>.pkl --csv New_Processes.csv
+#   python predict_groups.py artifacts/<model>.pkl --sequence 173,252,253,256,165
+
+
+def predict_groups(artifact, X):
+    """Predicted group number for every row of X"""
+    return artifact["model"].predict(np.asarray(X, dtype=np.int32))
+
+
+def read_sequences(csv_file_path=None, sequences=()):
+    """(names, rows) from a process CSV and/or comma-separated formKey strings"""
+    names, rows = [], []
+    if csv_file_path:
+        csv_names, csv_forms = parse_process_csv(csv_file_path)
+        names.extend(csv_names.tolist())
+        rows.extend(csv_forms)
+    for i, sequence in enumerate(sequences, start=1):
+        names.append(f"Sequence {i}")
+        rows.append(np.array([int(key) for key in sequence.split(",")], dtype=np.int32))
+    return names, rows
+
+
+def sequence_matrix(artifact, names, rows):
+    """rows as a matrix of the model's width, zero-padded like the training CSVs.
+
+    Raises ValueError naming the first row with more formKeys than the model was trained on.
+    """
+    width = artifact["unique_keys"].shape[1]
+    X = np.zeros((len(rows), width), dtype=np.int32)
+    for k, (name, row) in enumerate(zip(names, rows)):
+        row = np.asarray(row, dtype=np.int32)
+        length = int(np.flatnonzero(row)[-1]) + 1 if row.any() else 0
+        if length > width:
+            raise ValueError(f"{name} has {length} formKeys; the model was trained on sequences of at most {width}")
+        X[k, :length] = row[:length]
+    return X
+
+
+def print_predictions(artifact, names, X):
+    predictions = predict_groups(artifact, X)
+    group_sequences = artifact["group_sequences"]
+    for name, row, group_id in zip(names, X, predictions):
+        group_sequence = group_sequences[group_id - 1].tolist() if 0 < group_id <= len(group_sequences) else None
+        print(f"{name} {row.tolist()} -> Group {group_id} {group_sequence}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assign process sequences to trained groups")
+    parser.add_argument("artifact", help="model file written by Final_Code.py")
+    parser.add_argument("--csv", help="csv with the same layout as Generated_*_Processes.csv")
+    parser.add_argument("--sequence", action="append", default=[],
+                        help="comma-separated formKeys; may be given more than once")
+    args = parser.parse_args(argv)
+
+    artifact = load_artifact(args.artifact)
+    if artifact is None:
+        parser.error(f"{args.artifact} is missing or was written by another artifact version")
+
+    names, rows = read_sequences(args.csv, args.sequence)
+    if not rows:
+        parser.error("give --csv and/or --sequence")
+    try:
+        X = sequence_matrix(artifact, names, rows)
+    except ValueError as e:
+        parser.error(str(e))
+    print_predictions(artifact, names, X)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import os
+from itertools import islice
+import numpy as np
+
+# Sidecar cache files are written next to the CSV:
+#   <csv>.forms.npy  - int32 matrix of formKeys (memory-mapped on later runs)
+#   <csv>.meta.npz   - process names plus the size/mtime of the CSV they came from
+FORMS_SUFFIX = ".forms.npy"
+META_SUFFIX = ".meta.npz"
+
+
+def _cache_paths(csv_file_path):
+    return csv_file_path + FORMS_SUFFIX, csv_file_path + META_SUFFIX
+
+
+def _csv_signature(csv_file_path):
+    stat = os.stat(csv_file_path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def parse_process_csv(csv_file_path):
+    """Parse a process CSV into (names, forms) without building per-row Python lists"""
+    with open(csv_file_path, newline='') as csvfile:
+        header = csvfile.readline().rstrip("\r\n").split(",")
+    num_columns = len(header)
+
+    names = np.loadtxt(csv_file_path, delimiter=",", skiprows=1, usecols=0,
+                       dtype=str, comments=None, ndmin=1)
+    forms = np.loadtxt(csv_file_path, delimiter=",", skiprows=1,
+                       usecols=range(1, num_columns), dtype=np.int32,
+                       comments=None, ndmin=2)
+    return names, np.ascontiguousarray(forms)
+
+
+def iter_process_chunks(csv_file_path, chunk_size=100_000):
+    """Yield (names, forms) for consecutive blocks of at most chunk_size rows"""
+    with open(csv_file_path, newline='') as csvfile:
+        header = csvfile.readline().rstrip("\r\n").split(",")
+        form_columns = range(1, len(header))
+        while True:
+            raw_lines = list(islice(csvfile, chunk_size))
+            if not raw_lines:
+                break
+            lines = [line for line in raw_lines if line.strip()]
+            if not lines:
+                continue
+            names = np.loadtxt(lines, delimiter=",", usecols=0, dtype=str,
+                               comments=None, ndmin=1)
+            forms = np.loadtxt(lines, delimiter=",", usecols=form_columns,
+                               dtype=np.int32, comments=None, ndmin=2)
+            yield names, forms
+
+
+def _load_cache(csv_file_path, signature):
+    forms_path, meta_path = _cache_paths(csv_file_path)
+    if not (os.path.exists(forms_path) and os.path.exists(meta_path)):
+        return None
+    with np.load(meta_path) as meta:
+        if not np.array_equal(meta["signature"], signature):
+            return None
+        names = meta["names"]
+    forms = np.load(forms_path, mmap_mode="r")
+    return names, forms
+
+
+def _write_cache(csv_file_path, signature, names, forms):
+    forms_path, meta_path = _cache_paths(csv_file_path)
+    # Write to temporary names first so an interrupted run never leaves a
+    # half-written cache that matches the signature
+    np.save(forms_path + ".tmp.npy", forms)
+    np.savez(meta_path + ".tmp.npz", names=names, signature=signature)
+    os.replace(forms_path + ".tmp.npy", forms_path)
+    os.replace(meta_path + ".tmp.npz", meta_path)
+
+
+def load_processes(csv_file_path, use_cache=True):
+    """Load process names and an int32 formKey matrix, reusing the .npy cache when the CSV is unchanged"""
+    signature = _csv_signature(csv_file_path)
+    if use_cache:
+        cached = _load_cache(csv_file_path, signature)
+        if cached is not None:
+            return cached
+
+    names, forms = parse_process_csv(csv_file_path)
+    if use_cache:
+        try:
+            _write_cache(csv_file_path, signature, names, forms)
+        except OSError as e:
+            print(f"Could not write cache for {csv_file_path}: {e}")
+    return names, forms
+
+
+def write_processes(csv_file_path, names, forms, write_cache=True):
+    """Write names and a zero-padded formKey matrix as a process CSV (plus its .npy cache)"""
+    forms = np.asarray(forms, dtype=np.int32)
+    with open(csv_file_path, "w", newline='') as f:
+        f.write("Process Name," + ",".join(f"Form {k + 1}" for k in range(forms.shape[1])) + "\n")
+        for start in range(0, len(forms), 100_000):
+            rows = forms[start:start + 100_000].tolist()
+            f.write("".join(f"{name}," + ",".join(map(str, row)) + "\n"
+                            for name, row in zip(names[start:start + 100_000], rows)))
+    if write_cache:
+        _write_cache(csv_file_path, _csv_signature(csv_file_path), np.asarray(names), forms)
@@ -0,0 +1,145 @@
+import numpy as np
+from form_vocabulary import FormVocabulary
+
+
+class StreamingGroupTable:
+    """Exact-sequence group table that is updated one chunk of processes at a time.
+
+    Only one entry per distinct sequence is kept (its formKeys and how many
+    processes share it), so memory follows the number of distinct sequences
+    rather than the number of processes read. Sequences are looked up by their
+    packed FormVocabulary key.
+    """
+
+    def __init__(self):
+        self.vocabulary = FormVocabulary()
+        self._slot_of_key = {}
+        self._sequences = []
+        self._counts = []
+        self._group_of_slot = None
+
+    def __len__(self):
+        return len(self._sequences)
+
+    def _rekey(self):
+        # Codes got wider, so every stored key has to be packed again
+        keys = self.vocabulary.pack_forms(np.stack(self._sequences)).tolist()
+        self._slot_of_key = dict(zip(keys, range(len(keys))))
+
+    def update(self, forms):
+        """Count the rows of one chunk and return the slot of every row"""
+        forms = np.ascontiguousarray(forms)
+        if len(forms) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        bits = self.vocabulary.bits_per_code
+        self.vocabulary.extend(forms)
+        if self.vocabulary.bits_per_code != bits and self._sequences:
+            self._rekey()
+
+        uniq, first_index, inverse, counts = np.unique(
+            self.vocabulary.pack_forms(forms),
+            return_index=True, return_inverse=True, return_counts=True
+        )
+        keys = uniq.tolist()
+        # Visit the chunk's distinct sequences in order of first appearance so
+        # slots (and later group numbers) follow the order of the input file
+        chunk_slots = np.empty(len(uniq), dtype=np.int64)
+        for u in np.argsort(first_index, kind="stable").tolist():
+            slot = self._slot_of_key.get(keys[u])
+            if slot is None:
+                slot = len(self._sequences)
+                self._slot_of_key[keys[u]] = slot
+                self._sequences.append(forms[first_index[u]].copy())
+                self._counts.append(0)
+            self._counts[slot] += int(counts[u])
+            chunk_slots[u] = slot
+
+        self._group_of_slot = None
+        return chunk_slots[inverse.reshape(-1)]
+
+    def finalize(self, min_count=2):
+        """Drop sequences seen fewer than min_count times and number the rest 1..G.
+
+        Returns (group_sequences, group_counts) where row g-1 describes group g.
+        """
+        counts = np.asarray(self._counts, dtype=np.int64)
+        keep = counts >= min_count
+        self._group_of_slot = np.zeros(len(counts), dtype=np.int64)
+        self._group_of_slot[keep] = np.arange(1, int(keep.sum()) + 1)
+
+        if self._sequences:
+            sequences = np.stack(self._sequences)[keep]
+        else:
+            sequences = np.empty((0, 0), dtype=np.int32)
+        return sequences, counts[keep]
+
+    def lookup(self, forms):
+        """Group number for every row of forms (0 for filtered or unseen sequences)"""
+        if self._group_of_slot is None:
+            raise RuntimeError("finalize() must be called before lookup()")
+        forms = np.ascontiguousarray(forms)
+        # Unknown formKeys get a code no stored sequence uses, so they never match
+        keys = self.vocabulary.pack_forms(forms).tolist()
+        slots = np.fromiter((self._slot_of_key.get(key, -1) for key in keys),
+                            dtype=np.int64, count=len(keys))
+        groups = np.zeros(len(slots), dtype=np.int64)
+        known = slots >= 0
+        groups[known] = self._group_of_slot[slots[known]]
+        return groups
+
+
+def stream_sequence_groups(chunks, min_count=2):
+    """Build a finalized StreamingGroupTable from an iterable of (names, forms) chunks"""
+    table = StreamingGroupTable()
+    for _, forms in chunks:
+        table.update(forms)
+    group_sequences, group_counts = table.finalize(min_count=min_count)
+    return table, group_sequences, group_counts
+
+
+def label_sequences(X):
+    """Label every row of X by its exact sequence, numbering sequences by first appearance.
+
+    Returns (labels, unique_keys, label_counts) where unique_keys[label] is the
+    sequence behind a label and label_counts[label] how many rows share it.
+    """
+    X = np.ascontiguousarray(X)
+    if len(X) == 0:
+        return np.empty(0, dtype=np.int64), X[:0], np.empty(0, dtype=np.int64)
+
+    # Unique over one packed key per row instead of over whole rows
+    keys = FormVocabulary.from_forms(X).pack_forms(X)
+    _, first_index, inverse, counts = np.unique(
+        keys, return_index=True, return_inverse=True, return_counts=True
+    )
+    # np.unique sorts by key; re-rank by first appearance so labels come out
+    # in the same order as the original per-row dict loop
+    order = np.argsort(first_index, kind="stable")
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return rank[inverse.reshape(-1)], X[first_index[order]], counts[order]
+
+
+def remap_labels(label_counts, min_count=2):
+    """Map labels shared by at least min_count rows to 1..G and the rest to 0"""
+    keep = np.asarray(label_counts) >= min_count
+    label_remap = np.zeros(len(keep), dtype=np.int64)
+    label_remap[keep] = np.arange(1, int(keep.sum()) + 1)
+    return label_remap
+
+
+def group_members(labels):
+    """Split row indices by label using one stable argsort.
+
+    Returns (group_ids, members) where members[i] holds the row indices, in
+    input order, of the rows labelled group_ids[i].
+    """
+    labels = np.asarray(labels)
+    order = np.argsort(labels, kind="stable")
+    sorted_labels = labels[order]
+    starts = np.flatnonzero(np.diff(sorted_labels)) + 1
+    if len(order) == 0:
+        return sorted_labels, []
+    group_ids = sorted_labels[np.concatenate(([0], starts))]
+    return group_ids, np.split(order, starts)
@@ -0,0 +1,146 @@
+import numpy as np
+from instrumentation import profiler
+
+# Order-aware similarity: 1 - Levenshtein distance / length of the longer sequence.
+#
+# Jaccard treats [173, 252, 253, 165, 254] and [254, 252, 165, 173, 253] as
+# identical; edit distance does not. Pairs are scored in vectorized batches:
+# the DP loops over sequence positions while numpy works across all pairs of a
+# batch at once. Only cells within max_distance of the diagonal are filled
+# (banded DP), and a pair is dropped as soon as every cell of its current row
+# is already past max_distance, since the final distance can only be larger.
+# Candidate pairs are built in tiles of block_size rows by
+# batch_size // block_size later rows, so at most batch_size pairs (and their
+# index and similarity arrays) are in memory at once, whatever the number of
+# sequences.
+
+
+def sequence_edit_similarity(seq1, seq2):
+    """Normalized Levenshtein similarity of two formKey sequences"""
+    longest = max(len(seq1), len(seq2))
+    if longest == 0:
+        return 0
+    previous = list(range(len(seq2) + 1))
+    for i, a in enumerate(seq1, start=1):
+        current = [i]
+        for j, b in enumerate(seq2, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a != b)))
+        previous = current
+    return 1 - previous[-1] / longest
+
+
+def max_distance_for(length_a, length_b, similarity_threshold):
+    """Largest edit distance that still reaches the threshold"""
+    longest = np.maximum(length_a, length_b)
+    # Small epsilon so e.g. (1 - 0.8) * 5 does not round down to 0.999...
+    return np.floor((1 - similarity_threshold) * longest + 1e-9).astype(np.int64)
+
+
+def banded_edit_distances(A, B, max_distance):
+    """Edit distance of A[k] and B[k] (equal-length batches of equal-length rows).
+
+    Entries whose distance exceeds max_distance[k] come back as max_distance[k] + 1.
+    """
+    m, len_a = A.shape
+    len_b = B.shape[1]
+    max_distance = np.asarray(max_distance, dtype=np.int64)
+    limit = max_distance + 1
+    band = int(max_distance.max()) if m else 0
+    inf = len_a + len_b + 1
+    dtype = np.int16 if inf < np.iinfo(np.int16).max else np.int32
+
+    distances = limit.copy()
+    # Rows of A, B and max_distance are compacted together as pairs are abandoned
+    active = np.arange(m)
+    bound = max_distance.astype(dtype)
+    previous = np.full((m, len_b + 1), inf, dtype=dtype)
+    previous[:, :min(band, len_b) + 1] = np.arange(min(band, len_b) + 1)
+
+    for i in range(1, len_a + 1):
+        if len(active) == 0:
+            break
+        current = np.full((len(active), len_b + 1), inf, dtype=dtype)
+        if i <= band:
+            current[:, 0] = i
+        a = A[:, i - 1]
+        for j in range(max(1, i - band), min(len_b, i + band) + 1):
+            substitute = previous[:, j - 1] + (a != B[:, j - 1])
+            current[:, j] = np.minimum(np.minimum(previous[:, j], current[:, j - 1]) + 1, substitute)
+
+        # Early abandonment: the row minimum never decreases in later rows
+        alive = current.min(axis=1) <= bound
+        if not alive.all():
+            active, current, bound = active[alive], current[alive], bound[alive]
+            A, B = A[alive], B[alive]
+        previous = current
+
+    if len(active):
+        distances[active] = np.minimum(previous[:, len_b], limit[active])
+    return distances
+
+
+def _pair_similarity(padded, lengths, i, j, similarity_threshold, batch_size):
+    # Score pairs (i[k], j[k]) bucketed by their two lengths so every batch is
+    # a plain slice of the padded matrix
+    similarity = np.zeros(len(i), dtype=np.float64)
+    max_distance = max_distance_for(lengths[i], lengths[j], similarity_threshold)
+    # Length filter: the distance is at least the length difference
+    candidates = np.flatnonzero(np.abs(lengths[i] - lengths[j]) <= max_distance)
+    buckets = lengths[i[candidates]] * (lengths.max() + 1) + lengths[j[candidates]]
+    for bucket in np.unique(buckets):
+        in_bucket = candidates[buckets == bucket]
+        len_a, len_b = lengths[i[in_bucket[0]]], lengths[j[in_bucket[0]]]
+        if max(len_a, len_b) == 0:
+            continue
+        for start in range(0, len(in_bucket), batch_size):
+            batch = in_bucket[start:start + batch_size]
+            A = padded[i[batch], :len_a]
+            B = padded[j[batch], :len_b]
+            distances = banded_edit_distances(A, B, max_distance[batch])
+            similarity[batch] = 1 - distances / max(len_a, len_b)
+    return similarity
+
+
+@profiler.timed("similarity_edit")
+def edit_similar_pairs(sequences, similarity_threshold, block_size=1024, batch_size=1 << 18):
+    """(i, j, similarity) arrays of all pairs i < j with edit similarity >= threshold, sorted by (i, j)"""
+    lengths = np.array([len(seq) for seq in sequences], dtype=np.int64)
+    n = len(sequences)
+    padded = np.zeros((n, int(lengths.max()) if n else 0), dtype=np.int64)
+    for row, seq in enumerate(sequences):
+        padded[row, :len(seq)] = seq
+    block_size = max(1, min(block_size, batch_size))
+    tile_columns = max(1, batch_size // block_size)
+    found_i, found_j, found_similarity = [], [], []
+    for start in range(0, n, block_size):
+        rows = np.arange(start, min(start + block_size, n))
+        block_i, block_j, block_similarity = [], [], []
+        # Pairs (row, later row) for this block of rows, one tile of later rows at a time
+        for column_start in range(start + 1, n, tile_columns):
+            columns = np.arange(column_start, min(column_start + tile_columns, n))
+            i = np.repeat(rows, len(columns))
+            j = np.tile(columns, len(rows))
+            upper = j > i
+            i, j = i[upper], j[upper]
+            similarity = _pair_similarity(padded, lengths, i, j, similarity_threshold, batch_size)
+            keep = similarity >= similarity_threshold
+            block_i.append(i[keep])
+            block_j.append(j[keep])
+            block_similarity.append(similarity[keep])
+        if block_i:
+            i, j, similarity = np.concatenate(block_i), np.concatenate(block_j), np.concatenate(block_similarity)
+            order = np.lexsort((j, i))
+            found_i.append(i[order])
+            found_j.append(j[order])
+            found_similarity.append(similarity[order])
+    if not found_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_similarity)
+
+
+def edit_similar_process_pairs(bpmn_data, similarity_threshold, block_size=1024):
+    """[(process 1, process 2, similarity)] in the same order as the nested i/j loops"""
+    processes = list(bpmn_data.keys())
+    i, j, similarity = edit_similar_pairs(list(bpmn_data.values()), similarity_threshold, block_size)
+    return [(processes[a], processes[b], s)
+            for a, b, s in zip(i.tolist(), j.tolist(), similarity.tolist())]
@@ -0,0 +1,268 @@
+import numpy as np
+from instrumentation import profiler
+
+# Approximate Jaccard similarity grouping with MinHash + banded LSH.
+#
+# Processes that use the same set of formKeys are collapsed first, since on
+# our exports thousands of processes share a few hundred distinct sets. Only
+# distinct sets are MinHashed; sets that land in the same bucket of any band
+# become candidates, candidates are checked against the exact Jaccard
+# threshold, and the surviving set pairs are expanded back to process pairs.
+#
+# The num_perm hashes are split into bands of rows hashes each; choose_bands
+# picks the (bands, rows) that minimises the false-positive plus
+# false-negative area under the S-curve 1 - (1 - s^rows)^bands around the
+# threshold. Pass bands and/or rows to fix them, or target_recall to require
+# that a pair at exactly the threshold is caught with at least that
+# probability (at 0.6, target_recall=0.99 gives 19 bands of 3 rows).
+# Candidates are built per band by sorting the band's signature rows and
+# pairing every run of equal rows, without a Python loop over buckets.
+
+PRIME = (1 << 31) - 1
+EMPTY = -1  # padding value in set matrices; formKeys are non-negative
+
+
+def set_matrix(sequences):
+    """Each sequence as a sorted, de-duplicated row padded with EMPTY
+
+    formKey 0 is zero padding (as in process_loader), so it is dropped too.
+    """
+    if isinstance(sequences, np.ndarray) and sequences.ndim == 2:
+        values = np.array(sequences, dtype=np.int64)
+    else:
+        width = max((len(seq) for seq in sequences), default=0)
+        values = np.full((len(sequences), width), EMPTY, dtype=np.int64)
+        for row, seq in enumerate(sequences):
+            values[row, :len(seq)] = seq
+    values[values == 0] = EMPTY
+    values.sort(axis=1)
+    duplicate = np.zeros(values.shape, dtype=bool)
+    duplicate[:, 1:] = values[:, 1:] == values[:, :-1]
+    values[duplicate] = EMPTY
+    # Sort again so the padding is at the front and equal sets give equal rows
+    values.sort(axis=1)
+    return values
+
+
+def distinct_sets(sequences):
+    """(sets, set_of_process): one row per distinct formKey set and the set index of each process"""
+    values = set_matrix(sequences)
+    if len(values) == 0:
+        return values, np.empty(0, dtype=np.int64)
+    sets, set_of_process = np.unique(values, axis=0, return_inverse=True)
+    return sets, set_of_process.reshape(-1)
+
+
+def minhash_signatures(sets, num_perm=128, seed=42, block_size=8192):
+    """MinHash signature (num_perm uint32 values) for every row of a set matrix
+
+    Empty sets (and a matrix of width 0) get PRIME in every position.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, PRIME, size=num_perm, dtype=np.uint64)
+    signatures = np.empty((len(sets), num_perm), dtype=np.uint32)
+    for start in range(0, len(sets), block_size):
+        block = sets[start:start + block_size]
+        keys = block.astype(np.uint64)[:, None, :]
+        hashes = (a[None, :, None] * keys + b[None, :, None]) % np.uint64(PRIME)
+        hashes[np.broadcast_to((block == EMPTY)[:, None, :], hashes.shape)] = PRIME
+        signatures[start:start + len(block)] = hashes.min(axis=2, initial=PRIME)
+    return signatures
+
+
+def candidate_probability(similarity, bands, rows):
+    """Probability that a pair with this Jaccard similarity shares a bucket in at least one band"""
+    return 1.0 - (1.0 - np.asarray(similarity, dtype=np.float64) ** rows) ** bands
+
+
+def _area(values, step):
+    # Trapezoid rule along the last axis
+    return (values[..., 1:] + values[..., :-1]).sum(axis=-1) * step / 2
+
+
+def choose_bands(num_perm, threshold, target_recall=None, false_positive_weight=0.5,
+                 false_negative_weight=0.5, resolution=200):
+    """(bands, rows) with bands * rows <= num_perm that minimise the weighted
+    false-positive and false-negative areas of the LSH S-curve around threshold.
+
+    The false-positive area is the candidate probability integrated over
+    similarities below the threshold, the false-negative area the miss
+    probability integrated above it. With target_recall only settings that
+    catch a pair at exactly the threshold with at least that probability are
+    considered (the one closest to it if none does).
+    """
+    rows = np.concatenate([np.full(num_perm // r, r) for r in range(1, num_perm + 1)])
+    bands = np.concatenate([np.arange(1, num_perm // r + 1) for r in range(1, num_perm + 1)])
+    below = np.linspace(0.0, threshold, resolution + 1)
+    above = np.linspace(threshold, 1.0, resolution + 1)
+    false_positive = _area(candidate_probability(below[None, :], bands[:, None], rows[:, None]),
+                           threshold / resolution)
+    false_negative = _area(1.0 - candidate_probability(above[None, :], bands[:, None], rows[:, None]),
+                           (1.0 - threshold) / resolution)
+    error = false_positive_weight * false_positive + false_negative_weight * false_negative
+    if target_recall is not None:
+        at_threshold = candidate_probability(threshold, bands, rows)
+        if (at_threshold >= target_recall).any():
+            error = np.where(at_threshold >= target_recall, error, np.inf)
+        else:
+            error = -at_threshold
+    best = int(np.argmin(error))
+    return int(bands[best]), int(rows[best])
+
+
+def lsh_parameters(num_perm, threshold, bands=None, rows=None, target_recall=None):
+    """(bands, rows) from the ones given, or from choose_bands when neither is"""
+    if bands is None and rows is None:
+        return choose_bands(num_perm, threshold, target_recall)
+    if rows is None:
+        rows = num_perm // bands
+    elif bands is None:
+        bands = num_perm // rows
+    if bands < 1 or rows < 1 or bands * rows > num_perm:
+        raise ValueError(f"{bands} bands of {rows} rows do not fit in {num_perm} hashes")
+    return bands, rows
+
+
+def _equal_row_pairs(keys):
+    """(i, j) index arrays, i < j, of every pair of identical rows of keys"""
+    order = np.lexsort(keys.T[::-1])
+    ordered = keys[order]
+    starts = np.flatnonzero(np.r_[True, (ordered[1:] != ordered[:-1]).any(axis=1)])
+    sizes = np.diff(np.r_[starts, len(order)])
+    # Each sorted position pairs with the positions after it in its bucket
+    partners = np.repeat(starts + sizes, sizes) - np.arange(len(order)) - 1
+    total = int(partners.sum())
+    left = np.repeat(np.arange(len(order)), partners)
+    right = left + 1 + np.arange(total) - np.repeat(np.cumsum(partners) - partners, partners)
+    i, j = order[left], order[right]
+    return np.minimum(i, j), np.maximum(i, j)
+
+
+def lsh_candidate_pairs(signatures, bands, rows=None):
+    """Unique (i, j) index arrays, i < j, of rows sharing a bucket in at least one band"""
+    n, num_perm = signatures.shape
+    if rows is None:
+        rows = num_perm // bands
+    codes = []
+    for band in range(bands):
+        i, j = _equal_row_pairs(signatures[:, band * rows:(band + 1) * rows])
+        codes.append(i.astype(np.int64) * n + j)
+    codes = np.unique(np.concatenate(codes)) if codes else np.empty(0, dtype=np.int64)
+    return codes // n, codes % n
+
+
+def set_pair_similarity(sets, i, j, block_size=1 << 20):
+    """Exact Jaccard similarity of set rows i[k] and j[k] for every k"""
+    sizes = (sets != EMPTY).sum(axis=1)
+    similarity = np.zeros(len(i), dtype=np.float64)
+    width = max(sets.shape[1], 1)
+    step = max(1, block_size // (width * width))
+    for start in range(0, len(i), step):
+        left, right = sets[i[start:start + step]], sets[j[start:start + step]]
+        matches = (left[:, :, None] == right[:, None, :]) & (left != EMPTY)[:, :, None]
+        intersection = matches.sum(axis=(1, 2))
+        union = sizes[i[start:start + step]] + sizes[j[start:start + step]] - intersection
+        similarity[start:start + step] = np.divide(
+            intersection, union, out=np.zeros(len(union)), where=union > 0
+        )
+    return similarity
+
+
+def expand_set_pairs(set_of_process, set_i, set_j, set_similarity, sizes):
+    """Turn similar distinct-set pairs into process pairs (i < j), sorted by (i, j)"""
+    order = np.argsort(set_of_process, kind="stable")
+    starts = np.flatnonzero(np.diff(set_of_process[order])) + 1
+    members = np.split(order, starts) if len(order) else []
+
+    first, second, similarity = [], [], []
+    for s, t, sim in zip(set_i.tolist(), set_j.tolist(), set_similarity.tolist()):
+        left, right = np.meshgrid(members[s], members[t], indexing="ij")
+        first.append(left.ravel())
+        second.append(right.ravel())
+        similarity.append(np.full(left.size, sim))
+    # Processes with the same non-empty set are always identical (similarity 1)
+    for s, group in enumerate(members):
+        if len(group) > 1 and sizes[s] > 0:
+            a, b = np.triu_indices(len(group), k=1)
+            first.append(group[a])
+            second.append(group[b])
+            similarity.append(np.ones(len(a)))
+
+    if not first:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    first, second = np.concatenate(first), np.concatenate(second)
+    similarity = np.concatenate(similarity)
+    i, j = np.minimum(first, second), np.maximum(first, second)
+    order = np.lexsort((j, i))
+    return i[order], j[order], similarity[order]
+
+
+@profiler.timed("similarity_lsh")
+def approximate_similar_pairs(sequences, similarity_threshold, num_perm=128, bands=None, rows=None,
+                              target_recall=None, seed=42):
+    """(i, j, similarity) arrays of process pairs with Jaccard >= threshold, found via MinHash LSH.
+
+    Every returned pair is exact (candidates are verified); pairs LSH never
+    proposes are missed, with a miss rate controlled by num_perm, bands and
+    rows (see choose_bands, and target_recall to bound the miss rate at the
+    threshold).
+    """
+    sets, set_of_process = distinct_sets(sequences)
+    bands, rows = lsh_parameters(num_perm, similarity_threshold, bands, rows, target_recall)
+    signatures = minhash_signatures(sets, num_perm=num_perm, seed=seed)
+    set_i, set_j = lsh_candidate_pairs(signatures, bands, rows)
+    similarity = set_pair_similarity(sets, set_i, set_j)
+    keep = similarity >= similarity_threshold
+    sizes = (sets != EMPTY).sum(axis=1)
+    return expand_set_pairs(set_of_process, set_i[keep], set_j[keep], similarity[keep], sizes)
+
+
+def exact_set_pairs(sets, similarity_threshold):
+    """All distinct-set pairs with Jaccard >= threshold, checked exhaustively"""
+    set_i, set_j = np.triu_indices(len(sets), k=1)
+    similarity = set_pair_similarity(sets, set_i, set_j)
+    keep = similarity >= similarity_threshold
+    return set_i[keep], set_j[keep], similarity[keep]
+
+
+def lsh_recall(sequences, similarity_threshold, num_perm=128, bands=None, rows=None,
+               target_recall=None, seed=42):
+    """Fraction of exact similar process pairs that LSH also finds"""
+    sets, set_of_process = distinct_sets(sequences)
+    bands, rows = lsh_parameters(num_perm, similarity_threshold, bands, rows, target_recall)
+    counts = np.bincount(set_of_process, minlength=len(sets))
+
+    exact_i, exact_j, _ = exact_set_pairs(sets, similarity_threshold)
+    signatures = minhash_signatures(sets, num_perm=num_perm, seed=seed)
+    cand_i, cand_j = lsh_candidate_pairs(signatures, bands, rows)
+    found = set(zip(cand_i.tolist(), cand_j.tolist()))
+    hit = np.array([(s, t) in found for s, t in zip(exact_i.tolist(), exact_j.tolist())], dtype=bool)
+
+    # Weight set pairs by how many process pairs they stand for; pairs inside
+    # one set are exact in both paths
+    weight = counts[exact_i] * counts[exact_j]
+    sizes = (sets != EMPTY).sum(axis=1)
+    same_set = (counts * (counts - 1) // 2)[sizes > 0].sum()
+    total = weight.sum() + same_set
+    return float((weight[hit].sum() + same_set) / total) if total else 1.0
+
+
+if __name__ == "__main__":
+    import time
+    from process_loader import load_processes
+
+    # Recall of the LSH path against the exact path on the shipped CSVs, with
+    # the S-curve optimum and with a 99% recall floor at the threshold
+    similarity_threshold = 0.6
+    for csv_file_path in ["Generated_1000_Processes.csv", "Generated_2000_Processes.csv",
+                          "Generated_5000_Processes.csv", "Generated_Similar_Processes.csv"]:
+        _, X = load_processes(csv_file_path)
+        for target_recall in (None, 0.99):
+            bands, rows = lsh_parameters(128, similarity_threshold, target_recall=target_recall)
+            start = time.perf_counter()
+            pair_i, _, _ = approximate_similar_pairs(X, similarity_threshold, target_recall=target_recall)
+            elapsed = time.perf_counter() - start
+            recall = lsh_recall(X, similarity_threshold, target_recall=target_recall)
+            print(f"{csv_file_path} ({bands} bands x {rows} rows): {len(pair_i)} similar pairs "
+                  f"in {elapsed:.3f} seconds, recall {recall * 100:.2f}%")
@@ -0,0 +1,146 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from scipy import sparse
+from instrumentation import profiler
+
+# Exact all-pairs Jaccard similarity on a sparse process x formKey incidence matrix.
+#
+# Intersections come from sparse products of a block of rows with a block of
+# the rows after it (block_size x block_size tiles), unions from the row
+# sums, so at most one tile of candidate pairs is in memory at a time however
+# dense the vocabulary is. Pairs that share no formKey never appear in the
+# product, which is why the threshold has to be above 0.
+
+
+def incidence_matrix(sequences):
+    """(matrix, vocabulary): binary CSR matrix with one row per sequence and one column per formKey
+
+    formKey 0 is zero padding (as in process_loader) and gets no column.
+    """
+    lengths = np.fromiter((len(seq) for seq in sequences), dtype=np.int64, count=len(sequences))
+    form_keys = np.fromiter((key for seq in sequences for key in seq), dtype=np.int64,
+                            count=int(lengths.sum()))
+    rows = np.repeat(np.arange(len(sequences)), lengths)
+    keep = form_keys != 0
+    form_keys, rows = form_keys[keep], rows[keep]
+    vocabulary, columns = np.unique(form_keys, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(columns), dtype=np.int32), (rows, columns.reshape(-1))),
+        shape=(len(sequences), len(vocabulary)),
+    )
+    # Repeated formKeys in one sequence count once, as in a set
+    matrix.data[:] = 1
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix, vocabulary
+
+
+def _tile_pairs(left, right, left_sizes, right_sizes, similarity_threshold):
+    # (i, j, similarity) of the pairs of one left x right tile, indices local to the tile
+    intersections = (left @ right.T).tocoo()
+    i = intersections.row.astype(np.int64)
+    j = intersections.col.astype(np.int64)
+    similarity = intersections.data / (left_sizes[i] + right_sizes[j] - intersections.data)
+    keep = similarity >= similarity_threshold
+    return i[keep], j[keep], similarity[keep]
+
+
+def _block_pairs(matrix, sizes, start, stop, similarity_threshold):
+    # Rows start..stop against every row from start on, one tile of columns at
+    # a time; keep j > i only
+    width = stop - start
+    found_i, found_j, found_similarity = [], [], []
+    for col_start in range(start, matrix.shape[0], width):
+        i, j, similarity = _tile_pairs(matrix[start:stop], matrix[col_start:col_start + width],
+                                       sizes[start:stop], sizes[col_start:col_start + width],
+                                       similarity_threshold)
+        i, j = i + start, j + col_start
+        if col_start == start:
+            upper = j > i
+            i, j, similarity = i[upper], j[upper], similarity[upper]
+        found_i.append(i)
+        found_j.append(j)
+        found_similarity.append(similarity)
+    if not found_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    i, j, similarity = np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_similarity)
+    order = np.lexsort((j, i))
+    return i[order], j[order], similarity[order]
+
+
+def iter_similar_pair_blocks(sequences, similarity_threshold, block_size=1024, n_jobs=1):
+    """Yield (i, j, similarity) arrays block by block, in row order.
+
+    At most n_jobs blocks are computed at once (sparse products release the
+    GIL, so threads run them in parallel).
+    """
+    if similarity_threshold <= 0:
+        raise ValueError("similarity_threshold must be greater than 0")
+    matrix, _ = incidence_matrix(sequences)
+    sizes = np.asarray(matrix.sum(axis=1)).ravel().astype(np.float64)
+    starts = range(0, matrix.shape[0], block_size)
+
+    if n_jobs <= 1:
+        for start in starts:
+            yield _block_pairs(matrix, sizes, start, start + block_size, similarity_threshold)
+        return
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+        pending = []
+        for start in starts:
+            pending.append(pool.submit(_block_pairs, matrix, sizes, start,
+                                       start + block_size, similarity_threshold))
+            if len(pending) >= n_jobs:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+@profiler.timed("similarity")
+def similar_pairs_blocked(sequences, similarity_threshold, block_size=1024, n_jobs=1):
+    """(i, j, similarity) arrays of all pairs i < j with Jaccard >= threshold, sorted by (i, j)"""
+    blocks = list(iter_similar_pair_blocks(sequences, similarity_threshold, block_size, n_jobs))
+    if not blocks:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    return tuple(np.concatenate(parts) for parts in zip(*blocks))
+
+
+def similar_process_pairs(bpmn_data, similarity_threshold, block_size=1024, n_jobs=1):
+    """[(process 1, process 2, similarity)] in the same order as the nested i/j loops"""
+    processes = list(bpmn_data.keys())
+    i, j, similarity = similar_pairs_blocked(list(bpmn_data.values()), similarity_threshold,
+                                             block_size, n_jobs)
+    return [(processes[a], processes[b], s)
+            for a, b, s in zip(i.tolist(), j.tolist(), similarity.tolist())]
+
+
+def cross_similar_pairs(left, right, similarity_threshold, block_size=1024):
+    """(i, j, similarity) arrays of pairs left[i], right[j] with Jaccard >= threshold, sorted by (i, j)"""
+    if similarity_threshold <= 0:
+        raise ValueError("similarity_threshold must be greater than 0")
+    matrix, _ = incidence_matrix(list(left) + list(right))
+    sizes = np.asarray(matrix.sum(axis=1)).ravel().astype(np.float64)
+    left_matrix, right_matrix = matrix[:len(left)], matrix[len(left):]
+    left_sizes, right_sizes = sizes[:len(left)], sizes[len(left):]
+
+    found_i, found_j, found_similarity = [], [], []
+    for start in range(0, len(left), block_size):
+        block_i, block_j, block_similarity = [], [], []
+        for col_start in range(0, len(right), block_size):
+            i, j, similarity = _tile_pairs(left_matrix[start:start + block_size],
+                                           right_matrix[col_start:col_start + block_size],
+                                           left_sizes[start:start + block_size],
+                                           right_sizes[col_start:col_start + block_size], similarity_threshold)
+            block_i.append(i + start)
+            block_j.append(j + col_start)
+            block_similarity.append(similarity)
+        if not block_i:
+            continue
+        i, j, similarity = np.concatenate(block_i), np.concatenate(block_j), np.concatenate(block_similarity)
+        order = np.lexsort((j, i))
+        found_i.append(i[order])
+        found_j.append(j[order])
+        found_similarity.append(similarity[order])
+    if not found_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_similarity)
@@ -0,0 +1,145 @@
+import heapq
+
+# Contiguous common-subsequence mining with a generalized suffix automaton.
+#
+# Every distinct contiguous subsequence of every process belongs to exactly one
+# automaton state, and all subsequences of a state occur in the same set of
+# processes. Support is therefore counted once per state instead of once per
+# (process, start, length) slice, and the automaton itself has at most twice
+# as many states as there are formKeys in total.
+
+
+class SubsequenceMiner:
+    def __init__(self, sequences):
+        """Build the automaton for a {process name: formKey list} dict"""
+        self.names = list(sequences.keys())
+        self.sequences = [list(seq) for seq in sequences.values()]
+
+        # State 0 is the root (the empty subsequence)
+        self._length = [0]
+        self._link = [-1]
+        self._next = [{}]
+        # One occurrence (sequence index, end position) per state, used to
+        # spell out the subsequences the state stands for
+        self._end = [(-1, -1)]
+
+        for seq_id, seq in enumerate(self.sequences):
+            last = 0
+            for position, form_key in enumerate(seq):
+                last = self._extend(last, form_key, seq_id, position)
+
+    def __len__(self):
+        return len(self._length)
+
+    def _new_state(self, length, link, transitions, end):
+        self._length.append(length)
+        self._link.append(link)
+        self._next.append(transitions)
+        self._end.append(end)
+        return len(self._length) - 1
+
+    def _clone(self, p, q, form_key):
+        clone = self._new_state(self._length[p] + 1, self._link[q],
+                                dict(self._next[q]), self._end[q])
+        while p != -1 and self._next[p].get(form_key) == q:
+            self._next[p][form_key] = clone
+            p = self._link[p]
+        self._link[q] = clone
+        return clone
+
+    def _extend(self, last, form_key, seq_id, position):
+        q = self._next[last].get(form_key)
+        if q is not None:
+            # The extended prefix already occurs in an earlier process
+            if self._length[q] == self._length[last] + 1:
+                return q
+            return self._clone(last, q, form_key)
+
+        cur = self._new_state(self._length[last] + 1, 0, {}, (seq_id, position))
+        p = last
+        while p != -1 and form_key not in self._next[p]:
+            self._next[p][form_key] = cur
+            p = self._link[p]
+        if p != -1:
+            q = self._next[p][form_key]
+            if self._length[p] + 1 == self._length[q]:
+                self._link[cur] = q
+            else:
+                self._link[cur] = self._clone(p, q, form_key)
+        return cur
+
+    def _supports(self, min_support=2, collect_members=False):
+        """Number of distinct processes containing each state's subsequences.
+
+        With collect_members, also return the process indices for the states
+        that reach min_support (a second pass, so only those lists are built).
+        """
+        support = [0] * len(self._length)
+        self._walk_prefixes(lambda state, seq_id: support.__setitem__(state, support[state] + 1))
+        if not collect_members:
+            return support, None
+
+        members = {}
+
+        def add_member(state, seq_id):
+            if support[state] >= min_support:
+                members.setdefault(state, []).append(seq_id)
+
+        self._walk_prefixes(add_member)
+        return support, members
+
+    def _walk_prefixes(self, visit):
+        # For every process, visit each state whose subsequences it contains,
+        # once, by following suffix links from every prefix until a state
+        # already visited for this process is reached
+        last_seen = [-1] * len(self._length)
+        for seq_id, seq in enumerate(self.sequences):
+            state = 0
+            for form_key in seq:
+                state = self._next[state][form_key]
+                s = state
+                while s > 0 and last_seen[s] != seq_id:
+                    last_seen[s] = seq_id
+                    visit(s, seq_id)
+                    s = self._link[s]
+
+    def _subsequence(self, state, length):
+        seq_id, end = self._end[state]
+        return tuple(self.sequences[seq_id][end - length + 1:end + 1])
+
+    def _candidates(self, support, min_length, max_length, min_support):
+        # (support, state, length) for every subsequence within the length bounds
+        for state in range(1, len(self._length)):
+            if support[state] < min_support:
+                continue
+            low = max(self._length[self._link[state]] + 1, min_length)
+            high = self._length[state] if max_length is None else min(self._length[state], max_length)
+            for length in range(low, high + 1):
+                yield support[state], state, length
+
+    def common_subsequences(self, min_length=3, max_length=None, min_support=2):
+        """{subsequence: [process names]} for subsequences found in at least min_support processes"""
+        support, members = self._supports(min_support, collect_members=True)
+        return {
+            self._subsequence(state, length): [self.names[i] for i in members[state]]
+            for _, state, length in self._candidates(support, min_length, max_length, min_support)
+        }
+
+    def top_k(self, k, min_length=3, max_length=None, min_support=2):
+        """The k subsequences with the highest support, as (subsequence, [process names]) pairs"""
+        support, _ = self._supports(min_support)
+        best = heapq.nlargest(
+            k, self._candidates(support, min_length, max_length, min_support),
+            key=lambda candidate: candidate[0],
+        )
+        members = {state: [] for _, state, _ in best}
+
+        def add_member(state, seq_id):
+            if state in members:
+                members[state].append(seq_id)
+
+        self._walk_prefixes(add_member)
+        return [
+            (self._subsequence(state, length), [self.names[i] for i in members[state]])
+            for _, state, length in best
+        ]
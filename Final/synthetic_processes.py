@@ -0,0 +1,161 @@
+import argparse
+import numpy as np
+from numpy.lib.format import open_memmap
+
+# Synthetic process logs with a known group structure.
+#
+#   python synthetic_processes.py Generated_1000000_Processes.csv --processes 1000000 --groups 5000
+#   python synthetic_processes.py synthetic.npy --processes 10000000 --noise-rate 0.05
+#
+# Each latent group has a template formKey sequence; every process copies the
+# template of a group drawn with Zipf-like weights (skew 0 = equal sizes) and
+# is then noised with some probability by swapping two adjacent steps or
+# substituting one formKey. Rows are generated in fixed blocks, each with its
+# own RNG seeded from (seed, block number), so the output only depends on the
+# seed and never has to be held in memory at once. With a small vocabulary
+# two templates can coincide, so the distinct sequences may be slightly fewer
+# than num_groups.
+
+# The formKeys used in the shipped CSVs; larger vocabularies continue from 257
+FORM_KEYS = [165, 173, 252, 253, 254, 255, 256]
+BLOCK_SIZE = 65_536
+
+
+def form_vocabulary(vocab_size):
+    """vocab_size formKeys, starting with the ones in the shipped CSVs"""
+    if vocab_size <= len(FORM_KEYS):
+        return np.array(FORM_KEYS[:vocab_size], dtype=np.int32)
+    extra = np.arange(257, 257 + vocab_size - len(FORM_KEYS), dtype=np.int32)
+    return np.concatenate([np.array(FORM_KEYS, dtype=np.int32), extra])
+
+
+class ProcessGenerator:
+    """Deterministic generator of (group, formKey sequence) rows.
+
+    num_groups latent groups with template lengths drawn uniformly from
+    [min_length, max_length]; noise_rate is the fraction of processes that get
+    one edit, of which swap_fraction are adjacent swaps and the rest
+    substitutions.
+    """
+
+    def __init__(self, num_groups=1000, min_length=5, max_length=5, vocab_size=7,
+                 noise_rate=0.0, swap_fraction=0.5, group_skew=0.0, seed=42):
+        if num_groups < 1:
+            raise ValueError("num_groups must be at least 1")
+        if not 1 <= min_length <= max_length:
+            raise ValueError("need 1 <= min_length <= max_length")
+        if vocab_size < 2:
+            raise ValueError("vocab_size must be at least 2")
+        self.vocabulary = form_vocabulary(vocab_size)
+        self.max_length = max_length
+        self.noise_rate = noise_rate
+        self.swap_fraction = swap_fraction
+        self.seed = seed
+
+        rng = np.random.default_rng([seed, 0])
+        self.template_lengths = rng.integers(min_length, max_length + 1, size=num_groups)
+        # Templates are kept as vocabulary codes; padding past a template's length is unused
+        self.templates = rng.integers(0, vocab_size, size=(num_groups, max_length), dtype=np.int32)
+        weights = 1.0 / np.arange(1, num_groups + 1) ** group_skew
+        self.group_probabilities = weights / weights.sum()
+
+    def block(self, block_number, size):
+        """(groups, forms, lengths) for one block; forms is padded with 0 past each length"""
+        rng = np.random.default_rng([self.seed, 1, block_number])
+        groups = rng.choice(len(self.templates), size=size, p=self.group_probabilities)
+        codes = self.templates[groups]
+        lengths = self.template_lengths[groups]
+
+        noisy = np.flatnonzero(rng.random(size) < self.noise_rate)
+        if len(noisy):
+            swap = (rng.random(len(noisy)) < self.swap_fraction) & (lengths[noisy] >= 2)
+            # Adjacent swap of positions p and p + 1
+            rows = noisy[swap]
+            positions = (rng.random(len(rows)) * (lengths[rows] - 1)).astype(np.int64)
+            first = codes[rows, positions]
+            codes[rows, positions] = codes[rows, positions + 1]
+            codes[rows, positions + 1] = first
+            # Substitution with a different formKey
+            rows = noisy[~swap]
+            positions = (rng.random(len(rows)) * lengths[rows]).astype(np.int64)
+            shift = rng.integers(1, len(self.vocabulary), size=len(rows))
+            codes[rows, positions] = (codes[rows, positions] + shift) % len(self.vocabulary)
+
+        forms = self.vocabulary[codes]
+        forms[np.arange(self.max_length) >= lengths[:, None]] = 0
+        return groups, forms, lengths
+
+    def iter_blocks(self, num_processes):
+        """Yield (start, groups, forms, lengths) for consecutive blocks of BLOCK_SIZE rows"""
+        for block_number, start in enumerate(range(0, num_processes, BLOCK_SIZE)):
+            size = min(BLOCK_SIZE, num_processes - start)
+            yield (start, *self.block(block_number, size))
+
+
+def write_csv(path, num_processes, generator, groups_path=None):
+    """Write a process CSV in the Generated_*_Processes.csv layout.
+
+    Every row has max_length formKey columns, zero-padded past the process's
+    length like process_loader.write_processes. groups_path, if given, gets
+    the latent group of every process as an .npy file.
+    """
+    groups_out = None
+    if groups_path is not None:
+        groups_out = open_memmap(groups_path, mode="w+", dtype=np.int32, shape=(num_processes,))
+    with open(path, "w", newline="") as f:
+        f.write("Process Name," + ",".join(f"Form {k + 1}" for k in range(generator.max_length)) + "\n")
+        for start, groups, forms, _ in generator.iter_blocks(num_processes):
+            lines = [f"Process {start + k + 1}," + ",".join(map(str, row))
+                     for k, row in enumerate(forms.tolist())]
+            f.write("\n".join(lines) + "\n")
+            if groups_out is not None:
+                groups_out[start:start + len(groups)] = groups
+    if groups_out is not None:
+        groups_out.flush()
+
+
+def write_npy(path, num_processes, generator, groups_path=None):
+    """Write the formKey matrix (0-padded) straight to a memory-mapped .npy file"""
+    forms_out = open_memmap(path, mode="w+", dtype=np.int32,
+                            shape=(num_processes, generator.max_length))
+    groups_out = None
+    if groups_path is not None:
+        groups_out = open_memmap(groups_path, mode="w+", dtype=np.int32, shape=(num_processes,))
+    for start, groups, forms, _ in generator.iter_blocks(num_processes):
+        forms_out[start:start + len(forms)] = forms
+        if groups_out is not None:
+            groups_out[start:start + len(groups)] = groups
+    forms_out.flush()
+    if groups_out is not None:
+        groups_out.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic process log")
+    parser.add_argument("output", help="output file; .npy writes the formKey matrix, anything else a CSV")
+    parser.add_argument("--processes", type=int, default=1000)
+    parser.add_argument("--groups", type=int, default=None,
+                        help="number of latent groups (default: processes / 4)")
+    parser.add_argument("--min-length", type=int, default=5)
+    parser.add_argument("--max-length", type=int, default=5)
+    parser.add_argument("--vocab-size", type=int, default=len(FORM_KEYS))
+    parser.add_argument("--noise-rate", type=float, default=0.0)
+    parser.add_argument("--swap-fraction", type=float, default=0.5)
+    parser.add_argument("--skew", type=float, default=0.0, help="Zipf exponent of the group sizes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--groups-output", default=None, help="also write the latent group of every process (.npy)")
+    args = parser.parse_args(argv)
+
+    generator = ProcessGenerator(
+        num_groups=args.groups or max(1, args.processes // 4),
+        min_length=args.min_length, max_length=args.max_length, vocab_size=args.vocab_size,
+        noise_rate=args.noise_rate, swap_fraction=args.swap_fraction,
+        group_skew=args.skew, seed=args.seed,
+    )
+    write = write_npy if args.output.endswith(".npy") else write_csv
+    write(args.output, args.processes, generator, args.groups_output)
+    print(f"Wrote {args.processes} processes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
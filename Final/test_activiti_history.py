@@ -0,0 +1,66 @@
+import csv
+import sqlite3
+import numpy as np
+import pytest
+from activiti_history import create_pool, create_standin, ingest_history
+
+# python -m pytest Final/test_activiti_history.py
+
+NUM_INSTANCES = 300
+BATCH_SIZES = [1, 7, 64, 50_000]
+
+
+@pytest.fixture(scope="module")
+def standin(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("activiti") / "history.db")
+    create_standin(path, NUM_INSTANCES)
+    return path
+
+
+def ingest(standin, tmp_path, batch_size, max_length=None):
+    events = str(tmp_path / f"events_{batch_size}_{max_length}.csv")
+    pool = create_pool(standin)
+    try:
+        names, forms = ingest_history(pool, events_output=events, batch_size=batch_size, max_length=max_length)
+    finally:
+        pool.close()
+    with open(events, newline="") as f:
+        return names, forms, list(csv.reader(f))
+
+
+def expected_sequences(standin):
+    # Completed tasks ordered by instance, then completion time, built without the batching code
+    connection = sqlite3.connect(standin)
+    try:
+        rows = connection.execute("SELECT PROC_INST_ID_, FORM_KEY_, END_TIME_, ID_ FROM ACT_HI_TASKINST").fetchall()
+    finally:
+        connection.close()
+    sequences = {}
+    for instance, form_key, _, _ in sorted(rows, key=lambda row: (row[0], row[2], row[3])):
+        sequences.setdefault(instance, []).append(int(form_key))
+    return sequences
+
+
+@pytest.mark.parametrize("max_length", [None, 4])
+def test_batch_size_does_not_change_the_output(standin, tmp_path, max_length):
+    names, forms, events = ingest(standin, tmp_path, BATCH_SIZES[-1], max_length)
+    for batch_size in BATCH_SIZES[:-1]:
+        other_names, other_forms, other_events = ingest(standin, tmp_path, batch_size, max_length)
+        np.testing.assert_array_equal(other_names, names)
+        np.testing.assert_array_equal(other_forms, forms)
+        assert other_events == events
+
+
+def test_rows_follow_instance_then_completion_time(standin, tmp_path):
+    names, forms, events = ingest(standin, tmp_path, 7)
+    expected = expected_sequences(standin)
+    assert names.tolist() == sorted(expected)
+    assert forms.shape == (NUM_INSTANCES, max(len(seq) for seq in expected.values()))
+    for name, row in zip(names.tolist(), forms.tolist()):
+        sequence = expected[name]
+        assert row == sequence + [0] * (forms.shape[1] - len(sequence))
+
+    assert events[0] == ["instance_id", "formKey", "timestamp"]
+    order = [(instance, float(timestamp)) for instance, _, timestamp in events[1:]]
+    assert order == sorted(order)
+    assert [int(form_key) for _, form_key, _ in events[1:]] == [k for name in sorted(expected) for k in expected[name]]
@@ -0,0 +1,99 @@
+import os
+from bpmn_parser import CACHE_NAME, generate_fixtures, ingest_directory, parse_bpmn, write_bpmn
+
+# python -m pytest Final/test_bpmn_parser.py
+
+# Tasks are listed out of flow order, and task6 cannot be reached from the start event
+BRANCHING_PROCESS = """<?xml version="1.0" encoding="UTF-8"?>
+<definitions xmlns="http://www.omg.org/spec/BPMN/20100524/MODEL"
+             xmlns:flowable="http://flowable.org/bpmn" targetNamespace="http://example.com">
+  <process id="branching" isExecutable="true">
+    <userTask id="task4" flowable:formKey="254"/>
+    <userTask id="task6" flowable:formKey="256"/>
+    <userTask id="task3" flowable:formKey="253"/>
+    <endEvent id="end"/>
+    <userTask id="task2" flowable:formKey=" 252 "/>
+    <exclusiveGateway id="choice"/>
+    <userTask id="task1" flowable:formKey="173"/>
+    <userTask id="task5" name="no form"/>
+    <startEvent id="start"/>
+    <sequenceFlow id="f1" sourceRef="start" targetRef="task1"/>
+    <sequenceFlow id="f2" sourceRef="task1" targetRef="choice"/>
+    <sequenceFlow id="f3" sourceRef="choice" targetRef="task3"/>
+    <sequenceFlow id="f4" sourceRef="choice" targetRef="task2"/>
+    <sequenceFlow id="f5" sourceRef="task2" targetRef="task4"/>
+    <sequenceFlow id="f6" sourceRef="task3" targetRef="task4"/>
+    <sequenceFlow id="f7" sourceRef="task4" targetRef="task5"/>
+    <sequenceFlow id="f8" sourceRef="task5" targetRef="end"/>
+  </process>
+</definitions>
+"""
+
+
+def write_text(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_tasks_follow_the_flow_breadth_first(tmp_path):
+    path = str(tmp_path / "Branching.bpmn20.xml")
+    write_text(path, BRANCHING_PROCESS)
+    # Both gateway branches before the task they join at; the unreachable task last
+    assert parse_bpmn(path) == [173, 253, 252, 254, 256]
+
+
+def test_second_run_is_served_from_the_cache(tmp_path):
+    write_bpmn(str(tmp_path / "Process 1-163.bpmn20.xml"), "p1", [165, 173, 252])
+    write_bpmn(str(tmp_path / "Process 2-257.bpmn20.xml"), "p2", [165, 254])
+    first, stats = ingest_directory(str(tmp_path), n_jobs=1)
+    assert first == {"Process 1-163.bpmn20.xml": [165, 173, 252], "Process 2-257.bpmn20.xml": [165, 254]}
+    assert (stats["parsed"], stats["cached"], stats["rehashed"]) == (2, 0, 0)
+    assert os.path.exists(tmp_path / CACHE_NAME)
+
+    second, stats = ingest_directory(str(tmp_path), n_jobs=1)
+    assert second == first
+    assert (stats["parsed"], stats["cached"], stats["rehashed"]) == (0, 2, 0)
+
+
+def test_touched_file_is_rehashed_not_parsed(tmp_path):
+    path = str(tmp_path / "Process 1-163.bpmn20.xml")
+    write_bpmn(path, "p1", [165, 173, 252])
+    write_bpmn(str(tmp_path / "Process 2-257.bpmn20.xml"), "p2", [165, 254])
+    first, _ = ingest_directory(str(tmp_path), n_jobs=1)
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    second, stats = ingest_directory(str(tmp_path), n_jobs=1)
+    assert second == first
+    assert (stats["parsed"], stats["cached"], stats["rehashed"]) == (0, 1, 1)
+
+    # New content under the same name is parsed again
+    write_bpmn(path, "p1", [165, 255])
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    third, stats = ingest_directory(str(tmp_path), n_jobs=1)
+    assert third["Process 1-163.bpmn20.xml"] == [165, 255]
+    assert (stats["parsed"], stats["cached"], stats["rehashed"]) == (1, 1, 0)
+
+
+def test_bad_files_are_skipped_and_reported(tmp_path):
+    write_bpmn(str(tmp_path / "Process 1-163.bpmn20.xml"), "p1", [165, 173])
+    write_text(str(tmp_path / "Process 2-257.bpmn20.xml"), "<definitions><process id='p2'><userTask")
+    write_bpmn(str(tmp_path / "Process 3-258.bpmn20.xml"), "p3", [165, "review-form"])
+
+    for _ in range(2):
+        # Skipped files are not cached, so the second run reports them again
+        sequences, stats = ingest_directory(str(tmp_path), n_jobs=1)
+        assert sequences == {"Process 1-163.bpmn20.xml": [165, 173]}
+        assert stats["failed"] == 2
+        errors = dict(stats["errors"])
+        assert errors["Process 2-257.bpmn20.xml"].startswith("ParseError")
+        assert errors["Process 3-258.bpmn20.xml"].startswith("BpmnFormKeyError")
+        assert "review-form" in errors["Process 3-258.bpmn20.xml"]
+
+
+def test_process_pool_matches_a_single_process(tmp_path):
+    generate_fixtures(str(tmp_path), 40)
+    serial, _ = ingest_directory(str(tmp_path), n_jobs=1, use_cache=False)
+    pooled, stats = ingest_directory(str(tmp_path), n_jobs=2, use_cache=False)
+    assert len(serial) == stats["files"] == 40
+    assert list(pooled.items()) == list(serial.items())
@@ -0,0 +1,122 @@
+import asyncio
+import http.client
+import json
+import threading
+import numpy as np
+import pytest
+from classify_client import fetch_metrics, send_requests
+from classify_service import ClassificationService, MicroBatcher
+from group_index import HashGroupPredictor
+
+# python -m pytest Final/test_classify_service.py
+
+SEQUENCES = np.array([[165, 173, 252, 253, 254],
+                      [165, 173, 254, 255, 256],
+                      [173, 252, 253, 256, 165]], dtype=np.int32)
+
+
+def make_artifact():
+    model = HashGroupPredictor(nearest_fallback=True).fit(SEQUENCES, np.array([1, 2, 3]))
+    return {"model": model, "unique_keys": SEQUENCES}
+
+
+class CountingModel:
+    def __init__(self, model):
+        self.model = model
+        self.batch_sizes = []
+
+    def predict(self, X):
+        self.batch_sizes.append(len(X))
+        return self.model.predict(X)
+
+
+def test_concurrent_requests_share_one_batch():
+    model = CountingModel(make_artifact()["model"])
+
+    async def run():
+        batcher = MicroBatcher(model, max_batch_size=len(SEQUENCES) * 4, max_wait=1.0)
+        batcher.start()
+        try:
+            rows = [SEQUENCES[[k % len(SEQUENCES)]] for k in range(len(SEQUENCES) * 4)]
+            return await asyncio.gather(*(batcher.predict(X) for X in rows))
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(run())
+    assert [int(groups[0]) for groups in results] == [1, 2, 3] * 4
+    # The batch is full before max_wait runs out, so predict() ran once
+    assert model.batch_sizes == [len(SEQUENCES) * 4]
+
+
+@pytest.fixture
+def service_port():
+    service = ClassificationService(make_artifact(), max_batch_size=64, max_wait=0.01)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+
+    async def start():
+        service.batcher.start()
+        state["server"] = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        state["port"] = state["server"].sockets[0].getsockname()[1]
+
+    def run():
+        loop.run_until_complete(start())
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait(5)
+    yield state["port"]
+
+    async def stop():
+        state["server"].close()
+        await state["server"].wait_closed()
+        await service.batcher.stop()
+
+    asyncio.run_coroutine_threadsafe(stop(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def post(port, body):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        connection.request("POST", "/predict", body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_predict_over_http(service_port):
+    assert send_requests("127.0.0.1", service_port, SEQUENCES.tolist()) == [1, 2, 3]
+    status, response = post(service_port, json.dumps({"sequences": SEQUENCES.tolist()}))
+    assert status == 200 and response == {"groups": [1, 2, 3]}
+
+    metrics = fetch_metrics("127.0.0.1", service_port)
+    assert metrics["requests"] == 4
+    assert metrics["sequences"] == 6
+    assert metrics["errors"] == 0
+
+
+@pytest.mark.parametrize("body", [
+    "[1, 2]",
+    '"x"',
+    "null",
+    "not json",
+    "{}",
+    '{"sequences": []}',
+    '{"sequences": [[165, 173]]}',
+    '{"sequences": [[165, 173, 252], [165]]}',
+    '{"sequences": [["a", "b", "c", "d", "e"]]}',
+    '{"sequences": [[{}, 1, 2, 3, 4]]}',
+])
+def test_bad_requests_get_400(service_port, body):
+    status, response = post(service_port, body)
+    assert status == 400
+    assert "error" in response
+    # The connection is still served and the error is counted
+    assert fetch_metrics("127.0.0.1", service_port)["errors"] == 1
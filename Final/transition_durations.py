@@ -0,0 +1,381 @@
+import argparse
+import csv
+from itertools import islice
+import numpy as np
+
+# Transition-duration statistics from task-completion event logs.
+#
+#   python transition_durations.py events.csv
+#   python transition_durations.py events.csv --groups process_groups.csv --output durations.csv
+#
+# An event is (process instance, formKey, completion time). The duration of a
+# transition A -> B is the time between an instance completing A and then B.
+# Events are read in chunks and each chunk is handled with numpy: rows are
+# ordered by instance (stable, so time order within an instance is kept),
+# consecutive rows of an instance become transitions, and the last event of
+# every instance is carried over to the next chunk.
+#
+# The carried events are the only state that grows with the log: by default
+# there is one per instance ever seen. For a log sorted by instance
+# (--grouped-by-instance) only the instance of the chunk's last row is
+# carried. Otherwise --idle-timeout drops instances with no event for that
+# many seconds before the newest event read so far; a later event of a
+# dropped instance starts it afresh (its transition across the gap is lost).
+#
+# Per key (transition or group) the accumulator keeps count, mean and M2
+# (Welford/Chan, so chunks and whole accumulators merge exactly) plus a
+# log-bucketed quantile sketch: bucket i holds durations in
+# (gamma^(i-1), gamma^i], so any quantile is estimated within
+# relative_accuracy. As in DDSketch, each key stores only the span of buckets
+# its durations fall in (an offset and a small array grown on demand), so a
+# key whose durations stay within a factor of 10 costs ~120 counters at 1%
+# accuracy, and memory does not depend on the number of events.
+#
+# A transition is keyed by packing its from and to formKeys into one int64,
+# which holds formKeys from 0 to MAX_FORM_KEY; others raise ValueError.
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+MAX_FORM_KEY = (1 << 31) - 1
+
+
+class DurationAccumulator:
+    """Streaming count/mean/variance/min/max and quantile sketch per integer key"""
+
+    def __init__(self, relative_accuracy=0.01, min_duration=1e-3, max_duration=1e10):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.min_duration = min_duration
+        self._log_gamma = np.log(self.gamma)
+        self._offset = int(np.floor(np.log(min_duration) / self._log_gamma))
+        # Bucket 0 holds durations <= min_duration (including 0)
+        self.num_buckets = int(np.ceil(np.log(max_duration) / self._log_gamma)) - self._offset + 1
+
+        self._slot_of_key = {}
+        self.keys = []
+        self.count = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+        self.min = np.zeros(0)
+        self.max = np.zeros(0)
+        # Per key: index of its lowest stored bucket and the counts from there on
+        self._bucket_offset = []
+        self._bucket_counts = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _slots(self, keys):
+        new_keys = [key for key in keys if key not in self._slot_of_key]
+        if new_keys:
+            first = len(self.keys)
+            for slot, key in enumerate(new_keys, start=first):
+                self._slot_of_key[key] = slot
+            self.keys.extend(new_keys)
+            extra = len(new_keys)
+            self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+            self.mean = np.concatenate([self.mean, np.zeros(extra)])
+            self.m2 = np.concatenate([self.m2, np.zeros(extra)])
+            self.min = np.concatenate([self.min, np.full(extra, np.inf)])
+            self.max = np.concatenate([self.max, np.full(extra, -np.inf)])
+            self._bucket_offset.extend([0] * extra)
+            self._bucket_counts.extend(np.zeros(0, dtype=np.int64) for _ in range(extra))
+        return np.fromiter((self._slot_of_key[key] for key in keys), dtype=np.int64, count=len(keys))
+
+    def bucket_of(self, durations):
+        durations = np.maximum(np.asarray(durations, dtype=np.float64), self.min_duration)
+        index = np.ceil(np.log(durations) / self._log_gamma).astype(np.int64) - self._offset
+        return np.clip(index, 0, self.num_buckets - 1)
+
+    def add(self, keys, durations):
+        """Add one duration per key (keys: int64 array, durations: seconds)"""
+        keys = np.asarray(keys, dtype=np.int64)
+        durations = np.asarray(durations, dtype=np.float64)
+        if len(keys) == 0:
+            return
+        distinct, inverse = np.unique(keys, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        k = len(distinct)
+        count = np.bincount(inverse, minlength=k)
+        mean = np.bincount(inverse, weights=durations, minlength=k) / count
+        m2 = np.bincount(inverse, weights=(durations - mean[inverse]) ** 2, minlength=k)
+        low = np.full(k, np.inf)
+        np.minimum.at(low, inverse, durations)
+        high = np.full(k, -np.inf)
+        np.maximum.at(high, inverse, durations)
+        slots = self._slots(distinct.tolist())
+        self._merge(slots, count, mean, m2, low, high)
+        # Non-empty (key, bucket) cells only, ordered by key then bucket
+        cells, cell_counts = np.unique(inverse * self.num_buckets + self.bucket_of(durations),
+                                       return_counts=True)
+        rows = cells // self.num_buckets
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        for start, end in zip(starts.tolist(), np.r_[starts[1:], len(cells)].tolist()):
+            self._add_buckets(int(slots[rows[start]]), cells[start:end] % self.num_buckets,
+                              cell_counts[start:end])
+
+    def _add_buckets(self, slot, buckets, counts):
+        # buckets: distinct, ascending bucket indices of one key
+        offset, stored = self._bucket_offset[slot], self._bucket_counts[slot]
+        low, high = int(buckets[0]), int(buckets[-1])
+        if len(stored):
+            low, high = min(low, offset), max(high, offset + len(stored) - 1)
+        if not len(stored) or low < offset or high >= offset + len(stored):
+            grown = np.zeros(high - low + 1, dtype=np.int64)
+            grown[offset - low:offset - low + len(stored)] = stored
+            offset, stored = low, grown
+        stored[buckets - offset] += counts
+        self._bucket_offset[slot], self._bucket_counts[slot] = offset, stored
+
+    def _merge(self, slots, count, mean, m2, low, high):
+        # Chan et al. pairwise update of (count, mean, M2)
+        count_a = self.count[slots]
+        total = count_a + count
+        delta = mean - self.mean[slots]
+        self.mean[slots] += delta * count / total
+        self.m2[slots] += m2 + delta ** 2 * count_a * count / total
+        self.count[slots] = total
+        self.min[slots] = np.minimum(self.min[slots], low)
+        self.max[slots] = np.maximum(self.max[slots], high)
+
+    def merge(self, other):
+        """Fold another accumulator with the same bucket layout into this one"""
+        if (other.gamma, other.min_duration, other.num_buckets) != (self.gamma, self.min_duration, self.num_buckets):
+            raise ValueError("accumulators use different quantile sketch settings")
+        if len(other):
+            keep = other.count > 0
+            keys = [key for key, kept in zip(other.keys, keep.tolist()) if kept]
+            slots = self._slots(keys)
+            self._merge(slots, other.count[keep], other.mean[keep], other.m2[keep],
+                        other.min[keep], other.max[keep])
+            for slot, other_slot in zip(slots.tolist(), np.flatnonzero(keep).tolist()):
+                stored = other._bucket_counts[other_slot]
+                filled = np.flatnonzero(stored)
+                if len(filled):
+                    self._add_buckets(slot, filled + other._bucket_offset[other_slot], stored[filled])
+        return self
+
+    def quantiles(self, quantiles=QUANTILES):
+        """(keys x quantiles) estimates, each within relative_accuracy of the true value"""
+        result = np.full((len(self.keys), len(quantiles)), np.nan)
+        fractions = np.asarray(quantiles, dtype=np.float64)
+        for slot in np.flatnonzero(self.count > 0).tolist():
+            rank = np.floor(fractions * (self.count[slot] - 1)).astype(np.int64)
+            bucket = self._bucket_offset[slot] + np.searchsorted(
+                np.cumsum(self._bucket_counts[slot]), rank, side="right")
+            estimate = 2 * self.gamma ** (bucket + self._offset) / (self.gamma + 1)
+            estimate = np.where(bucket == 0, self.min[slot], estimate)
+            # Estimates never leave the observed range
+            result[slot] = np.clip(estimate, self.min[slot], self.max[slot])
+        return result
+
+    def summary(self, quantiles=QUANTILES):
+        """One dict per key: count, mean, variance, std, min, max and the quantiles"""
+        variance = np.where(self.count > 1, self.m2 / np.maximum(self.count - 1, 1), 0.0)
+        estimates = self.quantiles(quantiles)
+        rows = []
+        for slot, key in enumerate(self.keys):
+            row = {"key": key, "count": int(self.count[slot]), "mean": float(self.mean[slot]),
+                   "variance": float(variance[slot]), "std": float(np.sqrt(variance[slot])),
+                   "min": float(self.min[slot]), "max": float(self.max[slot])}
+            for q, estimate in zip(quantiles, estimates[slot].tolist()):
+                row[f"p{round(q * 100):g}"] = estimate
+            rows.append(row)
+        return rows
+
+
+def transition_key(from_form_keys, to_form_keys):
+    """Pack (from, to) formKey pairs into one int64 each; formKeys must be in 0..MAX_FORM_KEY"""
+    from_form_keys = np.asarray(from_form_keys, dtype=np.int64)
+    to_form_keys = np.asarray(to_form_keys, dtype=np.int64)
+    for form_keys in (from_form_keys, to_form_keys):
+        if form_keys.size and (form_keys.min() < 0 or form_keys.max() > MAX_FORM_KEY):
+            raise ValueError(f"formKeys must be between 0 and {MAX_FORM_KEY} to be packed into a "
+                             f"transition key, got {int(form_keys.min())}..{int(form_keys.max())}")
+    return (from_form_keys << 32) | to_form_keys
+
+
+def split_transition_key(key):
+    return int(key) >> 32, int(key) & 0xFFFFFFFF
+
+
+class TransitionDurationAggregator:
+    """One-pass duration statistics per formKey transition and per process group.
+
+    Events must be in time order within each instance; instances may be
+    interleaved. The last event of every instance seen is kept for the next
+    chunk, so memory grows with the number of instances unless
+    events_grouped_by_instance (e.g. a log exported ORDER BY instance, time;
+    only the instance of the chunk's last row is kept) or idle_timeout
+    (instances idle that many seconds are dropped) is set. group_of maps an
+    instance id to its group; transitions of unmapped instances only count
+    towards the per-transition statistics.
+    """
+
+    def __init__(self, group_of=None, relative_accuracy=0.01, events_grouped_by_instance=False,
+                 idle_timeout=None):
+        self.group_of = group_of or {}
+        self.events_grouped_by_instance = events_grouped_by_instance
+        self.idle_timeout = idle_timeout
+        self.latest_time = -np.inf
+        self.by_transition = DurationAccumulator(relative_accuracy)
+        self.by_group = DurationAccumulator(relative_accuracy)
+        self._last_event = {}
+        self.num_events = 0
+
+    def add_events(self, instances, form_keys, timestamps):
+        """Add one chunk of events (timestamps in seconds)"""
+        instances = np.asarray(instances)
+        form_keys = np.asarray(form_keys, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        n = len(instances)
+        if n == 0:
+            return
+        self.num_events += n
+
+        instance_ids, inverse = np.unique(instances, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind="stable")
+        instance_of_row = inverse[order]
+        form_keys, timestamps = form_keys[order], timestamps[order]
+        starts = np.flatnonzero(np.r_[True, instance_of_row[1:] != instance_of_row[:-1]])
+        ends = np.r_[starts[1:], n] - 1
+        ids = instance_ids[instance_of_row[starts]].tolist()
+
+        # Transitions inside the chunk
+        same = instance_of_row[1:] == instance_of_row[:-1]
+        from_keys, to_keys = form_keys[:-1][same], form_keys[1:][same]
+        durations = (timestamps[1:] - timestamps[:-1])[same]
+        row_instance = instance_of_row[1:][same]
+
+        # Transitions from each instance's last event in earlier chunks
+        carried = [(index, self._last_event[instance_id])
+                   for index, instance_id in enumerate(ids) if instance_id in self._last_event]
+        if carried:
+            index = np.array([index for index, _ in carried], dtype=np.int64)
+            previous_keys = np.array([event[0] for _, event in carried], dtype=np.int64)
+            previous_times = np.array([event[1] for _, event in carried], dtype=np.float64)
+            from_keys = np.concatenate([previous_keys, from_keys])
+            to_keys = np.concatenate([form_keys[starts[index]], to_keys])
+            durations = np.concatenate([timestamps[starts[index]] - previous_times, durations])
+            row_instance = np.concatenate([instance_of_row[starts[index]], row_instance])
+
+        if self.events_grouped_by_instance:
+            # Only the instance of the chunk's last row (in input order) can continue
+            self._last_event = {}
+            last = [int(inverse[-1])]
+        else:
+            last = range(len(ids))
+        for index in last:
+            self._last_event[ids[index]] = (int(form_keys[ends[index]]), float(timestamps[ends[index]]))
+        if self.idle_timeout is not None:
+            self.latest_time = max(self.latest_time, float(timestamps.max()))
+            cutoff = self.latest_time - self.idle_timeout
+            self._last_event = {instance_id: event for instance_id, event in self._last_event.items()
+                                if event[1] >= cutoff}
+
+        self.by_transition.add(transition_key(from_keys, to_keys), durations)
+        if self.group_of:
+            groups = np.array([self.group_of.get(instance_id, -1) for instance_id in instance_ids.tolist()],
+                              dtype=np.int64)[row_instance]
+            mapped = groups >= 0
+            self.by_group.add(groups[mapped], durations[mapped])
+
+    def transition_summary(self, quantiles=QUANTILES):
+        rows = self.by_transition.summary(quantiles)
+        for row in rows:
+            row["from_form_key"], row["to_form_key"] = split_transition_key(row.pop("key"))
+        return sorted(rows, key=lambda row: (row["from_form_key"], row["to_form_key"]))
+
+    def group_summary(self, quantiles=QUANTILES):
+        rows = self.by_group.summary(quantiles)
+        for row in rows:
+            row["group"] = row.pop("key")
+        return sorted(rows, key=lambda row: row["group"])
+
+
+def parse_timestamps(values):
+    """Seconds since the epoch from numeric strings or ISO 8601 datetimes"""
+    values = np.asarray(values)
+    try:
+        return values.astype(np.float64)
+    except ValueError:
+        return values.astype("datetime64[ms]").astype(np.int64) / 1000.0
+
+
+def iter_event_chunks(csv_file_path, chunk_size=1_000_000, instance_column="instance_id",
+                      form_key_column="formKey", time_column="timestamp"):
+    """Yield (instances, formKeys, timestamps) arrays for consecutive blocks of rows"""
+    with open(csv_file_path, newline="") as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader)
+        columns = [header.index(name) for name in (instance_column, form_key_column, time_column)]
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                break
+            instances, form_keys, timestamps = zip(*([row[c] for c in columns] for row in rows if row))
+            yield (np.array(instances), np.array(form_keys, dtype=np.int64),
+                   parse_timestamps(np.array(timestamps)))
+
+
+def load_group_map(csv_file_path):
+    """instance id -> group from a two-column CSV (instance id, group)"""
+    with open(csv_file_path, newline="") as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader)
+        return {row[0]: int(row[1]) for row in reader if row}
+
+
+def aggregate_event_log(csv_file_path, group_of=None, chunk_size=1_000_000, events_grouped_by_instance=False,
+                        idle_timeout=None):
+    """TransitionDurationAggregator fed with every event of a CSV log"""
+    aggregator = TransitionDurationAggregator(group_of=group_of,
+                                              events_grouped_by_instance=events_grouped_by_instance,
+                                              idle_timeout=idle_timeout)
+    for instances, form_keys, timestamps in iter_event_chunks(csv_file_path, chunk_size):
+        aggregator.add_events(instances, form_keys, timestamps)
+    return aggregator
+
+
+def write_summary(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transition-duration statistics from an event log")
+    parser.add_argument("events", help="CSV with instance_id, formKey and timestamp columns")
+    parser.add_argument("--groups", default=None, help="CSV mapping instance id to group")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--grouped-by-instance", action="store_true",
+                        help="events are sorted by instance, so only one instance is carried between chunks")
+    parser.add_argument("--idle-timeout", type=float, default=None,
+                        help="forget instances with no event for this many seconds")
+    parser.add_argument("--output", default=None, help="write the per-transition table to this CSV")
+    args = parser.parse_args(argv)
+
+    aggregator = aggregate_event_log(args.events, load_group_map(args.groups) if args.groups else None,
+                                     args.chunk_size, args.grouped_by_instance, args.idle_timeout)
+
+    rows = aggregator.transition_summary()
+    print(f"=== Transition Durations ({aggregator.num_events} events) ===")
+    print(f"{'transition':<16}{'count':>10}{'mean':>12}{'std':>12}{'p50':>12}{'p90':>12}{'p99':>12}")
+    for row in rows:
+        transition = f"{row['from_form_key']} -> {row['to_form_key']}"
+        print(f"{transition:<16}{row['count']:>10}{row['mean']:>12.1f}{row['std']:>12.1f}"
+              f"{row['p50']:>12.1f}{row['p90']:>12.1f}{row['p99']:>12.1f}")
+    if aggregator.group_of:
+        print()
+        print("=== Durations by Group ===")
+        for row in aggregator.group_summary():
+            print(f"Group {row['group']}: {row['count']} transitions, mean {row['mean']:.1f}s, "
+                  f"p50 {row['p50']:.1f}s, p90 {row['p90']:.1f}s")
+    if args.output and rows:
+        write_summary(args.output, rows)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class UnionFind:
+    """Disjoint-set forest over process indices, stored in growable numpy arrays.
+
+    Uses path compression and union by size. New processes are appended with
+    add() and new similar pairs merged with union()/union_pairs(), so groups
+    can be kept up to date without rebuilding a similarity graph.
+    """
+
+    def __init__(self, n=0):
+        capacity = max(n, 16)
+        self._parent = np.arange(capacity, dtype=np.int64)
+        self._size = np.ones(capacity, dtype=np.int64)
+        self._n = n
+        self.num_groups = n
+
+    def __len__(self):
+        return self._n
+
+    def add(self, count=1):
+        """Append count new single-process groups; returns the index of the first one"""
+        first = self._n
+        needed = self._n + count
+        if needed > len(self._parent):
+            capacity = max(needed, 2 * len(self._parent))
+            parent = np.arange(capacity, dtype=np.int64)
+            parent[:self._n] = self._parent[:self._n]
+            size = np.ones(capacity, dtype=np.int64)
+            size[:self._n] = self._size[:self._n]
+            self._parent, self._size = parent, size
+        self._n = needed
+        self.num_groups += count
+        return first
+
+    def find(self, x):
+        parent = self._parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return int(root)
+
+    def union(self, a, b):
+        """Merge the groups of a and b; returns True if they were separate"""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size[root_b]
+        self.num_groups -= 1
+        return True
+
+    def union_pairs(self, first, second):
+        """Merge every pair (first[k], second[k])"""
+        for a, b in zip(np.asarray(first).tolist(), np.asarray(second).tolist()):
+            self.union(a, b)
+
+    def roots(self):
+        """Root of every element, compressing all paths at once by pointer jumping"""
+        parent = self._parent[:self._n]
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                return parent.copy()
+            parent[:] = grandparent
+
+    def groups(self):
+        """Member index arrays of every group, ordered by each group's smallest member"""
+        roots = self.roots()
+        order = np.argsort(roots, kind="stable")
+        starts = np.flatnonzero(np.diff(roots[order])) + 1
+        members = np.split(order, starts) if self._n else []
+        members.sort(key=lambda group: group[0])
+        return members
@@ -33,7 +33,7 @@ Identified key patterns in starting sequences of user tasks:
 ### Model Selection
 - **Decision Trees**: Classified workflows based on starting formKey patterns
 - **Process Mining**: Reconstructed actual workflow paths
-- **Markov Models**: Analyzed probabilistic transitions (future implementation)
+- **Markov Models**: Analyzed probabilistic transitions (Final/markov_model.py)
 
 ### Solution
 Built automated classification system using:
@@ -58,57 +58,74 @@ Identified 3 distinct workflow groups based on first 4 formKey patterns:
 - Standardized subprocesses possible for first 4 tasks
 """
 
-print(documentation)
-
 # Visualization Code
-import matplotlib.pyplot as plt
 import numpy as np
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Final"))
+from bpmn_parser import BPMN_SUFFIX, list_bpmn_files
+from chart_rendering import chart, render_charts, show_charts
+from transition_durations import aggregate_event_log
 
 # Data for visualizations
 bpmn_dir = r"C:\Users\ansarkar\Desktop\Presentation\bpmn_files"
+# Task-completion event log (CSV with instance_id, formKey, timestamp; the
+# instance ids are the process names). Without one the durations are simulated.
+event_log_path = None
 groups = ['Group 1', 'Group 2', 'Group 3']
 process_counts = [3, 5, 2]
 formkey_patterns = ['(165,173,254,301)', '(165,173,252,300)', '(165,173,256,303)']
 colors = ['#ff9999','#66b3ff','#99ff99']
 
-# 1. Process Distribution Pie Chart
-plt.figure(figsize=(9, 6))
-plt.pie(process_counts, labels=groups, autopct='%1.1f%%', colors=colors, startangle=90)
-plt.title('Process Distribution Across Groups')
-plt.axis('equal')
-plt.show()
-
-# 2. Group Comparison Bar Chart
-plt.figure(figsize=(10, 6))
-x = np.arange(len(groups))
-plt.bar(x, process_counts, color=colors)
-plt.xticks(x, groups)
-plt.xlabel('Workflow Groups')
-plt.ylabel('Number of Processes')
-plt.title('Process Count per Workflow Group')
-for i, v in enumerate(process_counts):
-    plt.text(i, v + 0.1, str(v), ha='center')
-plt.show()
-
-# 3. FormKey Pattern Visualization
-plt.figure(figsize=(12, 6))
-plt.bar(groups, process_counts, color=colors)
-plt.xlabel('Workflow Groups')
-plt.ylabel('Number of Processes')
-plt.title('FormKey Patterns in Workflow Groups')
-for i, (count, pattern) in enumerate(zip(process_counts, formkey_patterns)):
-    plt.text(i, count/2, pattern, ha='center', va='center', color='white', fontsize=12, fontweight='bold')
-plt.show()
-
-# 4. Process Timeline (Conceptual)
-processes = [filename.replace(".bpmn20.xml", "") for filename in os.listdir(bpmn_dir) if filename.endswith(".bpmn20.xml")]
-durations = np.random.randint(5, 30, size=len(processes))  # Simulated durations
-
-plt.figure(figsize=(14, 8))
-plt.barh(processes, durations, color='skyblue')
-plt.xlabel('Processing Time (minutes)')
-plt.ylabel('Processes')
-plt.title('Simulated Process Durations')
-plt.grid(axis='x', linestyle='--', alpha=0.7)
-plt.show()
+# "interactive" shows each chart; "headless" renders them to chart_dir in
+# parallel worker processes (no display needed)
+render_mode = "interactive"
+chart_dir = "figures"
+
+
+def main():
+    print(documentation)
+
+    charts = [
+        # 1. Process Distribution Pie Chart
+        chart("pie", groups, process_counts, 'Process Distribution Across Groups', 'process_distribution.png',
+              figsize=(9, 6), colors=colors, equal_axis=True, group_sizes=True),
+        # 2. Group Comparison Bar Chart
+        chart("bar", groups, process_counts, 'Process Count per Workflow Group', 'group_comparison.png',
+              figsize=(10, 6), colors=colors, xlabel='Workflow Groups', ylabel='Number of Processes',
+              text_format='{:.0f}', text_offset=0.1, additive=True),
+        # 3. FormKey Pattern Visualization
+        chart("bar", groups, process_counts, 'FormKey Patterns in Workflow Groups', 'formkey_patterns.png',
+              figsize=(12, 6), colors=colors, xlabel='Workflow Groups', ylabel='Number of Processes',
+              texts=formkey_patterns, text_position='center', text_color='white', text_fontsize=12,
+              text_weight='bold'),
+    ]
+
+    # 4. Process Timeline (Conceptual)
+    if os.path.isdir(bpmn_dir):
+        processes = [filename[:-len(BPMN_SUFFIX)] for filename in list_bpmn_files(bpmn_dir)]
+        totals = {}
+        if event_log_path:
+            # First to last task completion of each process, in minutes
+            totals = {row["group"]: row["mean"] * row["count"] / 60 for row in aggregate_event_log(
+                event_log_path, {process: i for i, process in enumerate(processes)}).group_summary()}
+        if totals:
+            durations = [totals.get(i, 0.0) for i in range(len(processes))]
+            title = 'Process Durations'
+        else:
+            # No event log, or none of its transitions belong to these processes
+            durations = np.random.randint(5, 30, size=len(processes))  # Simulated durations
+            title = 'Simulated Process Durations'
+        charts.append(chart("barh", processes, durations, title, 'process_durations.png',
+                            figsize=(14, 8), color='skyblue', xlabel='Processing Time (minutes)',
+                            ylabel='Processes', grid='x', grid_linestyle='--', grid_alpha=0.7))
+
+    if render_mode == "headless":
+        render_charts(charts, chart_dir)
+    else:
+        show_charts(charts)
+
+
+if __name__ == "__main__":
+    main()